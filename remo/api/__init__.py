@@ -34,6 +34,29 @@ class RemoThrottleMixin(object):
             raise ImmediateHttpResponse(response=response)
 
 
+class EagerLoadingMixin(object):
+    """API mixin to load the related objects of a resource in bulk.
+
+    The Meta class of the resource may define the relations to join
+    ('select_related'), the relations to fetch with a query each
+    ('prefetch_related') and the aggregates to annotate the objects
+    with ('annotations'), so that a page of objects is serialized with
+    a constant number of queries.
+    """
+    def get_object_list(self, request):
+        object_list = super(EagerLoadingMixin, self).get_object_list(request)
+        select_related = getattr(self._meta, 'select_related', None)
+        if select_related:
+            object_list = object_list.select_related(*select_related)
+        prefetch_related = getattr(self._meta, 'prefetch_related', None)
+        if prefetch_related:
+            object_list = object_list.prefetch_related(*prefetch_related)
+        annotations = getattr(self._meta, 'annotations', None)
+        if annotations:
+            object_list = object_list.annotate(**annotations)
+        return object_list
+
+
 class RemoAPIThrottle(CacheThrottle):
     """Throttle class for ReMo API."""
     def should_be_throttled(self, req_id, **kwargs):
@@ -0,0 +1,109 @@
+"""Aggregation helpers shared by the KPI endpoints."""
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from rest_framework.response import Response
+
+from remo.api.serializers import BaseKPISerializer
+from remo.base.utils import get_quarter
+
+
+KPI_WEEKS = 12
+
+
+def to_date(value):
+    """Return the date of a date or datetime /value/."""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def get_histogram(queryset, date_field, aggregate=None):
+    """Return a dict with the aggregate of /queryset/ per date of the
+    DateField /date_field/, computed with a single GROUP BY query.
+
+    By default the distinct objects of each date are counted.
+    """
+    if aggregate is None:
+        aggregate = Count('pk', distinct=True)
+    return dict(queryset.order_by().values_list(date_field).annotate(aggregate))
+
+
+def sum_counts(daily_counts, start=None, end=None):
+    """Sum /daily_counts/ from /start/ up to, but not including, /end/."""
+    start = to_date(start)
+    end = to_date(end)
+    return sum(count for date, count in daily_counts.items()
+               if (not start or date >= start) and (not end or date < end))
+
+
+def get_weekly_counts(daily_counts):
+    """Group /daily_counts/ by the Monday of their week."""
+    weekly_counts = Counter()
+    for date, count in daily_counts.items():
+        weekly_counts[get_week_start(date)] += count
+    return weekly_counts
+
+
+def get_growth_percentage(current, previous):
+    """Percentage change from /previous/ to /current/."""
+    diff = current - previous
+    try:
+        return diff / float(previous) * 100
+    except ZeroDivisionError:
+        if diff > 0:
+            return 100
+        return 0
+
+
+def get_week_start(date):
+    """Return the Monday of the week of /date/."""
+    return date - timedelta(days=date.weekday())
+
+
+def get_kpi_data(daily_counts, today, weeks=KPI_WEEKS, name='total'):
+    """Return the totals, growth and weekly series of /daily_counts/.
+
+    The weekly series holds the counts of the last /weeks/ weeks, up
+    to the week of /today/, under the /name/ key.
+    """
+    today = to_date(today)
+
+    # Quarter calculations
+    current_quarter_start = get_quarter(today)[1]
+    previous_quarter_end = current_quarter_start - timedelta(days=1)
+    previous_quarter_start = get_quarter(previous_quarter_end)[1]
+    quarter_total = sum_counts(daily_counts, start=current_quarter_start)
+    previous_quarter_total = sum_counts(daily_counts, start=previous_quarter_start,
+                                        end=current_quarter_start)
+
+    # Week calculations
+    weekly_counts = get_weekly_counts(daily_counts)
+    current_week_start = get_week_start(today)
+    prev_week_start = current_week_start - timedelta(weeks=1)
+    week_total = sum_counts(daily_counts, start=current_week_start)
+    prev_week_total = weekly_counts[prev_week_start]
+
+    total_per_week = []
+    for i in range(weeks):
+        start = current_week_start - timedelta(weeks=i)
+        total_per_week.append({'week': weeks - i, name: weekly_counts[start]})
+
+    return {
+        'total': sum(daily_counts.values()),
+        'quarter_total': quarter_total,
+        'quarter_growth_percentage': get_growth_percentage(quarter_total,
+                                                           previous_quarter_total),
+        'week_total': week_total,
+        'week_growth_percentage': get_growth_percentage(week_total, prev_week_total),
+        'total_per_week': total_per_week
+    }
+
+
+def get_kpi_response(data, serializer_class=BaseKPISerializer, name='KPI'):
+    """Serialize KPI /data/ in an API response."""
+    kpi = namedtuple(name, data.keys())(*data.values())
+    return Response(serializer_class(kpi).data)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('profiles', '0012_groups_new_newsletter_group'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KPIRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('kind', models.CharField(max_length=20, choices=[(b'activities', b'Activities'), (b'events', b'Events'), (b'people', b'People')])),
+                ('date', models.DateField()),
+                ('country', models.CharField(default=b'', max_length=50, blank=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('campaign', models.ForeignKey(related_name='+', blank=True, to='reports.Campaign', null=True)),
+                ('functional_area', models.ForeignKey(related_name='+', blank=True, to='profiles.FunctionalArea', null=True)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='kpirollup',
+            index_together=set([('kind', 'date', 'country')]),
+        ),
+    ]
@@ -0,0 +1,142 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.encoding import python_2_unicode_compatible
+
+from remo.events.models import Event
+from remo.profiles.models import FunctionalArea, UserProfile
+from remo.reports.models import Campaign, NGReport
+
+
+@python_2_unicode_compatible
+class KPIRollup(models.Model):
+    """Number of KPI objects per date, country, area and initiative.
+
+    A row without functional area or campaign counts the objects of all
+    the functional areas or campaigns respectively.
+    """
+    ACTIVITIES = 'activities'
+    EVENTS = 'events'
+    PEOPLE = 'people'
+    KIND_CHOICES = ((ACTIVITIES, 'Activities'),
+                    (EVENTS, 'Events'),
+                    (PEOPLE, 'People'))
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField()
+    country = models.CharField(max_length=50, blank=True, default='')
+    functional_area = models.ForeignKey(FunctionalArea, null=True, blank=True,
+                                        related_name='+')
+    campaign = models.ForeignKey(Campaign, null=True, blank=True, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        index_together = [('kind', 'date', 'country')]
+
+    def __str__(self):
+        return u'{0} {1} {2}: {3}'.format(self.kind, self.date, self.country, self.count)
+
+
+ROLLUP_KINDS = {
+    NGReport: KPIRollup.ACTIVITIES,
+    Event: KPIRollup.EVENTS,
+    UserProfile: KPIRollup.PEOPLE
+}
+
+
+def _update_people_rollups(users):
+    # Avoid circular dependency
+    from remo.api.rollups import get_rollup_key, update_rollups
+
+    profiles = UserProfile.objects.filter(user__in=users)
+    update_rollups(KPIRollup.PEOPLE,
+                   [get_rollup_key(KPIRollup.PEOPLE, profile) for profile in profiles])
+
+
+def store_kpi_rollup_object(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of an object before it changes."""
+    instance._kpi_rollup_stored = None
+    if raw or not instance.pk:
+        return
+    try:
+        instance._kpi_rollup_stored = sender.objects.get(pk=instance.pk)
+    except sender.DoesNotExist:
+        pass
+
+
+def update_kpi_rollups(sender, instance, raw=False, **kwargs):
+    """Update the rollups of a saved object."""
+    # Avoid circular dependency
+    from remo.api.rollups import get_rollup_key, has_rollup_changes, update_rollups
+
+    kind = ROLLUP_KINDS[sender]
+    stored = getattr(instance, '_kpi_rollup_stored', None)
+    if raw or (stored and not has_rollup_changes(kind, stored, instance)):
+        return
+
+    keys = [get_rollup_key(kind, instance)]
+    if stored:
+        keys.append(get_rollup_key(kind, stored))
+    update_rollups(kind, keys)
+
+    # Reports define the initiatives of their users.
+    if sender == NGReport and (not stored or stored.campaign_id != instance.campaign_id):
+        _update_people_rollups([instance.user_id])
+
+
+def delete_kpi_rollups(sender, instance, **kwargs):
+    """Update the rollups of a deleted object."""
+    # Avoid circular dependency
+    from remo.api.rollups import get_rollup_key, update_rollups
+
+    kind = ROLLUP_KINDS[sender]
+    update_rollups(kind, [get_rollup_key(kind, instance)])
+    if sender == NGReport:
+        _update_people_rollups([instance.user_id])
+
+
+def update_kpi_rollups_m2m(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Update the rollups of objects with changed functional areas."""
+    # Avoid circular dependency
+    from remo.api.rollups import get_rollup_key, update_rollups
+
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if reverse:
+        # Reverse clear does not provide the affected objects,
+        # leave them to the nightly reconcile.
+        objects = model.objects.filter(pk__in=pk_set or [])
+    else:
+        model = type(instance)
+        objects = [instance]
+    kind = ROLLUP_KINDS[model]
+    update_rollups(kind, [get_rollup_key(kind, obj) for obj in objects])
+
+
+for model, kind in ROLLUP_KINDS.items():
+    pre_save.connect(store_kpi_rollup_object, sender=model,
+                     dispatch_uid='kpi_rollup_{0}_pre_save_signal'.format(kind))
+    post_save.connect(update_kpi_rollups, sender=model,
+                      dispatch_uid='kpi_rollup_{0}_post_save_signal'.format(kind))
+    post_delete.connect(delete_kpi_rollups, sender=model,
+                        dispatch_uid='kpi_rollup_{0}_post_delete_signal'.format(kind))
+
+m2m_changed.connect(update_kpi_rollups_m2m, sender=NGReport.functional_areas.through,
+                    dispatch_uid='kpi_rollup_activities_m2m_signal')
+m2m_changed.connect(update_kpi_rollups_m2m, sender=Event.categories.through,
+                    dispatch_uid='kpi_rollup_events_m2m_signal')
+m2m_changed.connect(update_kpi_rollups_m2m, sender=UserProfile.functional_areas.through,
+                    dispatch_uid='kpi_rollup_people_m2m_signal')
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='kpi_rollup_people_groups_signal')
+def update_kpi_rollups_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update the people rollups of users joining or leaving groups."""
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if reverse:
+        users = list(pk_set or [])
+    else:
+        users = [instance.pk]
+    _update_people_rollups(users)
@@ -0,0 +1,145 @@
+"""Precomputed KPI counts.
+
+For each KPI kind (activities, events, people) KPIRollup stores the
+number of objects per (date, country, functional area, initiative).
+Rows with no functional area or no initiative count every object of
+the date and country, the rest count each area and initiative the
+object belongs to. The rows of a (date, country) bucket are recomputed
+whenever an object of the bucket changes and the whole table is
+reconciled nightly.
+"""
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from remo.api.kpi import get_histogram, to_date
+from remo.api.models import KPIRollup
+from remo.events.models import Event
+from remo.profiles.models import UserProfile
+from remo.reports.models import NGReport
+
+
+RollupSource = namedtuple('RollupSource', ['model', 'date_field', 'country_field',
+                                           'area_field', 'initiative_field', 'filters'])
+
+ROLLUP_SOURCES = {
+    KPIRollup.ACTIVITIES: RollupSource(NGReport, 'report_date', 'country',
+                                       'functional_areas', 'campaign', {}),
+    KPIRollup.EVENTS: RollupSource(Event, 'start', 'country', 'categories', 'campaign', {}),
+    KPIRollup.PEOPLE: RollupSource(UserProfile, 'date_joined_program', 'country',
+                                   'functional_areas', 'user__ng_reports__campaign',
+                                   {'user__groups__name': 'Rep',
+                                    'registration_complete': True})
+}
+
+
+def get_rollup_key(kind, obj):
+    """Return the (date, country) bucket of /obj/."""
+    source = ROLLUP_SOURCES[kind]
+    return (to_date(getattr(obj, source.date_field)),
+            getattr(obj, source.country_field))
+
+
+def has_rollup_changes(kind, stored, obj):
+    """Return True if /obj/ counts differently than its /stored/ version."""
+    source = ROLLUP_SOURCES[kind]
+    fields = [source.date_field, source.country_field, source.initiative_field]
+    fields += source.filters.keys()
+    # Related fields change through their own signals.
+    fields = [field for field in fields if '__' not in field]
+    for field in fields:
+        attname = source.model._meta.get_field(field).attname
+        if to_date(getattr(stored, attname)) != to_date(getattr(obj, attname)):
+            return True
+    return False
+
+
+def count_objects(kind, queryset=None):
+    """Count the objects of /kind/ per (date, country, area, initiative)."""
+    source = ROLLUP_SOURCES[kind]
+    if queryset is None:
+        queryset = source.model.objects.all()
+    queryset = queryset.filter(**source.filters)
+
+    objects = dict((pk, (to_date(date), country)) for pk, date, country in
+                   queryset.values_list('pk', source.date_field, source.country_field))
+    areas = defaultdict(set)
+    for pk, area_id in queryset.values_list('pk', source.area_field):
+        if area_id:
+            areas[pk].add(area_id)
+    initiatives = defaultdict(set)
+    for pk, initiative_id in queryset.values_list('pk', source.initiative_field):
+        if initiative_id:
+            initiatives[pk].add(initiative_id)
+
+    counts = Counter()
+    for pk, (date, country) in objects.items():
+        if not date:
+            continue
+        for area_id in [None] + list(areas[pk]):
+            for initiative_id in [None] + list(initiatives[pk]):
+                counts[(date, country, area_id, initiative_id)] += 1
+    return counts
+
+
+def _create_rollups(kind, counts):
+    rollups = [KPIRollup(kind=kind, date=date, country=country, functional_area_id=area_id,
+                         campaign_id=initiative_id, count=count)
+               for (date, country, area_id, initiative_id), count in counts.items()]
+    KPIRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+def update_rollups(kind, keys):
+    """Recompute the rollups of /kind/ for the (date, country) /keys/."""
+    source = ROLLUP_SOURCES[kind]
+    date_field = source.model._meta.get_field(source.date_field)
+
+    for date, country in set(keys):
+        if not date:
+            continue
+        if isinstance(date_field, models.DateTimeField):
+            start = timezone.make_aware(datetime.combine(date, time.min),
+                                        timezone.get_current_timezone())
+            date_query = {source.date_field + '__gte': start,
+                          source.date_field + '__lt': start + timedelta(days=1)}
+        else:
+            date_query = {source.date_field: date}
+        date_query[source.country_field] = country
+        counts = count_objects(kind, source.model.objects.filter(**date_query))
+
+        with transaction.atomic():
+            KPIRollup.objects.filter(kind=kind, date=date, country=country).delete()
+            _create_rollups(kind, counts)
+
+
+@transaction.atomic
+def rebuild_rollups(kind):
+    """Recompute all the rollups of /kind/."""
+    KPIRollup.objects.filter(kind=kind).delete()
+    _create_rollups(kind, count_objects(kind))
+
+
+def get_daily_counts(kind, until=None, country=None, category=None, initiative=None):
+    """Return a dict with the number of objects of /kind/ per date,
+    optionally until date /until/.
+
+    /category/ and /initiative/ are functional area and initiative names.
+    """
+    rollups = KPIRollup.objects.filter(kind=kind)
+    if until:
+        rollups = rollups.filter(date__lte=until)
+    if country:
+        rollups = rollups.filter(country=country)
+    if category:
+        rollups = rollups.filter(functional_area__name=category)
+    else:
+        rollups = rollups.filter(functional_area__isnull=True)
+    if initiative:
+        rollups = rollups.filter(campaign__name=initiative)
+    else:
+        rollups = rollups.filter(campaign__isnull=True)
+
+    return get_histogram(rollups, 'date', Sum('count'))
@@ -0,0 +1,10 @@
+from remo.api.models import KPIRollup
+from remo.api.rollups import rebuild_rollups
+from remo.celery import app
+
+
+@app.task
+def reconcile_kpi_rollups():
+    """Recompute all the KPI rollups from the source data."""
+    for kind, name in KPIRollup.KIND_CHOICES:
+        rebuild_rollups(kind)
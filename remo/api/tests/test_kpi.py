@@ -0,0 +1,50 @@
+from datetime import date
+
+from nose.tools import eq_
+
+from remo.api.kpi import get_growth_percentage, get_histogram, get_kpi_data
+from remo.base.tests import RemoTestCase
+from remo.reports.models import NGReport
+from remo.reports.tests import NGReportFactory
+
+
+class GetHistogramTest(RemoTestCase):
+
+    def test_base(self):
+        NGReportFactory.create_batch(2, report_date=date(2015, 2, 4))
+        NGReportFactory.create(report_date=date(2015, 2, 11))
+
+        with self.assertNumQueries(1):
+            histogram = get_histogram(NGReport.objects.all(), 'report_date')
+        eq_(histogram, {date(2015, 2, 4): 2, date(2015, 2, 11): 1})
+
+
+class GetKPIDataTest(RemoTestCase):
+
+    def test_base(self):
+        daily_counts = {
+            # Previous quarter
+            date(2014, 12, 5): 2,
+            # Week-2
+            date(2015, 2, 11): 4,
+            # Previous week
+            date(2015, 2, 16): 1,
+            date(2015, 2, 22): 1,
+            # Current week
+            date(2015, 2, 26): 3
+        }
+        data = get_kpi_data(daily_counts, date(2015, 3, 1), weeks=3, name='activities')
+
+        eq_(data['total'], 11)
+        eq_(data['quarter_total'], 9)
+        eq_(data['quarter_growth_percentage'], 350)
+        eq_(data['week_total'], 3)
+        eq_(data['week_growth_percentage'], 50)
+        eq_(data['total_per_week'], [{'week': 3, 'activities': 3},
+                                     {'week': 2, 'activities': 2},
+                                     {'week': 1, 'activities': 4}])
+
+    def test_growth_percentage(self):
+        eq_(get_growth_percentage(3, 0), 100)
+        eq_(get_growth_percentage(0, 0), 0)
+        eq_(get_growth_percentage(1, 2), -50)
@@ -0,0 +1,89 @@
+from datetime import date
+
+from django.test.client import RequestFactory
+
+from nose.tools import eq_
+
+from remo.api.models import KPIRollup
+from remo.api.rollups import get_daily_counts, rebuild_rollups
+from remo.api.tasks import reconcile_kpi_rollups
+from remo.base.tests import RemoTestCase
+from remo.events.tests import EventFactory
+from remo.profiles.tests import FunctionalAreaFactory, UserFactory
+from remo.reports.api.views import ActivitiesKPIView
+from remo.reports.tests import CampaignFactory, NGReportFactory
+
+
+class KPIRollupTest(RemoTestCase):
+
+    def setUp(self):
+        self.area = FunctionalAreaFactory.create()
+        self.campaign = CampaignFactory.create()
+        self.report_date = date(2015, 2, 4)
+
+    def test_create_report(self):
+        NGReportFactory.create(report_date=self.report_date, country='Greece',
+                               campaign=self.campaign, functional_areas=[self.area])
+        NGReportFactory.create(report_date=self.report_date, country='Italy',
+                               functional_areas=[self.area])
+
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES), {self.report_date: 2})
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, country='Greece'), {self.report_date: 1})
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, category=self.area.name),
+            {self.report_date: 2})
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, initiative=self.campaign.name),
+            {self.report_date: 1})
+
+    def test_update_report(self):
+        report = NGReportFactory.create(report_date=self.report_date, country='Greece',
+                                        functional_areas=[self.area])
+        report.report_date = date(2015, 2, 5)
+        report.country = 'Italy'
+        report.save()
+        report.functional_areas.clear()
+
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES), {date(2015, 2, 5): 1})
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, country='Greece'), {})
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, category=self.area.name), {})
+
+    def test_event_categories(self):
+        event = EventFactory.create()
+        NGReportFactory.create(event=event, report_date=self.report_date)
+
+        event.categories.add(self.area)
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, category=self.area.name),
+            {self.report_date: 1})
+        event.categories.remove(self.area)
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES, category=self.area.name), {})
+
+    def test_delete_report(self):
+        report = NGReportFactory.create(report_date=self.report_date)
+        report.delete()
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES), {})
+
+    def test_people_initiatives(self):
+        user = UserFactory.create(groups=['Rep'],
+                                  userprofile__date_joined_program=self.report_date)
+        eq_(get_daily_counts(KPIRollup.PEOPLE), {self.report_date: 1})
+        eq_(get_daily_counts(KPIRollup.PEOPLE, initiative=self.campaign.name), {})
+
+        NGReportFactory.create_batch(2, user=user, campaign=self.campaign)
+        eq_(get_daily_counts(KPIRollup.PEOPLE, initiative=self.campaign.name),
+            {self.report_date: 1})
+
+    def test_reconcile(self):
+        NGReportFactory.create_batch(3, report_date=self.report_date)
+        KPIRollup.objects.all().delete()
+
+        reconcile_kpi_rollups()
+        eq_(get_daily_counts(KPIRollup.ACTIVITIES), {self.report_date: 3})
+
+    def test_kpi_view_queries(self):
+        NGReportFactory.create_batch(3, report_date=self.report_date)
+        rebuild_rollups(KPIRollup.ACTIVITIES)
+
+        request = RequestFactory().get('/api/kpi/activities')
+        request.query_params = {'weeks': 52}
+        with self.assertNumQueries(1):
+            response = ActivitiesKPIView().get(request)
+        eq_(response.data['total'], 3)
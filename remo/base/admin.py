@@ -1,4 +1,41 @@
+from itertools import chain
+
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+
+from import_export.admin import ExportMixin
+from import_export.formats.base_formats import CSV
+from import_export.forms import ExportForm
+
+from remo.base.serializers import stream_csv
+from remo.base.utils import iterate_in_chunks
+
+
+class StreamingExportMixin(ExportMixin):
+    """Export mixin streaming the CSV exports.
+
+    The objects are fetched in chunks and each row is sent as soon as it
+    is exported, instead of building the whole file in memory. The other
+    formats are exported as usual.
+    """
+
+    def export_action(self, request, *args, **kwargs):
+        formats = self.get_export_formats()
+        form = ExportForm(formats, request.POST or None)
+        if form.is_valid():
+            file_format = formats[int(form.cleaned_data['file_format'])]()
+            if isinstance(file_format, CSV):
+                queryset = self.get_export_queryset(request)
+                resource = self.get_export_resource_class()()
+                rows = chain([resource.get_export_headers()],
+                             (resource.export_resource(obj)
+                              for obj in iterate_in_chunks(queryset)))
+                response = StreamingHttpResponse(stream_csv(rows),
+                                                 content_type=file_format.get_content_type())
+                response['Content-Disposition'] = 'attachment; filename=%s' % (
+                    self.get_export_filename(file_format))
+                return response
+        return super(StreamingExportMixin, self).export_action(request, *args, **kwargs)
 
 
 class LogEntryAdmin(admin.ModelAdmin):
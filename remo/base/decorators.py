@@ -7,7 +7,7 @@ from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
 
 from remo.base.templatetags.helpers import urlparams
-from remo.base.utils import get_object_or_none
+from remo.base.utils import get_object_or_none, user_in_groups
 
 
 def permission_check(permissions=[], group=None,
@@ -59,7 +59,7 @@ def permission_check(permissions=[], group=None,
 
             def _check_if_user_has_permissions():
                 if (((permissions and request.user.has_perms(permissions))
-                     or request.user.groups.filter(name=group).exists())):
+                     or user_in_groups(request.user, group))):
                     return True
                 return False
 
@@ -104,7 +104,7 @@ class PermissionMixin(object):
 
     @method_decorator(permission_check())
     def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__in=self.groups).exists():
+        if not user_in_groups(request.user, *self.groups):
             messages.error(request, 'Permission denied.')
             return redirect('main')
         return super(PermissionMixin, self).dispatch(request, *args, **kwargs)
@@ -0,0 +1,103 @@
+"""Deferred side effects of the saved objects.
+
+Signal handlers and save() methods queue the work following a save as
+a job with defer() instead of doing it in the request. A job is its
+task and arguments, usually the id of the saved object, and is queued
+once until a worker starts it, so the successive saves of an object run
+it once. The job loads the current state of the objects, so running it
+again is harmless.
+
+Django 1.8 has no on_commit() hook. Jobs deferred inside an atomic()
+block of this module are queued once the block commits, and dropped
+when it rolls back. Other jobs start JOB_COUNTDOWN seconds after they
+are queued, once the request has committed its writes.
+"""
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+
+from remo.celery import app
+
+
+JOB_KEY = 'jobs:{0}:{1}'
+JOB_COUNTDOWN = 5
+# Queued jobs which never started are forgotten after this timeout.
+JOB_KEY_TIMEOUT = 60 * 10
+
+# The jobs deferred inside the atomic() block of each thread.
+_local = threading.local()
+
+
+def get_job_key(task, args):
+    return JOB_KEY.format(task.name, ':'.join(str(arg) for arg in args))
+
+
+def queue_job(key, task, args):
+    try:
+        task.apply_async(args=args, countdown=JOB_COUNTDOWN)
+    except Exception:
+        cache.delete(key)
+        raise
+
+
+def defer(task, *args):
+    """Queue the job /task/ with /args/ unless it is already queued.
+
+    Inside an atomic() block the job is queued once the block commits.
+    Return whether the job was queued.
+    """
+    key = get_job_key(task, args)
+    if not cache.add(key, True, JOB_KEY_TIMEOUT):
+        return False
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.append((key, task, args))
+    else:
+        queue_job(key, task, args)
+    return True
+
+
+@contextmanager
+def atomic(using=None):
+    """Run the block in transaction.atomic() and queue the jobs deferred
+    inside once the outermost block commits.
+
+    Use it instead of transaction.atomic() for the transactions saving
+    objects with deferred jobs, so that the jobs never load the objects
+    before they are committed.
+    """
+    if getattr(_local, 'pending', None) is not None:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    _local.pending = pending = []
+    try:
+        with transaction.atomic(using=using):
+            yield
+    except Exception:
+        for key, task, args in pending:
+            cache.delete(key)
+        raise
+    finally:
+        _local.pending = None
+    for key, task, args in pending:
+        queue_job(key, task, args)
+
+
+def job(func):
+    """Register /func/ as a task queued with defer().
+
+    The job can be queued again as soon as it starts, so that the
+    changes made while it runs are handled by the next one.
+    """
+    @wraps(func)
+    def run(*args):
+        cache.delete(get_job_key(task, args))
+        return func(*args)
+
+    task = app.task(run)
+    return task
@@ -3,6 +3,8 @@ from django.contrib import messages
 from django.core.urlresolvers import reverse
 from django.shortcuts import redirect
 
+from remo.base.utils import user_in_groups
+
 
 class RegisterMiddleware(object):
     """Middleware to enforce users to complete registration.
@@ -19,7 +21,7 @@ class RegisterMiddleware(object):
         if (request.user.is_authenticated() and not
             request.user.userprofile.registration_complete and not
             request.user.is_superuser and not
-                request.user.groups.filter(name='Mozillians').exists()):
+                user_in_groups(request.user, 'Mozillians')):
             allow_urls = [
                 reverse('oidc_authentication_init'),
                 reverse('oidc_authentication_callback'),
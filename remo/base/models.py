@@ -1,4 +1,9 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from remo.base.utils import clear_user_groups
 
 
 class GenericActiveManager(models.Manager):
@@ -8,3 +13,23 @@ class GenericActiveManager(models.Manager):
     """
     def get_queryset(self):
         return super(GenericActiveManager, self).get_queryset().filter(active=True)
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='base_user_groups_signal')
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the cached group names of users joining or leaving groups."""
+    if reverse:
+        if action == 'pre_clear':
+            # The members of the group are unknown after the clear.
+            clear_user_groups(instance.user_set.values_list('id', flat=True))
+        elif action in ['post_add', 'post_remove']:
+            clear_user_groups(pk_set)
+    elif action in ['post_add', 'post_remove', 'post_clear']:
+        instance._group_names = None
+        clear_user_groups([instance.pk])
+
+
+@receiver(post_delete, sender=User, dispatch_uid='base_user_groups_delete_signal')
+def user_deleted(sender, instance, **kwargs):
+    """Invalidate the cached group names of deleted users."""
+    clear_user_groups([instance.pk])
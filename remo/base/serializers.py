@@ -2,10 +2,7 @@ import codecs
 import csv
 import cStringIO
 
-from django.conf import settings
 from django.http import Http404
-from django.template.loader import get_template
-from django.utils import timezone
 from tastypie.serializers import Serializer
 
 
@@ -84,16 +81,33 @@ class CSVUnicodeWriter(object):
         data = data.decode('utf-8')
         # ... and reencode it into the target encoding
         data = self.encoder.encode(data)
-        # write to the target stream
-        self.stream.write(data)
         # empty queue
         self.queue.truncate(0)
+        # write to the target stream
+        return self.stream.write(data)
 
     def writerows(self, rows):
         for row in rows:
             self.writerow(row)
 
 
+class EchoBuffer(object):
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, **kwargs):
+    """Yield the CSV lines of /rows/ one at a time.
+
+    Keyword arguments are passed to the CSV writer.
+    """
+    writer = CSVUnicodeWriter(EchoBuffer(), **kwargs)
+    for row in rows:
+        yield writer.writerow(row)
+
+
 class CSVSerializer(Serializer):
     """Extend tastypie's serializer to export to CSV format."""
     formats = ['json', 'jsonp', 'xml', 'yaml', 'html', 'csv']
@@ -104,36 +118,48 @@ class CSVSerializer(Serializer):
                      'html': 'text/html',
                      'csv': 'text/csv'}
 
+    writer_options = {'delimiter': ';', 'quotechar': '"', 'quoting': csv.QUOTE_MINIMAL}
+
     def to_csv(self, data, options=None):
         """Convert data to CSV."""
         options = options or {}
         data = self.to_simple(data, options)
         raw_data = cStringIO.StringIO()
 
-        writer = CSVUnicodeWriter(raw_data, delimiter=';', quotechar='"',
-                                  quoting=csv.QUOTE_MINIMAL)
+        writer = CSVUnicodeWriter(raw_data, **self.writer_options)
 
         for category in data:
             if category == 'objects' and len(data[category]) > 0:
-                items = []
-                available_keys = []
-                for item in data[category]:
-                    flatitem = flatten_dict(item)
-                    items.append(flatitem)
-                    available_keys += [key for key in flatitem.keys()
-                                       if key not in available_keys]
+                items = [flatten_dict(item) for item in data[category]]
+                available_keys = set()
+                for item in items:
+                    available_keys.update(item)
 
                 available_keys = sorted(available_keys)
                 writer.writerow(available_keys)
 
-                for item in data[category]:
-                    flatitem = flatten_dict(item)
-                    writer.writerow(map(lambda x: flatitem.get(x),
-                                        available_keys))
+                for item in items:
+                    writer.writerow([item.get(key) for key in available_keys])
 
         raw_data.seek(0)
         return raw_data
 
+    def stream_csv(self, bundles, options=None):
+        """Convert dehydrated /bundles/ to CSV lines one at a time.
+
+        The columns are the keys of the first bundle, since they have to
+        be written before the rest of the bundles are dehydrated.
+        """
+        options = options or {}
+        writer = CSVUnicodeWriter(EchoBuffer(), **self.writer_options)
+        available_keys = None
+        for bundle in bundles:
+            item = flatten_dict(self.to_simple(bundle, options))
+            if available_keys is None:
+                available_keys = sorted(item)
+                yield writer.writerow(available_keys)
+            yield writer.writerow([item.get(key) for key in available_keys])
+
 
 class iCalSerializer(Serializer):
     """Extend tastypie's serializer to export to iCal format."""
@@ -157,7 +183,7 @@ class iCalSerializer(Serializer):
         else:
             events = [data.obj]
 
-        date_now = timezone.now()
-        ical = get_template('multi_event_ical_template.jinja')
+        # Avoid circular dependency
+        from remo.events.ical import render_ical
 
-        return ical.render({'events': events, 'date_now': date_now, 'host': settings.SITE_URL})
+        return render_ical(events)
@@ -1,22 +1,62 @@
+import numbers
+
 from django import forms
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import EmailMessage
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
 from django.core.validators import validate_email
-from django.template.loader import render_to_string
+from django.template.loader import get_template
 
+from celery import group
+from django_statsd.clients import statsd
+import feedparser
 import requests
 
 from remo.celery import app
 
 
+MAIL_CHUNK_SIZE = 100
+PLANET_CACHE_KEY = 'planet:entries'
+PLANET_FETCH_KEY = 'planet:fetching'
+PLANET_CACHE_TIMEOUT = 60 * 60 * 24
+PLANET_ENTRIES = 3
+
+
+def build_remo_message(subject, to, body, sender=None, headers=None):
+    """Return the EmailMessage of /body/ sent to the address /to/.
+
+    The message is sent from FROM_EMAIL. When there is a /sender/, the
+    replies go to the sender, who gets a copy.
+    """
+    headers = dict(headers or {})
+    email_data = {'subject': subject,
+                  'body': body,
+                  'from_email': settings.FROM_EMAIL,
+                  'to': [to]}
+    if sender:
+        headers['Reply-To'] = sender
+        email_data['cc'] = [sender]
+    email_data['headers'] = headers
+    return EmailMessage(**email_data)
+
+
 @app.task
 def send_remo_mail(subject, recipients_list, sender=None,
                    message=None, email_template=None, data=None,
-                   headers=None):
+                   headers=None, stat_name='base.send_remo_mail', greeting=None):
     """Send email from /sender/ to /recipients_list/ with /subject/ and
     /message/ as body.
 
+    A /greeting/ is formatted with the first_name of each user recipient
+    and put before the body, so a body that is the same for everyone is
+    rendered only once.
+
+    Recipients are user ids or email addresses. All the messages are
+    sent over a single connection. Lists longer than MAIL_CHUNK_SIZE are
+    split in chunks, each sent by a separate task. The time spent on
+    each chunk is reported to statsd as /stat_name/.
+
     """
     # Make sure that there is either a message or a template
     if not data:
@@ -35,47 +75,58 @@ def send_remo_mail(subject, recipients_list, sender=None,
         return
     if not headers:
         headers = {}
+
+    recipients_list = list(recipients_list)
+    if len(recipients_list) > MAIL_CHUNK_SIZE:
+        group(send_remo_mail.si(subject, recipients_list[i:i + MAIL_CHUNK_SIZE],
+                                sender=sender, message=message,
+                                email_template=email_template, data=data,
+                                headers=headers, stat_name=stat_name,
+                                greeting=greeting)
+              for i in range(0, len(recipients_list), MAIL_CHUNK_SIZE)).delay()
+        return
+
     data.update({'SITE_URL': settings.SITE_URL,
                  'FROM_EMAIL': settings.FROM_EMAIL})
 
     # Make sure subject is one line.
     subject = subject.replace('\n', ' ')
 
-    for recipient in recipients_list:
-        to = ''
-        if (isinstance(recipient, long)
-                and User.objects.filter(pk=recipient).exists()):
-            user = User.objects.get(pk=recipient)
-            to = '%s <%s>' % (user.get_full_name(), user.email)
-            ctx_data = {'user': user,
-                        'userprofile': user.userprofile}
-            data.update(ctx_data)
-        else:
-            try:
-                validate_email(recipient)
-                to = recipient
-            except forms.ValidationError:
-                return
-
-        if email_template:
-            message = render_to_string(email_template, data)
-
-        email_data = {
-            'subject': subject,
-            'body': message,
-            'from_email': settings.FROM_EMAIL,
-            'to': [to],
-        }
-
-        if sender:
-            # If there is a sender, add a Reply-To header and send a copy to the sender
-            headers.update({'Reply-To': sender})
-            email_data.update({'cc': [sender]})
-
-        # Add the headers to the mail data
-        email_data.update({'headers': headers})
-        # Send the email
-        EmailMessage(**email_data).send()
+    with statsd.timer(stat_name):
+        user_ids = [recipient for recipient in recipients_list
+                    if isinstance(recipient, numbers.Integral)]
+        users = User.objects.select_related('userprofile').in_bulk(user_ids)
+        template = get_template(email_template) if email_template else None
+
+        messages = []
+        for recipient in recipients_list:
+            ctx_data = dict(data)
+            user = None
+            if isinstance(recipient, numbers.Integral):
+                user = users.get(recipient)
+                if not user:
+                    continue
+                to = '%s <%s>' % (user.get_full_name(), user.email)
+                ctx_data.update({'user': user,
+                                 'userprofile': user.userprofile})
+            else:
+                try:
+                    validate_email(recipient)
+                    to = recipient
+                except forms.ValidationError:
+                    continue
+
+            if template:
+                message = template.render(ctx_data)
+            body = message
+            if greeting and user:
+                salutation = greeting.format(first_name=user.first_name)
+                body = u'{0}\n\n{1}'.format(salutation, message)
+
+            messages.append(build_remo_message(subject, to, body, sender, headers))
+
+        if messages:
+            get_connection().send_messages(messages)
 
 
 @app.task
@@ -84,3 +135,46 @@ def celery_healthcheck():
 
     response = requests.get(settings.HEALTHCHECKS_IO_URL)
     return response.status_code == requests.codes.ok
+
+
+@app.task
+def fetch_planet_feed():
+    """Fetch the planet feed and cache its latest entries.
+
+    The feed is requested with the ETag and Last-Modified of the last
+    response, so an unchanged feed is neither downloaded nor parsed
+    again. Only the title, link and description of the latest entries
+    are cached.
+    """
+    cached = cache.get(PLANET_CACHE_KEY)
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        response = requests.get(settings.PLANET_URL, headers=headers,
+                                timeout=settings.PLANET_MAX_TIMEOUT)
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+        statsd.incr('base.fetch_planet_feed_error')
+        return
+    finally:
+        cache.delete(PLANET_FETCH_KEY)
+
+    if cached and response.status_code == requests.codes.not_modified:
+        cache.set(PLANET_CACHE_KEY, cached, PLANET_CACHE_TIMEOUT)
+        return
+    if response.status_code != requests.codes.ok:
+        statsd.incr('base.fetch_planet_feed_error')
+        return
+
+    entries = [{'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'description': entry.get('description', '')}
+               for entry in feedparser.parse(response.content).entries[:PLANET_ENTRIES]]
+    cache.set(PLANET_CACHE_KEY, {'entries': entries,
+                                 'etag': response.headers.get('ETag'),
+                                 'last_modified': response.headers.get('Last-Modified')},
+              PLANET_CACHE_TIMEOUT)
@@ -204,38 +204,38 @@ def get_full_name(user):
 @library.global_function
 def user_is_mozillian(user):
     """Check if a user belongs to Mozillians group."""
-    return user.groups.filter(name='Mozillians').exists()
+    return utils.user_in_groups(user, 'Mozillians')
 
 
 @library.global_function
 def user_is_rep(user):
     """Check if a user belongs to Rep group."""
-    return (user.groups.filter(name='Rep').exists()
+    return (utils.user_in_groups(user, 'Rep')
             and user.userprofile.registration_complete)
 
 
 @library.global_function
 def user_is_mentor(user):
     """Check if a user belongs to Mentor group."""
-    return user.groups.filter(name='Mentor').exists()
+    return utils.user_in_groups(user, 'Mentor')
 
 
 @library.global_function
 def user_is_admin(user):
     """Check if a user belongs to Admin group."""
-    return user.groups.filter(name='Admin').exists()
+    return utils.user_in_groups(user, 'Admin')
 
 
 @library.global_function
 def user_is_council(user):
     """Check if a user belongs to Council group."""
-    return user.groups.filter(name='Council').exists()
+    return utils.user_in_groups(user, 'Council')
 
 
 @library.global_function
 def user_is_alumni(user):
     """Check if a user belongs to Alumni group."""
-    return user.groups.filter(name='Alumni').exists()
+    return utils.user_in_groups(user, 'Alumni')
 
 
 @library.filter
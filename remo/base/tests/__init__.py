@@ -1,5 +1,6 @@
 from contextlib import contextmanager, nested
 
+from django.core.cache import cache
 from django.http import HttpResponseRedirect
 from django.shortcuts import redirect
 from django.test import TestCase as BaseTestCase
@@ -26,6 +27,11 @@ PASSWORD_HASHERS = (
 @modify_settings(MIDDLEWARE_CLASSES={'remove': 'mozilla_django_oidc.middleware.RefreshIDToken'})
 class RemoTestCase(BaseTestCase):
 
+    def _pre_setup(self):
+        super(RemoTestCase, self)._pre_setup()
+        # Do not leak cached data between tests.
+        cache.clear()
+
     @contextmanager
     def login(self, user):
         client = Client()
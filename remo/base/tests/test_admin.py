@@ -0,0 +1,23 @@
+from django.core.urlresolvers import reverse
+
+from nose.tools import eq_, ok_
+
+from remo.base.tests import RemoTestCase
+from remo.profiles.models import FunctionalArea
+from remo.profiles.tests import FunctionalAreaFactory, UserFactory
+
+
+class StreamingExportMixinTest(RemoTestCase):
+
+    def test_csv(self):
+        admin = UserFactory.create(is_staff=True, is_superuser=True)
+        FunctionalAreaFactory.create_batch(3)
+        url = reverse('admin:profiles_functionalarea_export')
+        with self.login(admin) as client:
+            # CSV is the first format.
+            response = client.post(url, {'file_format': 0})
+        ok_(response.streaming)
+        ok_('attachment; filename=FunctionalArea-' in response['Content-Disposition'])
+        lines = ''.join(response.streaming_content).splitlines()
+        eq_(lines[0], 'id,name,slug,active')
+        eq_(len(lines), FunctionalArea.objects.count() + 1)
@@ -1,10 +1,12 @@
 from datetime import datetime
 from mock import patch
 
-from nose.tools import eq_
+from django.contrib.auth.models import AnonymousUser, Group, User
+from nose.tools import eq_, ok_
 
 from remo.base.tests import RemoTestCase
-from remo.base.utils import get_quarter
+from remo.base.utils import get_quarter, get_user_groups, iterate_in_chunks, user_in_groups
+from remo.profiles.tests import UserFactory
 
 
 class GetQuarterTest(RemoTestCase):
@@ -20,3 +22,66 @@ class GetQuarterTest(RemoTestCase):
         result = get_quarter()
         eq_(result[0], 2)
         eq_(result[1], datetime(2015, 6, 1))
+
+
+class UserGroupsTest(RemoTestCase):
+
+    def test_loaded_once(self):
+        user = UserFactory.create(groups=['Rep', 'Mentor'])
+        user = User.objects.get(pk=user.pk)
+
+        with self.assertNumQueries(1):
+            eq_(get_user_groups(user), set(['Rep', 'Mentor']))
+            ok_(user_in_groups(user, 'Admin', 'Mentor'))
+            ok_(not user_in_groups(user, 'Admin'))
+
+        # Other objects of the user share the cache.
+        other_user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(0):
+            eq_(get_user_groups(other_user), set(['Rep', 'Mentor']))
+
+    def test_prefetched(self):
+        UserFactory.create(groups=['Rep', 'Mentor'])
+        user = User.objects.prefetch_related('groups').latest('pk')
+        with self.assertNumQueries(0):
+            eq_(get_user_groups(user), set(['Rep', 'Mentor']))
+
+    def test_invalidated_on_change(self):
+        user = UserFactory.create(groups=['Rep'])
+        eq_(get_user_groups(user), set(['Rep']))
+
+        user.groups.add(Group.objects.get(name='Mentor'))
+        eq_(get_user_groups(user), set(['Rep', 'Mentor']))
+
+        Group.objects.get(name='Rep').user_set.remove(user)
+        eq_(get_user_groups(User.objects.get(pk=user.pk)), set(['Mentor']))
+
+        Group.objects.get(name='Mentor').user_set.clear()
+        eq_(get_user_groups(User.objects.get(pk=user.pk)), set())
+
+    def test_anonymous_user(self):
+        with self.assertNumQueries(0):
+            ok_(not user_in_groups(AnonymousUser(), 'Rep'))
+
+
+class IterateInChunksTest(RemoTestCase):
+
+    def test_chunks(self):
+        users = UserFactory.create_batch(5)
+        queryset = User.objects.filter(id__in=[user.id for user in users])
+        # Three chunks of two users, the last one is not full.
+        with self.assertNumQueries(3):
+            eq_(list(iterate_in_chunks(queryset, chunk_size=2)), users)
+
+    def test_slice(self):
+        users = UserFactory.create_batch(5)
+        queryset = User.objects.filter(id__in=[user.id for user in users])
+        eq_(list(iterate_in_chunks(queryset, chunk_size=2, start=1, stop=4)), users[1:4])
+
+    def test_ordering(self):
+        users = UserFactory.create_batch(3)
+        for user in users:
+            user.first_name = 'Name'
+            user.save()
+        queryset = User.objects.filter(id__in=[user.id for user in users])
+        eq_(list(iterate_in_chunks(queryset.order_by('-first_name'), chunk_size=1)), users)
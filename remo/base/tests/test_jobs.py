@@ -0,0 +1,50 @@
+from mock import patch
+from nose.tools import eq_, ok_
+
+from remo.base.jobs import JOB_COUNTDOWN, atomic, defer
+from remo.base.tests import RemoTestCase
+from remo.events.tasks import subscribe_event_owner
+from remo.events.tests import EventFactory
+
+
+class DeferTests(RemoTestCase):
+
+    def test_coalesced(self):
+        with patch.object(subscribe_event_owner, 'apply_async') as mocked_apply:
+            ok_(defer(subscribe_event_owner, 1))
+            ok_(not defer(subscribe_event_owner, 1))
+            ok_(defer(subscribe_event_owner, 2))
+        eq_(mocked_apply.call_count, 2)
+        mocked_apply.assert_any_call(args=(1,), countdown=JOB_COUNTDOWN)
+
+    def test_queued_again_once_started(self):
+        event = EventFactory.create()
+        ok_(defer(subscribe_event_owner, event.id))
+        ok_(defer(subscribe_event_owner, event.id))
+
+    def test_released_on_error(self):
+        with patch.object(subscribe_event_owner, 'apply_async', side_effect=IOError):
+            with self.assertRaises(IOError):
+                defer(subscribe_event_owner, 1)
+        with patch.object(subscribe_event_owner, 'apply_async') as mocked_apply:
+            ok_(defer(subscribe_event_owner, 1))
+        ok_(mocked_apply.called)
+
+    def test_queued_on_commit(self):
+        with patch.object(subscribe_event_owner, 'apply_async') as mocked_apply:
+            with atomic():
+                with atomic():
+                    ok_(defer(subscribe_event_owner, 1))
+                ok_(not mocked_apply.called)
+                ok_(not defer(subscribe_event_owner, 1))
+            mocked_apply.assert_called_once_with(args=(1,), countdown=JOB_COUNTDOWN)
+
+    def test_dropped_on_rollback(self):
+        with patch.object(subscribe_event_owner, 'apply_async') as mocked_apply:
+            with self.assertRaises(ValueError):
+                with atomic():
+                    defer(subscribe_event_owner, 1)
+                    raise ValueError
+            ok_(not mocked_apply.called)
+            ok_(defer(subscribe_event_owner, 1))
+        eq_(mocked_apply.call_count, 1)
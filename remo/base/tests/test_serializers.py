@@ -1,6 +1,6 @@
 from nose.tools import eq_
 
-from remo.base.serializers import flatten_dict
+from remo.base.serializers import CSVSerializer, flatten_dict, stream_csv
 from remo.base.tests import RemoTestCase
 
 
@@ -19,3 +19,15 @@ class TestSerializers(RemoTestCase):
                            'key3.1': 'svalue3'}
 
         eq_(flatten_dict(foobar), expected_result)
+
+    def test_to_csv(self):
+        """Test the columns of CSV exports."""
+        data = {'objects': [{'key1': 'value1'}, {'key2': {'skey1': 'svalue1'}}]}
+        eq_(CSVSerializer().to_csv(data).read(),
+            'key1;key2.skey1\r\nvalue1;None\r\nNone;svalue1\r\n')
+
+    def test_stream_csv(self):
+        """Test stream_csv()."""
+        lines = stream_csv([['name', 'city'], [u'J\xfcrgen', 'Athens, GR']])
+        eq_(next(lines), 'name,city\r\n')
+        eq_(next(lines), 'J\xc3\xbcrgen,"Athens, GR"\r\n')
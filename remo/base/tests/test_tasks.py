@@ -1,10 +1,13 @@
 from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
 
 from mock import patch
-from nose.tools import ok_
+from nose.tools import eq_, ok_
+import requests
 
 from remo.base.tests import RemoTestCase
-from remo.base.tasks import send_remo_mail
+from remo.base.tasks import PLANET_CACHE_KEY, fetch_planet_feed, send_remo_mail
 from remo.profiles.tests import UserFactory
 
 
@@ -103,4 +106,87 @@ class SendRemoMailTests(RemoTestCase):
                                                      cc=[from_email],
                                                      subject=subject,
                                                      from_email=settings.FROM_EMAIL,
-                                                     headers=headers)
+                                                     headers={'Reply-To': from_email})
+
+    def test_single_connection(self):
+        recipients = UserFactory.create_batch(3)
+        recipients_list = [user.id for user in recipients] + ['mail@example.com']
+
+        with patch('remo.base.tasks.get_connection') as mocked_get_connection:
+            with self.assertNumQueries(1):
+                send_remo_mail('Subject', recipients_list=recipients_list,
+                               message='This is the message')
+
+        mocked_get_connection.assert_called_once_with()
+        messages = mocked_get_connection().send_messages.call_args[0][0]
+        eq_([message.to for message in messages],
+            [[u'%s <%s>' % (user.get_full_name(), user.email)] for user in recipients]
+            + [['mail@example.com']])
+
+    def test_template_per_recipient(self):
+        recipients = UserFactory.create_batch(2)
+
+        send_remo_mail('Subject', recipients_list=[user.id for user in recipients],
+                       email_template='emails/reps_ng_report_notification.jinja',
+                       data={'weeks': 4})
+
+        eq_(len(mail.outbox), 2)
+        for message, user in zip(mail.outbox, recipients):
+            ok_(user.first_name in message.body)
+
+    @patch('remo.base.tasks.MAIL_CHUNK_SIZE', 2)
+    def test_chunks(self):
+        recipients = ['mail{0}@example.com'.format(i) for i in range(5)]
+
+        with patch('remo.base.tasks.get_connection') as mocked_get_connection:
+            send_remo_mail('Subject', recipients_list=recipients, message='Message')
+
+        eq_(mocked_get_connection.call_count, 3)
+        sent = [message.to[0]
+                for args in mocked_get_connection().send_messages.call_args_list
+                for message in args[0][0]]
+        eq_(sorted(sent), recipients)
+
+
+PLANET_FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Planet</title>
+<item><title>First</title><link>https://example.com/1</link><description>One</description></item>
+<item><title>Second</title><link>https://example.com/2</link><description>Two</description></item>
+<item><title>Third</title><link>https://example.com/3</link><description>Three</description></item>
+<item><title>Fourth</title><link>https://example.com/4</link><description>Four</description></item>
+</channel></rss>"""
+
+
+class FetchPlanetFeedTests(RemoTestCase):
+
+    @patch('remo.base.tasks.requests.get')
+    def test_fetch(self, mocked_get):
+        mocked_get.return_value.status_code = 200
+        mocked_get.return_value.content = PLANET_FEED
+        mocked_get.return_value.headers = {'ETag': '"abc"'}
+        fetch_planet_feed()
+
+        planet = cache.get(PLANET_CACHE_KEY)
+        eq_([entry['title'] for entry in planet['entries']], ['First', 'Second', 'Third'])
+        eq_(planet['entries'][0]['link'], 'https://example.com/1')
+        eq_(planet['etag'], '"abc"')
+
+    @patch('remo.base.tasks.feedparser.parse')
+    @patch('remo.base.tasks.requests.get')
+    def test_not_modified(self, mocked_get, mocked_parse):
+        planet = {'entries': [{'title': 'First'}], 'etag': '"abc"',
+                  'last_modified': 'Mon, 01 Jan 2018 00:00:00 GMT'}
+        cache.set(PLANET_CACHE_KEY, planet)
+        mocked_get.return_value.status_code = 304
+        fetch_planet_feed()
+
+        eq_(mocked_get.call_args[1]['headers'],
+            {'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2018 00:00:00 GMT'})
+        ok_(not mocked_parse.called)
+        eq_(cache.get(PLANET_CACHE_KEY), planet)
+
+    @patch('remo.base.tasks.requests.get')
+    def test_connection_error(self, mocked_get):
+        mocked_get.side_effect = requests.exceptions.ConnectionError
+        fetch_planet_feed()
+        eq_(cache.get(PLANET_CACHE_KEY), None)
@@ -5,17 +5,22 @@
 import json
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.shortcuts import redirect
 from django.test import RequestFactory
 from django.test.client import Client
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 
 import mock
 from nose.tools import eq_, ok_
 
+from remo.base.tasks import PLANET_CACHE_KEY
 from remo.base.tests import RemoTestCase, requires_login, requires_permission
 from remo.base.views import robots_txt
+from remo.featuredrep.tests import FeaturedRepFactory
+from remo.profiles.avatars import prefetch_avatar_urls
 from remo.profiles.models import FunctionalArea
 from remo.profiles.tasks import check_mozillian_username
 from remo.profiles.tests import (FunctionalAreaFactory, UserFactory,
@@ -86,12 +91,39 @@ class ViewsTest(RemoTestCase):
         self.settings_data = {'receive_email_on_add_comment': True}
         self.user_edit_settings_url = reverse('edit_settings')
 
-    def test_view_main_page(self):
+    @mock.patch('remo.base.views.fetch_planet_feed.delay')
+    def test_view_main_page(self, mocked_delay):
         """Get main page."""
         c = Client()
         response = c.get(reverse('main'))
         eq_(response.status_code, 200)
         self.assertJinja2TemplateUsed(response, 'main.jinja')
+        eq_(response.context['planet_entries'], [])
+        mocked_delay.assert_called_once_with()
+
+    @mock.patch('remo.base.views.fetch_planet_feed.delay')
+    def test_view_main_page_planet_cached(self, mocked_delay):
+        entries = [{'title': 'Post', 'link': 'https://example.com', 'description': 'Text'}]
+        cache.set(PLANET_CACHE_KEY, {'entries': entries, 'etag': None, 'last_modified': None})
+        response = Client().get(reverse('main'))
+        eq_(response.context['planet_entries'], entries)
+        ok_(not mocked_delay.called)
+
+    @mock.patch('remo.base.views.fetch_planet_feed.delay')
+    def test_view_main_page_featured_avatars(self, mocked_delay):
+        """Test that the avatars of the featured reps are resolved together."""
+        users = UserFactory.create_batch(3)
+        FeaturedRepFactory.create(users=users)
+        # Warm up the caches.
+        Client().get(reverse('main'))
+        cache.clear()
+        with mock.patch('remo.base.views.prefetch_avatar_urls',
+                        wraps=prefetch_avatar_urls) as mocked_prefetch:
+            with CaptureQueriesContext(connection) as queries:
+                Client().get(reverse('main'))
+        eq_(mocked_prefetch.call_count, 1)
+        eq_(len([query for query in queries
+                 if 'profiles_useravatar' in query['sql']]), 1)
 
     @override_settings(ENGAGE_ROBOTS=True)
     def test_robots_allowed(self):
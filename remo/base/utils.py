@@ -6,10 +6,16 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.management import create_permissions
 from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db.models import Case, Value, When
 from django.utils import timezone
 
 
+USER_GROUPS_KEY = 'user:{0}:groups'
+USER_GROUPS_TIMEOUT = 3600
+
+
 def absolutify(url):
     """Takes a URL and prepends the SITE_URL"""
     site_url = getattr(settings, 'SITE_URL', False)
@@ -49,6 +55,93 @@ def get_or_create_instance(model_class, **kwargs):
         return model_class(**kwargs), True
 
 
+def bulk_update(objects, fields, batch_size=None):
+    """Save /fields/ of already stored model /objects/ with a single
+    UPDATE query, or one query per /batch_size/ objects.
+
+    Like QuerySet.update() no save() method or signal is called.
+
+    """
+    if not objects:
+        return 0
+    if batch_size and len(objects) > batch_size:
+        return sum(bulk_update(objects[i:i + batch_size], fields)
+                   for i in range(0, len(objects), batch_size))
+
+    model_class = type(objects[0])
+    values = {}
+    for field_name in fields:
+        field = model_class._meta.get_field(field_name)
+        whens = [When(pk=obj.pk, then=Value(getattr(obj, field.attname)))
+                 for obj in objects]
+        values[field.attname] = Case(*whens, output_field=field)
+
+    pks = [obj.pk for obj in objects]
+    return model_class.objects.filter(pk__in=pks).update(**values)
+
+
+def get_m2m_field_names(relation):
+    """Return the through model of the many to many /relation/ and the
+    names of its foreign keys to the source and the target models.
+
+    """
+    field = relation.field
+    return relation.through, field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def bulk_add_m2m(relation, pairs):
+    """Store the (object id, related id) /pairs/ of the many to many
+    /relation/, like NGReport.functional_areas, with a single INSERT.
+
+    The pairs must not be stored already. Like QuerySet.bulk_create()
+    no m2m_changed signal is sent. Return the number of stored pairs.
+
+    """
+    through, source, target = get_m2m_field_names(relation)
+    rows = [through(**{source + '_id': object_id, target + '_id': related_id})
+            for object_id, related_id in pairs]
+    if rows:
+        through.objects.bulk_create(rows)
+    return len(rows)
+
+
+def bulk_remove_m2m(relation, objects, related_ids=None):
+    """Remove /related_ids/, or all the related objects, from the many
+    to many /relation/ of /objects/ with one SELECT and one DELETE.
+
+    /objects/ are ids or a queryset. No m2m_changed signal is sent.
+
+    """
+    through, source, target = get_m2m_field_names(relation)
+    rows = through.objects.filter(**{source + '__in': objects})
+    if related_ids is not None:
+        rows = rows.filter(**{target + '__in': related_ids})
+    rows.delete()
+
+
+def iterate_in_chunks(queryset, chunk_size=500, start=0, stop=None):
+    """Iterate over /queryset/ fetching /chunk_size/ objects per query.
+
+    Unlike QuerySet.iterator() the prefetch_related() lookups are
+    applied, to each chunk. The primary key is added to the ordering so
+    that the chunks do not overlap. Only the objects from index /start/
+    up to /stop/ are returned, like in queryset[start:stop].
+
+    """
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    queryset = queryset.order_by(*(ordering + ['pk']))
+    while stop is None or start < stop:
+        end = start + chunk_size
+        if stop is not None:
+            end = min(end, stop)
+        chunk = list(queryset[start:end])
+        for obj in chunk:
+            yield obj
+        if len(chunk) < end - start:
+            return
+        start = end
+
+
 def go_back_n_months(date, n=1, first_day=False):
     """Return date minus n months."""
     if first_day:
@@ -157,3 +250,36 @@ def get_quarter(date=None):
     quarter_start = datetime.datetime(date.year, first_month_of_quarter, 1)
 
     return (quarter, quarter_start)
+
+
+def get_user_groups(user):
+    """Return the set of group names of /user/.
+
+    The names are loaded once per User object and shared through the
+    cache, which is invalidated when the groups of the user change.
+    The groups loaded by prefetch_related('groups') are used first.
+    """
+    if not user.pk:
+        return frozenset()
+    groups = getattr(user, '_group_names', None)
+    if groups is None and 'groups' in getattr(user, '_prefetched_objects_cache', {}):
+        groups = frozenset(group.name for group in user.groups.all())
+        user._group_names = groups
+    if groups is None:
+        key = USER_GROUPS_KEY.format(user.pk)
+        groups = cache.get(key)
+        if groups is None:
+            groups = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, groups, USER_GROUPS_TIMEOUT)
+        user._group_names = groups
+    return groups
+
+
+def user_in_groups(user, *names):
+    """Return True if /user/ belongs to any of the groups /names/."""
+    return not get_user_groups(user).isdisjoint(names)
+
+
+def clear_user_groups(user_ids):
+    """Invalidate the cached group names of /user_ids/."""
+    cache.delete_many([USER_GROUPS_KEY.format(user_id) for user_id in user_ids])
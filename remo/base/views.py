@@ -1,10 +1,7 @@
-import feedparser
 import json
 import logging
-import requests
 
 from django import http
-from django.db.models import Q
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import User
@@ -24,7 +21,10 @@ import forms
 import utils
 from remo.base.decorators import PermissionMixin, permission_check
 from remo.base.forms import EmailMentorForm
+from remo.base.tasks import PLANET_CACHE_KEY, PLANET_FETCH_KEY, fetch_planet_feed
+from remo.base.utils import user_in_groups
 from remo.featuredrep.models import FeaturedRep
+from remo.profiles.avatars import prefetch_avatar_urls
 from remo.profiles.forms import UserStatusForm
 from remo.profiles.models import UserProfile, UserStatus
 
@@ -45,21 +45,19 @@ class OIDCCallbackView(OIDCAuthenticationCallbackView):
 def main(request):
     """Main page of the website."""
     featured_rep = utils.latest_object_or_none(FeaturedRep)
+    featured_users = []
+    if featured_rep:
+        featured_users = list(featured_rep.users.all())
+        prefetch_avatar_urls(featured_users)
 
-    planet_feed = cache.get('planet')
-    if not planet_feed:
-        try:
-            planet_feed = requests.get(settings.PLANET_URL,
-                                       timeout=settings.PLANET_MAX_TIMEOUT).text
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
-            planet_feed = ''
-        else:
-            cache.set('planet', planet_feed, 60 * 60 * 8)
-
-    results = feedparser.parse(planet_feed).entries[:3]
+    # The planet entries are fetched in the background.
+    planet = cache.get(PLANET_CACHE_KEY)
+    if planet is None and cache.add(PLANET_FETCH_KEY, True, 60):
+        fetch_planet_feed.delay()
 
     return render(request, 'main.jinja', {'featuredrep': featured_rep,
-                                          'planet_entries': results})
+                                          'featured_users': featured_users,
+                                          'planet_entries': planet['entries'] if planet else []})
 
 
 def custom_404(request):
@@ -99,7 +97,7 @@ def robots_txt(request):
 def edit_settings(request):
     """Edit user settings."""
     user = request.user
-    if user.groups.filter(name='Mozillians').exists():
+    if user_in_groups(user, 'Mozillians'):
         raise Http404
 
     form = forms.EditSettingsForm(request.POST or None,
@@ -126,7 +124,7 @@ def edit_availability(request, display_name):
     args = {}
     created = False
 
-    if user.groups.filter(Q(name='Mozillians') | Q(name='Alumni')).exists():
+    if user_in_groups(user, 'Mozillians', 'Alumni'):
         raise Http404()
 
     try:
@@ -33,19 +33,28 @@ app.autodiscover_tasks()
 
 @app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
-    from remo.base.tasks import celery_healthcheck
-    from remo.events.tasks import notify_event_owners_to_input_metrics
-    from remo.profiles.tasks import (check_mozillian_username, reset_rotm_nominees,
-                                     send_rotm_nomination_reminder, set_unavailability_flag,
-                                     resolve_nomination_action_items)
+    from remo.api.tasks import reconcile_kpi_rollups
+    from remo.base.tasks import celery_healthcheck, fetch_planet_feed
+    from remo.dashboard.tasks import resolve_action_items
+    from remo.events.tasks import (expire_started_similar_events,
+                                   notify_event_owners_to_input_metrics)
+    from remo.profiles.tasks import (check_mozillian_username, refresh_avatars,
+                                     reset_rotm_nominees, send_rotm_nomination_reminder,
+                                     set_unavailability_flag)
     from remo.remozilla.tasks import fetch_bugs
     from remo.reports.tasks import (send_first_report_notification, calculate_longest_streaks,
-                                    send_second_report_notification, resolve_report_action_items)
-    from remo.voting.tasks import extend_voting_period, resolve_action_items, create_rotm_poll
+                                    send_second_report_notification)
+    from remo.voting.tasks import extend_voting_period, create_rotm_poll
+
+    sender.add_periodic_task(RUN_DAILY, reconcile_kpi_rollups.s(),
+                             name='reconcile-kpi-rollups')
 
     sender.add_periodic_task(RUN_DAILY, notify_event_owners_to_input_metrics.s(),
                              name='notify-event-owners-to-input-metrics')
 
+    sender.add_periodic_task(RUN_DAILY, expire_started_similar_events.s(),
+                             name='expire-similar-events')
+
     sender.add_periodic_task(RUN_DAILY, check_mozillian_username.s(),
                              name='check-mozillian-username')
 
@@ -58,8 +67,8 @@ def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(RUN_DAILY / 2, set_unavailability_flag.s(),
                              name='set-unavailability-flag')
 
-    sender.add_periodic_task(RUN_DAILY, resolve_nomination_action_items.s(),
-                             name='resolve-nomination-action-items')
+    sender.add_periodic_task(RUN_DAILY, refresh_avatars.s(),
+                             name='refresh-avatars')
 
     sender.add_periodic_task(RUN_HOURLY / 4, fetch_bugs.s(),
                              name='fetch-bugs')
@@ -73,9 +82,6 @@ def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(RUN_DAILY, calculate_longest_streaks.s(),
                              name='calculate-longest-streaks')
 
-    sender.add_periodic_task(RUN_DAILY, resolve_report_action_items.s(),
-                             name='resolve-report-action-items')
-
     sender.add_periodic_task(RUN_DAILY / 3, extend_voting_period.s(),
                              name='extend-voting-period')
 
@@ -87,3 +93,6 @@ def setup_periodic_tasks(sender, **kwargs):
 
     sender.add_periodic_task(RUN_HOURLY, celery_healthcheck.s(),
                              name='celery-healthcheck')
+
+    sender.add_periodic_task(RUN_HOURLY, fetch_planet_feed.s(),
+                             name='fetch-planet-feed')
@@ -1,8 +1,7 @@
 from django.contrib import admin
 from django.utils.encoding import smart_text
 
-from import_export.admin import ExportMixin
-
+from remo.base.admin import StreamingExportMixin
 from remo.dashboard.models import ActionItem
 
 
@@ -14,7 +13,7 @@ def encode_action_item_names(modeladmin, request, queryset):
 encode_action_item_names.short_description = 'Encode action item names'
 
 
-class ActionItemAdmin(ExportMixin, admin.ModelAdmin):
+class ActionItemAdmin(StreamingExportMixin, admin.ModelAdmin):
     model = ActionItem
 
     list_display = ('__unicode__', 'user', 'due_date', 'created_on',
@@ -5,3 +5,7 @@ class DashboardConfig(AppConfig):
     name = 'remo.dashboard'
     label = 'dashboard'
     verbose_name = 'ReMo Dashboard'
+
+    def ready(self):
+        # Connect the signals invalidating the cached dashboard sections.
+        import remo.dashboard.sections  # noqa
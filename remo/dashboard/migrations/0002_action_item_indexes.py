@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='actionitem',
+            index_together=set([('user', 'resolved', 'due_date'), ('content_type', 'object_id', 'user', 'resolved')]),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 
 from django.contrib.auth.models import User
 from django.contrib.contenttypes import generic
@@ -54,43 +54,87 @@ class ActionItem(models.Model):
 
     class Meta:
         ordering = ['-due_date', '-updated_on', '-created_on']
+        index_together = [['content_type', 'object_id', 'user', 'resolved'],
+                          ['user', 'resolved', 'due_date']]
 
     def __str__(self):
         return self.name
 
     @staticmethod
     def create(instance, **kwargs):
-        for item in instance.get_action_items():
-            action_model = ContentType.objects.get_for_model(instance)
-            action_items = ActionItem.objects.filter(content_type=action_model,
-                                                     object_id=instance.id,
-                                                     name=item.name,
-                                                     user=item.user)
-
-            if isinstance(instance, Bug):
-                action_items = action_items.filter(resolved=False)
-
-            if not action_items.exists():
-                data = {
-                    'content_object': instance,
-                    'name': item.name,
-                    'user': item.user,
-                    'priority': item.priority,
-                    'due_date': item.due_date
-                }
-                ActionItem.objects.create(**data)
+        """Create the missing action items of /instance/."""
+        ActionItem.sync_items([instance], resolve_stale=isinstance(instance, Bug))
+
+    @staticmethod
+    def sync_items(instances, resolve_stale=False):
+        """Create the missing action items of /instances/ in bulk.
+
+        The action items returned by get_action_items() are compared to
+        the stored ones of all the /instances/ of a model with a single
+        query. Items of bugs match only unresolved action items. When
+        /resolve_stale/ is True the unresolved action items which are no
+        longer returned are resolved. Return the number of created items.
+        """
+        # Avoid circular dependency
+        from remo.dashboard.sections import bump_section_version
+
+        by_model = defaultdict(list)
+        for instance in instances:
+            by_model[type(instance)].append(instance)
+
+        new_items = []
+        stale_ids = []
+        for model, objects in by_model.items():
+            content_type = ContentType.objects.get_for_model(model)
+            wanted = OrderedDict()
+            for instance in objects:
+                for item in instance.get_action_items():
+                    key = (instance.pk, item.name, item.user.pk)
+                    wanted.setdefault(key, item)
+
+            stored = ActionItem.objects.filter(content_type=content_type,
+                                               object_id__in=[obj.pk for obj in objects])
+            if model is Bug:
+                stored = stored.filter(resolved=False)
+            existing = set()
+            for item_id, object_id, name, user_id, resolved in stored.values_list(
+                    'id', 'object_id', 'name', 'user', 'resolved'):
+                key = (object_id, name, user_id)
+                existing.add(key)
+                if resolve_stale and not resolved and key not in wanted:
+                    stale_ids.append(item_id)
+
+            new_items += [ActionItem(content_type=content_type, object_id=object_id,
+                                     name=item.name, user=item.user, priority=item.priority,
+                                     due_date=item.due_date)
+                          for (object_id, name, user_id), item in wanted.items()
+                          if (object_id, name, user_id) not in existing]
+
+        if new_items:
+            ActionItem.objects.bulk_create(new_items)
+        if stale_ids:
+            ActionItem.objects.filter(pk__in=stale_ids).update(resolved=True)
+        if new_items or stale_ids:
+            # Bulk queries send no signal to invalidate the dashboard.
+            bump_section_version(ActionItem)
+        return len(new_items)
 
     @staticmethod
     def resolve(instance, user, name):
+        """Resolve the unresolved action items /name/ of /user/ for /instance/.
+
+        /user/ is a user or its id. Return the number of resolved items.
+        """
+        # Avoid circular dependency
+        from remo.dashboard.sections import bump_section_version
+
         action_model = ContentType.objects.get_for_model(instance)
-        # Force evaluation of the QuerySet
-        items = sorted(ActionItem.objects.filter(content_type=action_model,
-                                                 object_id=instance.id,
-                                                 user=user,
-                                                 resolved=False)
-                       .values_list('id', flat=True))
-        action_items = ActionItem.objects.filter(pk__in=items).filter(name__icontains=name)
-        action_items.update(completed=True, resolved=True)
+        count = (ActionItem.objects.filter(content_type=action_model, object_id=instance.pk,
+                                           user=user, resolved=False, name=name)
+                 .update(completed=True, resolved=True))
+        if count:
+            bump_section_version(ActionItem)
+        return count
 
 
 post_save.connect(ActionItem.create, sender=Bug, dispatch_uid='create_action_items_bugzilla_sig')
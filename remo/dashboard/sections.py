@@ -0,0 +1,196 @@
+"""Cached sections of the dashboard.
+
+Every section of the dashboard is cached on its own, per user when it
+depends on the viewer or shared by every user allowed to see it. The
+cache key of a section contains a version for each model the section
+is computed from. Saving or deleting an object of these models bumps
+the version, so the outdated entries are never read again and expire.
+"""
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from remo.base.utils import get_date
+from remo.dashboard.models import ActionItem
+from remo.events.models import Event
+from remo.profiles.models import UserProfile, UserStatus
+from remo.remozilla.models import Bug
+from remo.reports.models import NGReport
+
+
+DASHBOARD_CACHE_TIMEOUT = 3600
+SECTION_KEY = 'dashboard:section:{0}:{1}:{2}:{3}'
+VERSION_KEY = 'dashboard:version:{0}'
+SECTION_MODELS = [ActionItem, Bug, NGReport, UserProfile]
+# Functional areas also list events and unavailable reps, which are
+# not versioned, hence the short timeout.
+AREA_CACHE_TIMEOUT = 300
+AREA_KEY = 'dashboard:area:{0}:{1}:{2}'
+AREA_MODELS = [NGReport, UserProfile]
+AREA_REPORTS = 20
+AREA_PAST_EVENTS = 50
+
+_missing = object()
+
+
+def get_version_key(model):
+    return VERSION_KEY.format(model._meta.model_name)
+
+
+def bump_section_version(model):
+    """Invalidate the cached sections computed from /model/."""
+    key = get_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_versions(models):
+    """Return the combined cache version of /models/."""
+    version_keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(version_keys)
+    return '.'.join(str(versions.get(version_key, 0)) for version_key in version_keys)
+
+
+def get_section(name, models, compute, user=None):
+    """Return the cached value of section /name/ or compute it.
+
+    /compute/ is called without arguments when the section is not
+    cached or any of /models/ changed since. Querysets are evaluated
+    before they are cached. Sections of a /user/ are cached for this
+    user only.
+    """
+    # Sections may depend on the current date.
+    key = SECTION_KEY.format(name, user.pk if user else 'all', get_date(), get_versions(models))
+
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = compute()
+        if isinstance(value, QuerySet):
+            len(value)
+        cache.set(key, value, DASHBOARD_CACHE_TIMEOUT)
+    return value
+
+
+def load_functional_areas(area_ids):
+    """Load the dashboard data of the functional areas /area_ids/.
+
+    The reps, reports, events and unavailable reps of all the areas
+    are fetched with a fixed number of queries and split per area.
+    Return a dict mapping each area id to a dict with the 'reps', the
+    latest 'ng_reports', the 'past_events' and 'current_events' and
+    whether an unavailable rep exists ('unavailable_rep_exists').
+    """
+    current_time = now()
+    areas = dict((area_id, {'reps': [], 'ng_reports': [], 'past_events': [],
+                            'current_events': [], 'unavailable_rep_exists': False})
+                 for area_id in area_ids)
+    if not areas:
+        return areas
+
+    area_reps = defaultdict(set)
+    rep_rows = (UserProfile.functional_areas.through.objects
+                .filter(functionalarea__in=area_ids, userprofile__user__groups__name='Rep')
+                .values_list('functionalarea', 'userprofile__user'))
+    for area_id, user_id in rep_rows:
+        area_reps[area_id].add(user_id)
+    rep_ids = set().union(*area_reps.values())
+
+    reps = (User.objects.filter(id__in=rep_ids).select_related('userprofile', 'useravatar')
+            .order_by('id'))
+    unavailable_ids = set(UserStatus.objects.filter(user__in=rep_ids, is_unavailable=True)
+                          .values_list('user', flat=True))
+    for rep in reps:
+        rep._is_unavailable = rep.id in unavailable_ids
+        for area_id, user_ids in area_reps.items():
+            if rep.id in user_ids:
+                areas[area_id]['reps'].append(rep)
+    for area_id, user_ids in area_reps.items():
+        areas[area_id]['unavailable_rep_exists'] = bool(user_ids & unavailable_ids)
+
+    area_report_ids = defaultdict(list)
+    report_rows = (NGReport.functional_areas.through.objects
+                   .filter(functionalarea__in=area_ids, ngreport__user__in=rep_ids,
+                           ngreport__report_date__lte=current_time.date())
+                   .order_by('-ngreport__report_date', 'ngreport')
+                   .values_list('functionalarea', 'ngreport', 'ngreport__user'))
+    for area_id, report_id, user_id in report_rows:
+        report_ids = area_report_ids[area_id]
+        if len(report_ids) < AREA_REPORTS and user_id in area_reps[area_id]:
+            report_ids.append(report_id)
+    report_ids = set().union(*area_report_ids.values())
+    reports = (NGReport.objects
+               .select_related('user__userprofile', 'activity', 'campaign', 'event')
+               .in_bulk(report_ids))
+    for report in reports.values():
+        report.user._is_unavailable = report.user_id in unavailable_ids
+
+    area_event_ids = defaultdict(lambda: {'past_events': [], 'current_events': []})
+    event_rows = (Event.categories.through.objects.filter(functionalarea__in=area_ids)
+                  .order_by('event__start', 'event')
+                  .values_list('functionalarea', 'event', 'event__start'))
+    for area_id, event_id, start in event_rows:
+        event_ids = area_event_ids[area_id]
+        if start >= current_time:
+            event_ids['current_events'].append(event_id)
+        elif len(event_ids['past_events']) < AREA_PAST_EVENTS:
+            event_ids['past_events'].append(event_id)
+    event_ids = set()
+    for ids in area_event_ids.values():
+        event_ids.update(ids['past_events'], ids['current_events'])
+    events = Event.objects.select_related('owner__userprofile').in_bulk(event_ids)
+
+    for area_id, data in areas.items():
+        data['ng_reports'] = [reports[report_id] for report_id in area_report_ids[area_id]]
+        for name, ids in area_event_ids[area_id].items():
+            data[name] = [events[event_id] for event_id in ids]
+    return areas
+
+
+def get_functional_areas(area_ids):
+    """Return the cached dashboard data of the functional areas /area_ids/.
+
+    The data of each area is shared by every user tracking it. The
+    missing areas are loaded together with load_functional_areas().
+    """
+    today = get_date()
+    version = get_versions(AREA_MODELS)
+    keys = dict((AREA_KEY.format(area_id, today, version), area_id)
+                for area_id in area_ids)
+    cached = cache.get_many(keys.keys())
+    areas = dict((keys[key], value) for key, value in cached.items())
+
+    missing = [area_id for area_id in area_ids if area_id not in areas]
+    if missing:
+        loaded = load_functional_areas(missing)
+        cache.set_many(dict((AREA_KEY.format(area_id, today, version), data)
+                            for area_id, data in loaded.items()), AREA_CACHE_TIMEOUT)
+        areas.update(loaded)
+    return areas
+
+
+def invalidate_sections(sender, **kwargs):
+    """Invalidate the sections depending on a saved or deleted object."""
+    bump_section_version(sender)
+
+
+for model in SECTION_MODELS:
+    uid = model._meta.model_name
+    post_save.connect(invalidate_sections, sender=model,
+                      dispatch_uid='dashboard_sections_{0}_post_save_signal'.format(uid))
+    post_delete.connect(invalidate_sections, sender=model,
+                        dispatch_uid='dashboard_sections_{0}_post_delete_signal'.format(uid))
+
+
+@receiver(m2m_changed, sender=User.groups.through,
+          dispatch_uid='dashboard_sections_user_groups_signal')
+def invalidate_sections_groups(sender, action, **kwargs):
+    """Invalidate the sections listing users when their groups change."""
+    if action in ['post_add', 'post_remove', 'post_clear']:
+        bump_section_version(UserProfile)
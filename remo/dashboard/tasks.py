@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils.timezone import now
+
+import waffle
+
+from remo.base.utils import get_date
+from remo.celery import app
+from remo.dashboard.models import ActionItem
+from remo.dashboard.sections import bump_section_version
+from remo.profiles.models import NOMINATION_ACTION_ITEM, NOMINATION_END_DAY, UserProfile
+from remo.reports.models import NGReport
+from remo.voting.models import Poll
+
+
+@app.task
+def resolve_action_items():
+    """Resolve the due action items of all the models with one query.
+
+    The due action items are:
+
+    * the verifications of reports due today,
+    * the votes of the polls which ended yesterday,
+    * the nominations of the month which are not completed, after the
+      10th day of each month.
+    """
+    today = now().date()
+    get_content_type = ContentType.objects.get_for_model
+
+    due = Q(content_type=get_content_type(NGReport), due_date=today)
+
+    start = datetime.combine(get_date(days=-1), datetime.min.time())
+    end = datetime.combine(get_date(days=-1), datetime.max.time())
+    polls = Poll.objects.filter(end__range=[start, end]).values('pk')
+    due |= Q(content_type=get_content_type(Poll), object_id__in=polls)
+
+    if (today.day == NOMINATION_END_DAY
+            or waffle.switch_is_active('enable_rotm_tasks')):
+        mentors = UserProfile.objects.filter(user__groups__name='Mentor').values('pk')
+        name = u'{0} {1}'.format(NOMINATION_ACTION_ITEM, today.strftime('%B'))
+        # All the completed action items are always resolved
+        due |= Q(content_type=get_content_type(UserProfile), object_id__in=mentors,
+                 name=name, completed=False)
+
+    count = ActionItem.objects.filter(due, resolved=False).update(resolved=True)
+    if count:
+        bump_section_version(ActionItem)
+    return count
@@ -6,4 +6,7 @@ from remo.profiles.models import UserStatus
 @library.filter
 def user_is_unavailable(user):
     """Return if a user is unavailable."""
+    # Set by the dashboard loaders, which fetch the statuses in bulk.
+    if hasattr(user, '_is_unavailable'):
+        return user._is_unavailable
     return UserStatus.objects.filter(user=user, is_unavailable=True).exists()
@@ -10,12 +10,12 @@ from nose.tools import eq_, ok_
 
 from remo.base.tests import RemoTestCase
 from remo.dashboard.models import ActionItem
+from remo.dashboard.tasks import resolve_action_items
 from remo.events.models import Event
 from remo.events.tasks import notify_event_owners_to_input_metrics
 from remo.events.tests import EventFactory, EventMetricOutcomeFactory
 from remo.profiles.models import UserProfile
-from remo.profiles.tasks import (resolve_nomination_action_items,
-                                 send_rotm_nomination_reminder)
+from remo.profiles.tasks import send_rotm_nomination_reminder
 from remo.profiles.tests import UserFactory
 from remo.remozilla.models import Bug
 from remo.remozilla.tests import BugFactory
@@ -23,7 +23,6 @@ from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE, RECRUIT_M
 from remo.reports.models import NGReport
 from remo.reports.tests import ActivityFactory, NGReportFactory
 from remo.voting.models import Poll
-from remo.voting.tasks import resolve_action_items
 from remo.voting.tests import PollFactory, VoteFactory
 
 
@@ -486,6 +485,19 @@ class ReportActionItems(RemoTestCase):
             ok_(item.completed)
             ok_(item.resolved)
 
+    def test_resolve_due_action_items(self):
+        activity = ActivityFactory.create(name=RECRUIT_MOZILLIAN)
+        mentor = UserFactory.create()
+        user = UserFactory.create(groups=['Rep'], userprofile__mentor=mentor)
+        report, due_report = NGReportFactory.create_batch(2, activity=activity, user=user,
+                                                          mentor=mentor)
+        ActionItem.objects.filter(object_id=due_report.id).update(due_date=now().date())
+
+        eq_(resolve_action_items(), 1)
+        items = ActionItem.objects.filter(content_type=ContentType.objects.get_for_model(NGReport))
+        ok_(items.get(object_id=due_report.id).resolved)
+        ok_(not items.get(object_id=report.id).resolved)
+
 
 class ROTMActionItems(RemoTestCase):
 
@@ -518,7 +530,7 @@ class ROTMActionItems(RemoTestCase):
         items = ActionItem.objects.filter(content_type=model)
         ok_(not items.exists())
 
-    @mock.patch('remo.profiles.tasks.now')
+    @mock.patch('remo.dashboard.tasks.now')
     def test_resolve_action_item(self, mocked_date):
         model = ContentType.objects.get_for_model(UserProfile)
         user = UserFactory.create(groups=['Mentor'])
@@ -529,11 +541,11 @@ class ROTMActionItems(RemoTestCase):
         eq_(items[0].resolved, False)
 
         mocked_date.return_value = datetime(now().year, now().month, 10)
-        resolve_nomination_action_items()
+        resolve_action_items()
         eq_(items.count(), 1)
         eq_(items[0].resolved, True)
 
-    @mock.patch('remo.profiles.tasks.now')
+    @mock.patch('remo.dashboard.tasks.now')
     def test_resolve_action_item_invalid_date(self, mocked_date):
         model = ContentType.objects.get_for_model(UserProfile)
         user = UserFactory.create(groups=['Mentor'])
@@ -544,6 +556,43 @@ class ROTMActionItems(RemoTestCase):
         eq_(items[0].resolved, False)
 
         mocked_date.return_value = datetime(now().year, now().month, 11)
-        resolve_nomination_action_items()
+        resolve_action_items()
         eq_(items.count(), 1)
         eq_(items[0].resolved, False)
+
+
+class SyncActionItemsTest(RemoTestCase):
+
+    def test_constant_queries(self):
+        council = Group.objects.get(name='Council')
+        UserFactory.create_batch(3, groups=['Council'])
+        poll = PollFactory.create(valid_groups=council, start=now() - timedelta(hours=3))
+        ActionItem.objects.all().delete()
+        UserFactory.create_batch(10, groups=['Council'])
+
+        # Users, stored items and the insert.
+        with self.assertNumQueries(3):
+            eq_(ActionItem.sync_items([poll]), 13)
+        with self.assertNumQueries(2):
+            eq_(ActionItem.sync_items([poll]), 0)
+
+    def test_many_instances(self):
+        UserFactory.create_batch(2, groups=['Mentor'])
+        profiles = UserProfile.objects.filter(user__groups__name='Mentor')
+        eq_(ActionItem.sync_items(profiles), 2)
+        eq_(ActionItem.sync_items(profiles), 0)
+        eq_(sorted(ActionItem.objects.values_list('object_id', flat=True)),
+            sorted(profiles.values_list('id', flat=True)))
+
+    def test_resolve_stale(self):
+        user = UserFactory.create(groups=['Rep'])
+        bug = BugFactory.create(whiteboard='[waiting receipts][waiting report]',
+                                assigned_to=user)
+        Bug.objects.filter(pk=bug.pk).update(whiteboard='[waiting report]')
+        bug = Bug.objects.get(pk=bug.pk)
+
+        ActionItem.sync_items([bug])
+        items = ActionItem.objects.filter(object_id=bug.id, resolved=False)
+        eq_(items.count(), 2)
+        ActionItem.sync_items([bug], resolve_stale=True)
+        eq_(list(items.values_list('name', flat=True)), ['Add report for ' + bug.summary])
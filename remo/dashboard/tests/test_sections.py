@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from mock import Mock
+from nose.tools import eq_, ok_
+
+from remo.base.tests import RemoTestCase
+from remo.dashboard.models import ActionItem
+from remo.dashboard.sections import get_functional_areas, get_section, load_functional_areas
+from remo.events.tests import EventFactory
+from remo.profiles.tests import FunctionalAreaFactory, UserFactory, UserStatusFactory
+from remo.remozilla.models import Bug
+from remo.remozilla.tests import BugFactory
+from remo.reports import ACTIVITY_EVENT_CREATE
+from remo.reports.tests import ActivityFactory, NGReportFactory
+
+
+class GetSectionTest(RemoTestCase):
+
+    def test_cached(self):
+        compute = Mock(return_value=[1, 2])
+        eq_(get_section('section', [Bug], compute), [1, 2])
+        eq_(get_section('section', [Bug], compute), [1, 2])
+        eq_(compute.call_count, 1)
+
+    def test_per_user(self):
+        user, other_user = UserFactory.create_batch(2)
+        compute = Mock(return_value='value')
+        get_section('section', [Bug], compute, user)
+        get_section('section', [Bug], compute, other_user)
+        eq_(compute.call_count, 2)
+
+    def test_invalidated_on_save_and_delete(self):
+        compute = Mock(return_value=None)
+        get_section('section', [Bug], compute)
+
+        bug = BugFactory.create()
+        get_section('section', [Bug], compute)
+        eq_(compute.call_count, 2)
+
+        bug.delete()
+        get_section('section', [Bug], compute)
+        eq_(compute.call_count, 3)
+
+    def test_invalidated_on_reassign(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+        event = EventFactory.create()
+        ActionItem.objects.create(name='Action', user=event.owner, priority=ActionItem.NORMAL,
+                                  content_object=event)
+        compute = Mock(return_value=None)
+        get_section('section', [ActionItem], compute)
+
+        event.owner = UserFactory.create()
+        event.save()
+        get_section('section', [ActionItem], compute)
+        eq_(compute.call_count, 2)
+
+    def test_other_models_keep_sections(self):
+        compute = Mock(return_value=None)
+        get_section('section', [ActionItem], compute)
+        NGReportFactory.create()
+        get_section('section', [ActionItem], compute)
+        eq_(compute.call_count, 1)
+
+    def test_evaluates_querysets(self):
+        BugFactory.create_batch(2)
+        get_section('bugs', [Bug], Bug.objects.all)
+        with self.assertNumQueries(0):
+            eq_(len(get_section('bugs', [Bug], Bug.objects.all)), 2)
+
+
+class DashboardCacheTest(RemoTestCase):
+
+    def test_admin_dashboard(self):
+        admin = UserFactory.create(groups=['Admin'])
+        UserFactory.create_batch(3, groups=['Rep'], userprofile__mentor=None)
+
+        with self.login(admin) as client:
+            with CaptureQueriesContext(connection) as first_queries:
+                response = client.get(reverse('dashboard'))
+            eq_(len(response.context['reps_without_mentors']), 3)
+
+            with CaptureQueriesContext(connection) as cached_queries:
+                client.get(reverse('dashboard'))
+            ok_(len(cached_queries) < len(first_queries))
+
+            UserFactory.create(groups=['Rep'], userprofile__mentor=None)
+            response = client.get(reverse('dashboard'))
+        eq_(len(response.context['reps_without_mentors']), 4)
+
+
+class FunctionalAreasTest(RemoTestCase):
+
+    def setUp(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+
+    def create_area(self):
+        area = FunctionalAreaFactory.create()
+        rep, other_rep = UserFactory.create_batch(2, groups=['Rep'],
+                                                  userprofile__functional_areas=[area])
+        mozillian = UserFactory.create(groups=['Mozillians'],
+                                       userprofile__functional_areas=[area])
+        UserStatusFactory.create(user=rep)
+        report = NGReportFactory.create(user=rep, functional_areas=[area],
+                                        report_date=now().date())
+        NGReportFactory.create(user=rep, functional_areas=[area],
+                               report_date=now().date() + timedelta(days=7))
+        past_event = EventFactory.create(owner=mozillian, categories=[area],
+                                         start=now() - timedelta(days=1))
+        current_event = EventFactory.create(owner=mozillian, categories=[area],
+                                            start=now() + timedelta(days=1))
+        return area, [rep, other_rep], report, past_event, current_event
+
+    def test_load(self):
+        area, reps, report, past_event, current_event = self.create_area()
+        data = load_functional_areas([area.id])[area.id]
+        eq_(data['reps'], reps)
+        eq_(data['ng_reports'], [report])
+        eq_(data['past_events'], [past_event])
+        eq_(data['current_events'], [current_event])
+        ok_(data['unavailable_rep_exists'])
+        ok_(data['reps'][0]._is_unavailable)
+        ok_(not data['reps'][1]._is_unavailable)
+
+    def test_constant_queries(self):
+        area_ids = [self.create_area()[0].id for i in range(3)]
+        # Reps, users, statuses, reports rows, reports, events rows and events.
+        with self.assertNumQueries(7):
+            areas = load_functional_areas(area_ids)
+        eq_(sorted(areas.keys()), sorted(area_ids))
+
+    def test_cached(self):
+        area = self.create_area()[0]
+        other_area = self.create_area()[0]
+        get_functional_areas([area.id])
+        with self.assertNumQueries(0):
+            get_functional_areas([area.id])
+        with self.assertNumQueries(7):
+            areas = get_functional_areas([area.id, other_area.id])
+        eq_(len(areas[other_area.id]['reps']), 2)
+
+    def test_invalidated_on_report(self):
+        area, reps = self.create_area()[:2]
+        get_functional_areas([area.id])
+        report = NGReportFactory.create(user=reps[1], functional_areas=[area],
+                                        report_date=now().date())
+        ok_(report in get_functional_areas([area.id])[area.id]['ng_reports'])
@@ -13,10 +13,11 @@ from product_details import product_details
 import forms
 from remo.base.decorators import permission_check
 from remo.base.forms import EmailUsersForm
-from remo.base.utils import get_date
+from remo.base.utils import get_date, get_user_groups
 from remo.dashboard.models import ActionItem
+from remo.dashboard.sections import get_functional_areas, get_section
 from remo.events.models import Event
-from remo.profiles.models import UserStatus, FunctionalArea
+from remo.profiles.models import FunctionalArea, UserProfile
 from remo.remozilla.models import Bug
 from remo.reports.models import NGReport, Campaign
 
@@ -49,39 +50,25 @@ def dashboard_mozillians(request, user):
         reps_email_form.send_email(request, reps)
         return redirect('dashboard')
 
-    # Get the reps who match the specified interests
-    interests = user.userprofile.tracked_functional_areas.all()
+    # Get the reps, reports and events of the tracked interests
+    interests = list(user.userprofile.tracked_functional_areas.all())
+    areas = get_functional_areas([interest.id for interest in interests])
     tracked_interests = {}
     reps_past_events = {}
     reps_current_events = {}
     reps_ng_reports = {}
-    today = now().date()
     unavailable_rep_exists = {}
 
     for interest in interests:
-        # Get the Reps with the specified interest
-        reps = User.objects.filter(groups__name='Rep').filter(
-            userprofile__functional_areas=interest)
+        area = areas[interest.id]
         tracked_interests[interest.name] = {
             'id': interest.id,
-            'reps': reps
+            'reps': area['reps']
         }
-
-        # Get the reports of the Reps with the specified interest
-        ng_reports = NGReport.objects.filter(report_date__lte=today,
-                                             functional_areas=interest,
-                                             user__in=reps)
-        reps_ng_reports[interest.name] = ng_reports.order_by('-report_date')[:20]
-
-        # Get the events with the specified category
-        events = Event.objects.filter(categories=interest)
-        reps_past_events[interest.name] = events.filter(start__lt=now())[:50]
-        reps_current_events[interest.name] = events.filter(start__gte=now())
-
-        # Check if there is an unavailable Rep for the specific interest
-        unavailable_val = (UserStatus.objects.filter(is_unavailable=True)
-                                             .filter(user__in=reps).exists())
-        unavailable_rep_exists[interest.name] = unavailable_val
+        reps_ng_reports[interest.name] = area['ng_reports']
+        reps_past_events[interest.name] = area['past_events']
+        reps_current_events[interest.name] = area['current_events']
+        unavailable_rep_exists[interest.name] = area['unavailable_rep_exists']
 
     args['unavailable_rep_exists'] = unavailable_rep_exists
     args['reps_ng_reports'] = reps_ng_reports
@@ -100,10 +87,10 @@ def dashboard(request):
     """Dashboard view."""
     user = request.user
     args = {'today': now()}
+    groups = get_user_groups(user)
 
     # Mozillians/Alumni block
-    if (user.groups.filter(name='Mozillians').exists()
-            or user.groups.filter(name='Alumni').exists()):
+    if groups & set(['Mozillians', 'Alumni']):
         return dashboard_mozillians(request, user)
 
     # Reps block
@@ -115,10 +102,12 @@ def dashboard(request):
     today = now().date()
 
     # Action Items
-    args['action_items'] = ActionItem.objects.filter(user=user, resolved=False)[:10]
+    args['action_items'] = get_section(
+        'action_items', [ActionItem],
+        lambda: ActionItem.objects.filter(user=user, resolved=False)[:10], user)
 
     # NG Reports
-    if user.groups.filter(name='Rep').exists():
+    if 'Rep' in groups:
         args['ng_reports'] = user.ng_reports.filter(
             report_date__lte=today).order_by('-report_date')
 
@@ -128,64 +117,84 @@ def dashboard(request):
     my_mentees = User.objects.filter(userprofile__mentor=user,
                                      userprofile__registration_complete=True,
                                      groups__name='Rep')
-    reps = User.objects.filter(groups__name='Rep')
+    reps = User.objects.filter(groups__name='Rep').select_related('userprofile')
 
-    args['my_budget_requests'] = budget_requests.filter(my_q).distinct()
-    args['my_swag_requests'] = swag_requests.filter(my_q).distinct()
+    args['my_budget_requests'] = get_section(
+        'my_budget_requests', [Bug], lambda: budget_requests.filter(my_q).distinct(), user)
+    args['my_swag_requests'] = get_section(
+        'my_swag_requests', [Bug], lambda: swag_requests.filter(my_q).distinct(), user)
 
-    if user.groups.filter(
-        Q(name='Admin')
-        | Q(name='Council')
-        | Q(name='Peers')
-        | Q(name='Onboarding')
-    ).exists():
+    if groups & set(['Admin', 'Council', 'Peers', 'Onboarding']):
         args['can_view_administration'] = True
 
-    if user.groups.filter(name='Mentor').exists():
-        args['mentees_action_items'] = ActionItem.objects.filter(user__in=my_mentees,
-                                                                 resolved=False)[:10]
-        args['mentees_activities'] = User.objects.filter(
-            userprofile__registration_complete=True,
-            userprofile__mentor=user,
-            groups__name='Rep').distinct()
-        args['mentees_budget_requests'] = budget_requests.filter(creator__in=my_mentees).distinct()
-        args['mentees_swag_requests'] = swag_requests.filter(creator__in=my_mentees).distinct()
-        args['mentees_emails'] = my_mentees.values_list('first_name', 'last_name', 'email') or None
-        args['email_mentees_form'] = EmailUsersForm(my_mentees)
-
-    if user.groups.filter(Q(name='Mentor') | Q(name='Council')).exists():
+    if 'Mentor' in groups:
+        args['mentees_action_items'] = get_section(
+            'mentees_action_items', [ActionItem, UserProfile],
+            lambda: ActionItem.objects.filter(user__in=my_mentees, resolved=False)[:10], user)
+        args['mentees_activities'] = get_section(
+            'mentees_activities', [UserProfile],
+            lambda: User.objects.filter(
+                userprofile__registration_complete=True,
+                userprofile__mentor=user,
+                groups__name='Rep').select_related('userprofile').distinct(), user)
+        args['mentees_budget_requests'] = get_section(
+            'mentees_budget_requests', [Bug, UserProfile],
+            lambda: budget_requests.filter(creator__in=my_mentees).distinct(), user)
+        args['mentees_swag_requests'] = get_section(
+            'mentees_swag_requests', [Bug, UserProfile],
+            lambda: swag_requests.filter(creator__in=my_mentees).distinct(), user)
+        args['mentees_emails'] = get_section(
+            'mentees_emails', [UserProfile],
+            lambda: list(my_mentees.values_list('first_name', 'last_name', 'email')) or None,
+            user)
+        args['email_mentees_form'] = EmailUsersForm(args['mentees_activities'])
+
+    if groups & set(['Mentor', 'Council']):
         my_mentorship_requests = mentorship_requests.filter(my_q_assigned)
         my_mentorship_requests = my_mentorship_requests.order_by('whiteboard')
-        args['my_mentorship_requests'] = my_mentorship_requests.distinct()
+        args['my_mentorship_requests'] = get_section(
+            'my_mentorship_requests', [Bug], my_mentorship_requests.distinct, user)
 
-    if user.groups.filter(Q(name='Admin') | Q(name='Review')).exists():
-        args['all_budget_requests'] = budget_requests.all()[:20]
-        args['all_swag_requests'] = swag_requests.all()[:20]
+    if groups & set(['Admin', 'Review']):
+        args['all_budget_requests'] = get_section(
+            'all_budget_requests', [Bug], lambda: budget_requests.all()[:20])
+        args['all_swag_requests'] = get_section(
+            'all_swag_requests', [Bug], lambda: swag_requests.all()[:20])
 
-    if user.groups.filter(Q(name='Admin') | Q(name='Council') | Q(name='Onboarding')).exists():
-        args['reps_without_profile'] = reps.filter(userprofile__registration_complete=False)
+    if groups & set(['Admin', 'Council', 'Onboarding']):
+        args['reps_without_profile'] = get_section(
+            'reps_without_profile', [UserProfile],
+            lambda: reps.filter(userprofile__registration_complete=False))
 
-    if user.groups.filter(Q(name='Admin') | Q(name='Council') | Q(name='Peers')).exists():
+    if groups & set(['Admin', 'Council', 'Peers']):
         # We want to show
         #   - Reps with completed profiles and no mentor
         #   - Reps with mentors who are Alumni
         # while not including any Alumni Reps
-        alumni_ids = User.objects.filter(groups__name='Alumni').values_list('id', flat=True)
-        reps_with_alumni_mentors_q = Q(userprofile__mentor__id__in=alumni_ids)
-        reps_without_mentor_q = Q(userprofile__registration_complete=True,
-                                  userprofile__mentor__isnull=True)
-        reps_without_mentor = reps.filter(reps_with_alumni_mentors_q
-                                          | reps_without_mentor_q)
-        order_by = '-userprofile__date_joined_program'
-        args['reps_without_mentors'] = reps_without_mentor.order_by(order_by)
+        def get_reps_without_mentors():
+            alumni_ids = User.objects.filter(groups__name='Alumni').values_list('id', flat=True)
+            reps_with_alumni_mentors_q = Q(userprofile__mentor__id__in=alumni_ids)
+            reps_without_mentor_q = Q(userprofile__registration_complete=True,
+                                      userprofile__mentor__isnull=True)
+            reps_without_mentor = reps.filter(reps_with_alumni_mentors_q
+                                              | reps_without_mentor_q)
+            order_by = '-userprofile__date_joined_program'
+            return reps_without_mentor.order_by(order_by)
+
+        args['reps_without_mentors'] = get_section(
+            'reps_without_mentors', [UserProfile], get_reps_without_mentors)
 
         reps_with_profiles = reps.filter(userprofile__registration_complete=True)
         q_active_12_months = Q(
             ng_reports__report_date__range=[get_date(weeks=-52), get_date(weeks=0)])
-        args['reps_inactive_12_months'] = reps_with_profiles.filter(~q_active_12_months).distinct()
+        args['reps_inactive_12_months'] = get_section(
+            'reps_inactive_12_months', [NGReport, UserProfile],
+            reps_with_profiles.filter(~q_active_12_months).distinct)
         q_active_6_months = Q(
             ng_reports__report_date__range=[get_date(weeks=-26), get_date(weeks=0)])
-        args['reps_inactive_6_months'] = reps_with_profiles.filter(~q_active_6_months).distinct()
+        args['reps_inactive_6_months'] = get_section(
+            'reps_inactive_6_months', [NGReport, UserProfile],
+            reps_with_profiles.filter(~q_active_6_months).distinct)
 
     statsd.incr('dashboard.dashboard_reps')
     return render(request, 'dashboard_reps.jinja', args)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 from import_export import fields, resources
-from import_export.admin import ExportMixin
+
+from remo.base.admin import StreamingExportMixin
 from models import Attendance, Event, EventMetric, EventMetricOutcome
 
 
@@ -49,7 +50,7 @@ class EventResource(resources.ModelResource):
         return ''
 
 
-class EventAdmin(ExportMixin, admin.ModelAdmin):
+class EventAdmin(StreamingExportMixin, admin.ModelAdmin):
     """Event Admin."""
     resource_class = EventResource
     inlines = [AttendanceInline]
@@ -80,7 +81,7 @@ class AttendanceResource(resources.ModelResource):
         return obj.event.name
 
 
-class AttendanceAdmin(ExportMixin, admin.ModelAdmin):
+class AttendanceAdmin(StreamingExportMixin, admin.ModelAdmin):
     """Attendance Admin"""
     resource_class = AttendanceResource
     model = Attendance
@@ -88,14 +89,14 @@ class AttendanceAdmin(ExportMixin, admin.ModelAdmin):
     search_fields = ('event__name', 'user__first_name', 'user__last_name',)
 
 
-class EventMetricAdmin(ExportMixin, admin.ModelAdmin):
+class EventMetricAdmin(StreamingExportMixin, admin.ModelAdmin):
     """EventMetric Admin."""
     model = EventMetric
     list_display = ('name', 'active')
     list_filter = ('active',)
 
 
-class EventMetricOutcomeAdmin(ExportMixin, admin.ModelAdmin):
+class EventMetricOutcomeAdmin(StreamingExportMixin, admin.ModelAdmin):
     """EventMetricOutcome Admin."""
     model = EventMetricOutcome
     list_display = ('event', 'metric', 'expected_outcome', 'outcome')
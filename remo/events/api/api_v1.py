@@ -2,7 +2,7 @@ from urllib import unquote
 
 from django.conf import settings
 from django.core.urlresolvers import reverse
-from django.db.models import Q
+from django.db.models import Count
 from django.utils.timezone import now
 
 from jinja2 import escape
@@ -12,11 +12,12 @@ from tastypie.authorization import ReadOnlyAuthorization
 from tastypie.constants import ALL, ALL_WITH_RELATIONS
 from tastypie.resources import ModelResource
 
-from remo.api import HttpCache, RemoAPIThrottle, RemoThrottleMixin
+from remo.api import EagerLoadingMixin, HttpCache, RemoAPIThrottle, RemoThrottleMixin
 from remo.base.serializers import iCalSerializer
 from remo.events.templatetags.helpers import is_multiday
 from remo.events.models import Event, EventMetric, EventMetricOutcome
 from remo.reports.models import Campaign
+from remo.search.index import search
 
 
 # Legacy non-public api
@@ -72,7 +73,7 @@ class CampaignResource(RemoThrottleMixin, ModelResource):
         throttle = RemoAPIThrottle()
 
 
-class EventResource(RemoThrottleMixin, ModelResource):
+class EventResource(EagerLoadingMixin, RemoThrottleMixin, ModelResource):
     """Event Resource."""
     local_start = fields.DateTimeField()
     local_end = fields.DateTimeField()
@@ -114,6 +115,9 @@ class EventResource(RemoThrottleMixin, ModelResource):
                      'campaign': ALL_WITH_RELATIONS}
         max_limit = 40
         throttle = RemoAPIThrottle()
+        select_related = ['owner__userprofile', 'swag_bug', 'budget_bug', 'campaign']
+        prefetch_related = ['categories', 'eventmetricoutcome_set__metric']
+        annotations = {'sign_ups_count': Count('attendees', distinct=True)}
 
     def dehydrate_name(self, bundle):
         """Sanitize event name."""
@@ -160,7 +164,7 @@ class EventResource(RemoThrottleMixin, ModelResource):
 
     def dehydrate_sign_ups(self, bundle):
         """Return the number of the people who signed up in an event."""
-        return bundle.obj.attendees.all().count()
+        return bundle.obj.sign_ups_count
 
     def apply_filters(self, request, applicable_filters):
         """Add special 'query' parameter to filter Events.
@@ -178,22 +182,7 @@ class EventResource(RemoThrottleMixin, ModelResource):
         query = request.GET.get('query', None)
         if query:
             query = unquote(query)
-            # We need to split query to match full names
-            qset = Q()
-            for term in query.split():
-                for key in ('owner__first_name__istartswith',
-                            'owner__last_name__istartswith'):
-                    qset |= Q(**{key: term})
-            qset |= (Q(owner__userprofile__display_name__istartswith=query)
-                     | Q(owner__userprofile__local_name__istartswith=query)
-                     | Q(owner__email__istartswith=query)
-                     | Q(owner__userprofile__private_email__istartswith=query)
-                     | Q(country__istartswith=query)
-                     | Q(region__istartswith=query)
-                     | Q(city__istartswith=query)
-                     | Q(name__icontains=query))
-
-            base_object_list = base_object_list.filter(qset).distinct()
+            base_object_list = search(base_object_list, query)
 
         return base_object_list
 
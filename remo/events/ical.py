@@ -0,0 +1,120 @@
+"""iCal export of the events.
+
+The VEVENT block of each event is rendered once and cached. Its cache
+key contains the modification time and the edit count of the event, so
+an edited event is rendered again and the outdated block expires. The
+DTSTAMP of a cached block is the time it was rendered.
+"""
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.template.loader import get_template
+from django.utils import timezone
+
+from remo.base.utils import iterate_in_chunks
+from remo.events.models import Event
+from remo.search.index import search as search_events
+
+
+VEVENT_CACHE_TIMEOUT = 60 * 60 * 24
+VEVENT_KEY = 'events:ical:vevent:{0}:{1}:{2}'
+ICAL_CHUNK_SIZE = 200
+
+
+def get_utc_datetime(date, time=datetime.time()):
+    """Return /date/ at /time/ in UTC."""
+    return timezone.make_aware(datetime.datetime.combine(date, time), timezone.utc)
+
+
+def get_ical_events(period, start=None, end=None, search=None):
+    """Return the events exported for /period/.
+
+    /period/ is one of 'all', 'future', 'past' or 'custom'. Custom
+    periods are limited by the /start/ and /end/ dates in YYYY-MM-DD
+    format. Return None for unknown periods and invalid dates.
+    """
+    today = timezone.now().date()
+    events = Event.objects.all()
+    if period == 'future':
+        events = events.filter(start__gte=get_utc_datetime(today))
+    elif period == 'past':
+        events = events.filter(start__lt=get_utc_datetime(today))
+    elif period == 'custom':
+        try:
+            start_date = start and datetime.datetime.strptime(start, '%Y-%m-%d').date()
+            end_date = end and datetime.datetime.strptime(end, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+        if start_date:
+            events = events.filter(start__gte=get_utc_datetime(start_date))
+        if end_date:
+            events = events.filter(end__lte=get_utc_datetime(end_date, datetime.time(23, 59)))
+    elif period != 'all':
+        return None
+
+    if search:
+        events = search_events(events, search)
+    return events.order_by('start')
+
+
+def get_feed_version(events):
+    """Return the number of /events/ and their latest modification time."""
+    return events.order_by().aggregate(count=Count('id'), updated_on=Max('updated_on'))
+
+
+def get_feed_etag(version):
+    """Return the ETag of a feed with the given /version/."""
+    value = '{0}:{1}'.format(version['count'], version['updated_on'])
+    return hashlib.md5(value).hexdigest()
+
+
+def get_vevent_key(event):
+    updated_on = event.updated_on.isoformat() if event.updated_on else None
+    return VEVENT_KEY.format(event.pk, updated_on, event.times_edited)
+
+
+def render_vevents(events, date_now=None):
+    """Return the VEVENT blocks of /events/ rendering the missing ones."""
+    date_now = date_now or timezone.now()
+    keys = [get_vevent_key(event) for event in events]
+    vevents = cache.get_many(keys)
+
+    template = get_template('ical_vevent.jinja')
+    rendered = {}
+    for key, event in zip(keys, events):
+        if key not in vevents:
+            rendered[key] = template.render({'event': event, 'date_now': date_now,
+                                             'host': settings.SITE_URL})
+    if rendered:
+        cache.set_many(rendered, VEVENT_CACHE_TIMEOUT)
+        vevents.update(rendered)
+    return [vevents[key] for key in keys]
+
+
+def iterate_vevents(events, chunk_size=ICAL_CHUNK_SIZE):
+    """Yield the VEVENT blocks of /events/ fetching them in chunks."""
+    date_now = timezone.now()
+    chunk = []
+    for event in iterate_in_chunks(events, chunk_size):
+        chunk.append(event)
+        if len(chunk) == chunk_size:
+            for vevent in render_vevents(chunk, date_now):
+                yield vevent
+            chunk = []
+    for vevent in render_vevents(chunk, date_now):
+        yield vevent
+
+
+def render_ical(events):
+    """Return the iCal calendar of the list of /events/."""
+    template = get_template('multi_event_ical_template.jinja')
+    return template.render({'vevents': render_vevents(events)})
+
+
+def stream_ical(events, chunk_size=ICAL_CHUNK_SIZE):
+    """Yield the iCal calendar of the queryset /events/ piece by piece."""
+    template = get_template('multi_event_ical_template.jinja')
+    return template.template.generate({'vevents': iterate_vevents(events, chunk_size)})
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from remo.events.similar import refresh_recent_similar_events
+
+
+class Command(BaseCommand):
+    """Backfill the similar events of the upcoming and recent events."""
+    args = None
+    help = 'Refresh the similar events of the upcoming and recent events'
+
+    def handle(self, *args, **options):
+        """Command handler."""
+        count = refresh_recent_similar_events()
+        self.stdout.write('Refreshed the similar events of {0} events'.format(count))
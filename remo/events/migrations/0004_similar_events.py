@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_auto_20170316_1625'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarEvent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('score', models.FloatField()),
+                ('event', models.ForeignKey(related_name='similar_events', to='events.Event')),
+                ('similar', models.ForeignKey(related_name='similar_to', to='events.Event')),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='similarevent',
+            unique_together=set([('event', 'similar')]),
+        ),
+    ]
@@ -6,14 +6,14 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.db.models import Q
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
 
 from uuslug import uuslug as slugify
 
+from remo.base.jobs import defer
 from remo.base.models import GenericActiveManager
 from remo.base.tasks import send_remo_mail
 from remo.dashboard.models import ActionItem, Item
@@ -159,12 +159,19 @@ class Event(models.Model):
             if current_event.owner != self.owner:
                 model = ContentType.objects.get_for_model(self)
                 action_items = ActionItem.objects.filter(content_type=model, object_id=self.pk)
-                action_items.update(user=self.owner)
+                if action_items.update(user=self.owner):
+                    # Avoid circular dependency
+                    from remo.dashboard.sections import bump_section_version
+
+                    bump_section_version(ActionItem)
 
         super(Event, self).save(*args, **kwargs)
 
-        # Subscribe owner to event
-        Attendance.objects.get_or_create(event=self, user=self.owner)
+        # Avoid circular dependency
+        from remo.events.tasks import subscribe_event_owner, update_event_similar_events
+
+        defer(subscribe_event_owner, self.pk)
+        defer(update_event_similar_events, self.pk)
 
     @property
     def local_start(self):
@@ -184,27 +191,12 @@ class Event(models.Model):
         return None
 
     def get_similar_events(self):
-        """Implement 3-events-like-this functionality.
-
-        Specs:
-
-        * Return future events that match the same country and one or
-          more categories.
-        * If less than 3 matches, show upcoming events with the same country.
-        * If less than 3 matches, show upcoming events with the same category.
-        * Order by date, earliest date first.
+        """Return the SIMILAR_EVENTS upcoming events most similar to this one.
 
+        The similar events are precomputed by remo.events.similar.
         """
-
-        events = Event.objects.filter(start__gte=now()).exclude(pk=self.pk)
-        country = Q(country=self.country)
-        category = Q(categories__in=self.categories.all())
-
-        if (events.filter(country, category).distinct().count() < SIMILAR_EVENTS):
-            if events.filter(country).count() < SIMILAR_EVENTS:
-                return events.filter(category).distinct()
-            return events.filter(country)
-        return events.filter(country, category).distinct()
+        return (Event.objects.filter(similar_to__event=self, start__gte=now())
+                .order_by('-similar_to__score', 'similar_to__similar')[:SIMILAR_EVENTS])
 
     def get_action_items(self):
         action_items = []
@@ -244,7 +236,19 @@ class EventMetricOutcome(models.Model):
         # Resolve action items for post event metrics
         # if only is past event
         if self.event.is_past_event:
-            ActionItem.resolve(instance=self.event, user=self.event.owner, name=self.event.name)
+            name = u'{0} {1}'.format(POST_EVENT_METRICS_ACTION, self.event.name)
+            ActionItem.resolve(instance=self.event, user=self.event.owner, name=name)
+
+
+class SimilarEvent(models.Model):
+    """An upcoming event similar to an event, with its similarity score."""
+    event = models.ForeignKey(Event, related_name='similar_events')
+    similar = models.ForeignKey(Event, related_name='similar_to')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['event', 'similar']
 
 
 class EventComment(models.Model):
@@ -279,3 +283,14 @@ def email_event_owner_on_add_comment(sender, instance, **kwargs):
         subject = subject % (instance.user.get_full_name(), instance.event.name)
         send_remo_mail.delay(subject=subject, recipients_list=[owner.id],
                              email_template=email_template, data=ctx_data)
+
+
+@receiver(m2m_changed, sender=Event.categories.through,
+          dispatch_uid='update_similar_events_categories_signal')
+def update_similar_events_categories(sender, instance, action, reverse, **kwargs):
+    """Update the similar events when the categories of an event change."""
+    # Avoid circular dependency
+    from remo.events.tasks import update_event_similar_events
+
+    if not reverse and action in ['post_add', 'post_remove', 'post_clear']:
+        defer(update_event_similar_events, instance.pk)
@@ -0,0 +1,169 @@
+"""Events like this.
+
+The upcoming events most similar to each event are stored as
+SimilarEvent rows, so that the page of an event reads them with a
+single query. Events are similar when they share categories or the
+country. The score of a pair of events grows with the number of shared
+categories, the same country and their proximity.
+
+Saving an event, or changing its categories, updates its own similar
+events and its place in the similar events of the others. Started
+events are dropped from the similar events every day. The
+refresh_similar_events command fills in the similar events of the
+existing events.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils.timezone import now
+
+from remo.events.models import Event, SimilarEvent
+
+
+SIMILAR_EVENTS_STORED = 10
+CATEGORY_WEIGHT = 1
+COUNTRY_WEIGHT = 10
+# Events closer than PROXIMITY_DISTANCE kilometres get at least half
+# of the PROXIMITY_WEIGHT.
+PROXIMITY_WEIGHT = 1
+PROXIMITY_DISTANCE = 100.0
+EARTH_RADIUS = 6371.0
+# The pages of events which ended recently are still visited.
+RECENT_EVENTS_DAYS = 30
+
+
+def get_distance(event, other):
+    """Return the distance in kilometres between two events."""
+    lat1, lon1, lat2, lon2 = map(math.radians, [event.lat, event.lon, other.lat, other.lon])
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1, math.sqrt(a)))
+
+
+def get_score(event, other):
+    """Return the similarity score of two events or None.
+
+    The events need a /category_ids/ set, as set by get_candidates().
+    """
+    shared = len(event.category_ids & other.category_ids)
+    same_country = event.country == other.country
+    if not shared and not same_country:
+        return None
+    proximity = PROXIMITY_WEIGHT / (1 + get_distance(event, other) / PROXIMITY_DISTANCE)
+    return shared * CATEGORY_WEIGHT + same_country * COUNTRY_WEIGHT + proximity
+
+
+def set_category_ids(events):
+    """Set the ids of the categories of each of /events/ as category_ids."""
+    category_ids = defaultdict(set)
+    rows = (Event.categories.through.objects.filter(event__in=[event.id for event in events])
+            .values_list('event', 'functionalarea'))
+    for event_id, category_id in rows:
+        category_ids[event_id].add(category_id)
+    for event in events:
+        event.category_ids = category_ids[event.id]
+
+
+def get_candidates(event):
+    """Return the events sharing categories or the country with /event/."""
+    set_category_ids([event])
+    events = list(Event.objects.filter(Q(country=event.country)
+                                       | Q(categories__in=list(event.category_ids)))
+                  .exclude(pk=event.pk).distinct()
+                  .only('id', 'start', 'country', 'lat', 'lon'))
+    set_category_ids(events)
+    return events
+
+
+def get_rank(score, event_id):
+    """Return the sort key of an event with /score/, the best first."""
+    return (-score, event_id)
+
+
+def get_similar_scores(event):
+    """Return the (score, event) pairs of the events similar to /event/."""
+    pairs = []
+    for other in get_candidates(event):
+        score = get_score(event, other)
+        if score is not None:
+            pairs.append((score, other))
+    return pairs
+
+
+def refresh_similar_events(event, pairs=None):
+    """Store the best upcoming events of the similar /pairs/ of /event/.
+
+    /pairs/ are computed with get_similar_scores() when missing.
+    """
+    if pairs is None:
+        pairs = get_similar_scores(event)
+    current_time = now()
+    upcoming = sorted(((score, other) for score, other in pairs if other.start >= current_time),
+                      key=lambda pair: get_rank(pair[0], pair[1].id))
+    SimilarEvent.objects.filter(event=event).delete()
+    SimilarEvent.objects.bulk_create(SimilarEvent(event=event, similar=other, score=score)
+                                     for score, other in upcoming[:SIMILAR_EVENTS_STORED])
+
+
+def update_similar_events(event):
+    """Update the similar events of /event/ and its place in the similar
+    events of the others.
+
+    An upcoming event is added to the similar events of the others when
+    it ranks among their SIMILAR_EVENTS_STORED best ones.
+    """
+    pairs = get_similar_scores(event)
+    refresh_similar_events(event, pairs)
+    SimilarEvent.objects.filter(similar=event).delete()
+    if event.start < now() or not pairs:
+        return
+
+    stored = defaultdict(list)
+    rows = (SimilarEvent.objects.filter(event__in=[other.id for score, other in pairs])
+            .values_list('id', 'event', 'similar', 'score'))
+    for row_id, other_id, similar_id, score in rows:
+        stored[other_id].append((get_rank(score, similar_id), row_id))
+
+    added = []
+    displaced = []
+    for score, other in pairs:
+        other_rows = sorted(stored[other.id])
+        if len(other_rows) < SIMILAR_EVENTS_STORED:
+            added.append(SimilarEvent(event=other, similar=event, score=score))
+        elif get_rank(score, event.id) < other_rows[-1][0]:
+            added.append(SimilarEvent(event=other, similar=event, score=score))
+            displaced.append(other_rows[-1][1])
+    if displaced:
+        SimilarEvent.objects.filter(id__in=displaced).delete()
+    SimilarEvent.objects.bulk_create(added)
+
+
+def expire_similar_events():
+    """Drop the started events from the similar events and fill in the
+    similar events they leave.
+
+    Return the number of updated events.
+    """
+    expired = SimilarEvent.objects.filter(similar__start__lt=now())
+    event_ids = set(expired.values_list('event', flat=True))
+    expired.delete()
+    for event in Event.objects.filter(id__in=event_ids).only('id', 'start', 'country',
+                                                             'lat', 'lon'):
+        refresh_similar_events(event)
+    return len(event_ids)
+
+
+def refresh_recent_similar_events():
+    """Refresh the similar events of the upcoming and recent events.
+
+    Return the number of refreshed events.
+    """
+    events = (Event.objects.filter(end__gte=now() - timedelta(days=RECENT_EVENTS_DAYS))
+              .only('id', 'start', 'country', 'lat', 'lon'))
+    count = 0
+    for event in events:
+        refresh_similar_events(event)
+        count += 1
+    return count
@@ -4,10 +4,12 @@ from django.contrib.contenttypes.models import ContentType
 
 from remo.celery import app
 
+from remo.base.jobs import job
 from remo.base.tasks import send_remo_mail
-from remo.base.utils import get_date
+from remo.base.utils import get_date, get_object_or_none
 from remo.dashboard.models import ActionItem
-from remo.events.models import Event
+from remo.events.models import Attendance, Event
+from remo.events.similar import expire_similar_events, update_similar_events
 
 
 @app.task
@@ -25,15 +27,41 @@ def notify_event_owners_to_input_metrics():
     events = events.distinct()
 
     event_model = ContentType.objects.get_for_model(Event)
+    events = list(events.select_related('owner'))
+    # Before sending an email check that an action item already exists.
+    # If it does, then we have already sent this email.
+    notified = set(ActionItem.objects.filter(content_type=event_model,
+                                             object_id__in=[event.id for event in events])
+                   .values_list('object_id', flat=True))
+    pending = []
     for event in events:
-        # Before sending an email check that an action item already exists.
-        # If it does, then we have already sent this email.
-
-        action_item = ActionItem.objects.filter(content_type=event_model, object_id=event.id)
-        if not action_item.exists():
+        if event.id not in notified:
             subject = u'[Reminder] Please add the actual metrics for event {0}'.format(event.name)
             template = 'email/event_creator_notification_to_input_metrics.jinja'
             data = {'event': event}
             send_remo_mail.delay(subject=subject, email_template=template,
                                  recipients_list=[event.owner.id], data=data)
-            ActionItem.create(instance=event)
+            pending.append(event)
+    ActionItem.sync_items(pending)
+
+
+@job
+def subscribe_event_owner(event_id):
+    """Subscribe the owner of a saved event to the event."""
+    event = get_object_or_none(Event, id=event_id)
+    if event:
+        Attendance.objects.get_or_create(event=event, user=event.owner)
+
+
+@job
+def update_event_similar_events(event_id):
+    """Update the similar events of a saved event and of the others."""
+    event = get_object_or_none(Event, id=event_id)
+    if event:
+        update_similar_events(event)
+
+
+@app.task
+def expire_started_similar_events():
+    """Drop the started events from the similar events of all the events."""
+    expire_similar_events()
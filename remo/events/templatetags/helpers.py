@@ -4,6 +4,7 @@ from django.core.urlresolvers import reverse
 from django_jinja import library
 
 from remo.base.templatetags.helpers import urlparams
+from remo.base.utils import user_in_groups
 
 
 @library.global_function
@@ -31,9 +32,9 @@ def get_attendee_role_event(attendee, event):
             return 'Organizer'
         else:
             return 'Mozilla\'s presence organizer'
-    elif attendee.groups.filter(name='Mozillians').exists():
+    elif user_in_groups(attendee, 'Mozillians'):
         return 'Mozillian attendee'
-    elif attendee.groups.filter(name='Alumni').exists():
+    elif user_in_groups(attendee, 'Alumni'):
         return 'Alumni attendee'
     return 'Rep attendee'
 
@@ -60,10 +61,10 @@ def get_sorted_attendance_list(event):
 
     query = event.attendees.exclude(groups__name='Mozillians',
                                     userprofile__mozillian_username='')
-    attendees = list(query.order_by('last_name', 'first_name'))
+    # The avatars of the attendees are rendered along.
+    attendees = list(query.select_related('useravatar').order_by('last_name', 'first_name'))
     if event.owner in attendees:
-        attendees.remove(event.owner)
-        attendees.insert(0, event.owner)
+        attendees.insert(0, attendees.pop(attendees.index(event.owner)))
     return attendees
 
 
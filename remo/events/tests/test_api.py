@@ -1,7 +1,12 @@
+import json
 from datetime import datetime
 from mock import patch
 
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 
 from nose.tools import eq_, ok_
 
@@ -9,9 +14,9 @@ from remo.base.tests import RemoTestCase
 from remo.events.api.serializers import (EventDetailedSerializer,
                                          EventSerializer)
 from remo.events.api.views import EventsKPIView
-from remo.events.tests import EventFactory
+from remo.events.tests import AttendanceFactory, EventFactory, EventMetricOutcomeFactory
 from remo.profiles.tests import FunctionalAreaFactory, UserFactory
-from remo.reports import ACTIVITY_EVENT_CREATE
+from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE
 from remo.reports.tests import ActivityFactory, CampaignFactory
 
 
@@ -29,6 +34,38 @@ class TestEventSerializer(RemoTestCase):
         ok_(serializer.data['_url'])
 
 
+class TestEventResource(RemoTestCase):
+
+    def setUp(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+        ActivityFactory.create(name=ACTIVITY_EVENT_ATTEND)
+
+    def create_event(self):
+        event = EventFactory.create(campaign=CampaignFactory.create())
+        EventMetricOutcomeFactory.create(event=event)
+        AttendanceFactory.create_batch(2, event=event)
+        return event
+
+    def test_constant_queries(self):
+        url = reverse('api_dispatch_list', kwargs={'api_name': 'v1', 'resource_name': 'event'})
+        self.create_event()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        num_queries = len(queries)
+
+        for i in range(3):
+            self.create_event()
+        # Skip the cached response.
+        cache.clear()
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url)
+        objects = json.loads(response.content)['objects']
+        eq_(len(objects), 4)
+        # The owner signs up too.
+        eq_(set(obj['sign_ups'] for obj in objects), set([3]))
+        ok_(all(obj['metrics'] and obj['categories'] for obj in objects))
+
+
 class TestEventDetailedSerializer(RemoTestCase):
 
     def setUp(self):
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+
+from mock import patch
+from nose.tools import eq_, ok_
+
+from remo.base.tests import RemoTestCase
+from remo.events.ical import get_vevent_key, render_vevents, stream_ical
+from remo.events.models import Event
+from remo.events.tests import EventFactory
+from remo.reports import ACTIVITY_EVENT_CREATE
+from remo.reports.tests import ActivityFactory
+
+
+class RenderVeventsTest(RemoTestCase):
+
+    def setUp(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+
+    def test_cached(self):
+        event = EventFactory.create(name='Test event')
+        vevent = render_vevents([event])[0]
+        ok_(vevent.startswith('BEGIN:VEVENT'))
+        ok_('SUMMARY:Test event' in vevent)
+        eq_(cache.get(get_vevent_key(event)), vevent)
+
+        with patch('remo.events.ical.get_template') as get_template_mock:
+            eq_(render_vevents([event]), [vevent])
+        ok_(get_template_mock.return_value.render.called is False)
+
+    def test_edited_event(self):
+        event = EventFactory.create(name='Test event')
+        render_vevents([event])
+        event.name = 'Edited event'
+        event.save()
+        ok_('SUMMARY:Edited event' in render_vevents([event])[0])
+
+    def test_stream(self):
+        EventFactory.create_batch(3)
+        with self.assertNumQueries(2):
+            content = ''.join(stream_ical(Event.objects.all(), chunk_size=2))
+        ok_(content.startswith('BEGIN:VCALENDAR'))
+        ok_(content.strip().endswith('END:VCALENDAR'))
+        eq_(content.count('BEGIN:VEVENT'), 3)
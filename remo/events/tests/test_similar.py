@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.utils.timezone import now
+from mock import patch
+from nose.tools import eq_
+
+from remo.base.tests import RemoTestCase
+from remo.events.models import Event, SimilarEvent
+from remo.events.similar import expire_similar_events, refresh_recent_similar_events
+from remo.events.tests import EventFactory
+from remo.profiles.tests import FunctionalAreaFactory
+from remo.reports import ACTIVITY_EVENT_CREATE
+from remo.reports.tests import ActivityFactory
+
+
+class SimilarEventsTest(RemoTestCase):
+    """Tests related to the similar events of an event."""
+
+    def setUp(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+        self.area = FunctionalAreaFactory.create()
+        self.event = self.create_event('Greece', 38, 23, [self.area])
+
+    def create_event(self, country, lat, lon, categories, days=10):
+        start = now() + timedelta(days=days)
+        return EventFactory.create(country=country, lat=lat, lon=lon, categories=categories,
+                                   start=start, end=start + timedelta(days=1))
+
+    def test_score_order(self):
+        category = self.create_event('Chile', -33, -70, [self.area])
+        far_country = self.create_event('Greece', 41, 26, [FunctionalAreaFactory.create()])
+        near_country = self.create_event('Greece', 38, 23, [FunctionalAreaFactory.create()])
+        both = self.create_event('Greece', 40, 22, [self.area])
+        self.create_event('Chile', 38, 23, [FunctionalAreaFactory.create()])
+
+        eq_(list(self.event.get_similar_events()), [both, near_country, far_country])
+        eq_(list(SimilarEvent.objects.filter(event=self.event)
+                 .values_list('similar', flat=True)),
+            [both.id, near_country.id, far_country.id, category.id])
+
+    def test_category_change(self):
+        other = self.create_event('Chile', -33, -70, [FunctionalAreaFactory.create()])
+        eq_(list(self.event.get_similar_events()), [])
+
+        other.categories.add(self.area)
+        eq_(list(self.event.get_similar_events()), [other])
+        eq_(list(other.get_similar_events()), [self.event])
+
+        other.categories.remove(self.area)
+        eq_(list(self.event.get_similar_events()), [])
+        eq_(list(other.get_similar_events()), [])
+
+    @patch('remo.events.similar.SIMILAR_EVENTS_STORED', 2)
+    def test_displace_worst_similar_event(self):
+        first = self.create_event('Greece', 38, 23, [FunctionalAreaFactory.create()])
+        self.create_event('Chile', -33, -70, [self.area])
+        self.create_event('Chile', -34, -71, [self.area])
+        eq_(SimilarEvent.objects.filter(event=self.event).count(), 2)
+
+        second = self.create_event('Greece', 41, 26, [FunctionalAreaFactory.create()])
+        eq_(list(SimilarEvent.objects.filter(event=self.event)
+                 .values_list('similar', flat=True)), [first.id, second.id])
+
+    def test_expire_started_events(self):
+        other = self.create_event('Greece', 38, 23, [self.area])
+        replacement = self.create_event('Greece', 41, 26, [FunctionalAreaFactory.create()],
+                                        days=20)
+        Event.objects.filter(pk=other.pk).update(start=now() - timedelta(days=1))
+
+        eq_(expire_similar_events(), 2)
+        eq_(list(SimilarEvent.objects.filter(event=self.event)
+                 .values_list('similar', flat=True)), [replacement.id])
+
+    def test_get_similar_events_query(self):
+        other = self.create_event('Greece', 38, 23, [self.area])
+        with self.assertNumQueries(1):
+            eq_(list(self.event.get_similar_events()), [other])
+
+    def test_refresh_recent_similar_events(self):
+        other = self.create_event('Greece', 38, 23, [self.area])
+        past = self.create_event('Greece', 38, 23, [self.area], days=-60)
+        SimilarEvent.objects.all().delete()
+
+        eq_(refresh_recent_similar_events(), 2)
+        eq_(list(self.event.get_similar_events()), [other])
+        eq_(list(other.get_similar_events()), [self.event])
+        eq_(list(past.get_similar_events()), [])
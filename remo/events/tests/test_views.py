@@ -317,8 +317,13 @@ class ViewsTest(RemoTestCase):
         event = EventFactory.create()
         response = self.client.get(reverse('events_icalendar_event',
                                            kwargs={'slug': event.slug}))
-        self.assertJinja2TemplateUsed(response, 'multi_event_ical_template.jinja')
+        self.assertJinja2TemplateUsed(response, 'ical_vevent.jinja')
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
+        ok_(response.content.startswith('BEGIN:VCALENDAR'))
+
+    def count_vevents(self, response):
+        content = ''.join(response.streaming_content)
+        return content.count('BEGIN:VEVENT')
 
     def test_multi_event_ical_export(self):
         """Test multiple event ical export."""
@@ -327,10 +332,9 @@ class ViewsTest(RemoTestCase):
         # Export all events to iCal
         period = 'all'
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': period}),
-                                   follow=True)
+                                           kwargs={'period': period}))
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
-        eq_(len(response.context['events']), 2)
+        eq_(self.count_vevents(response), 2)
 
     def test_multi_event_ical_export_past(self):
         """Test multiple past event ical export."""
@@ -339,10 +343,9 @@ class ViewsTest(RemoTestCase):
         # Export past events to iCal
         period = 'past'
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': period}),
-                                   follow=True)
+                                           kwargs={'period': period}))
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
-        eq_(len(response.context['events']), 2)
+        eq_(self.count_vevents(response), 2)
 
     def test_multi_event_ical_export_future(self):
         """Test multiple past event ical export."""
@@ -353,10 +356,9 @@ class ViewsTest(RemoTestCase):
         # Export future events to iCal
         period = 'future'
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': period}),
-                                   follow=True)
+                                           kwargs={'period': period}))
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
-        eq_(len(response.context['events']), 2)
+        eq_(self.count_vevents(response), 2)
 
     def test_multi_event_ical_export_custom(self):
         """Test multiple event ical export with custom date."""
@@ -365,8 +367,7 @@ class ViewsTest(RemoTestCase):
         EventFactory.create_batch(2, start=event_start, end=event_end)
         period = 'custom'
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': period}),
-                                   follow=True)
+                                           kwargs={'period': period}))
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
 
         start = (event_start - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
@@ -374,11 +375,17 @@ class ViewsTest(RemoTestCase):
 
         query = 'custom/start/%s/end/%s' % (start, end)
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': query}),
-                                   follow=True)
+                                           kwargs={'period': query}))
 
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
-        eq_(len(response.context['events']), 2)
+        eq_(self.count_vevents(response), 2)
+
+    def test_multi_event_ical_export_invalid_date(self):
+        """Test multiple event ical export with an invalid date."""
+        query = 'custom/start/2020-13-45/end/2020-01-01'
+        response = self.client.get(reverse('multiple_event_ical',
+                                           kwargs={'period': query}))
+        eq_(response.status_code, 404)
 
     def test_multi_event_ical_export_search(self):
         """Test multiple past event ical export."""
@@ -389,10 +396,9 @@ class ViewsTest(RemoTestCase):
         term = 'Test event'
         search = 'custom/search/%s' % term
         response = self.client.get(reverse('multiple_event_ical',
-                                           kwargs={'period': search}),
-                                   follow=True)
+                                           kwargs={'period': search}))
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
-        eq_(len(response.context['events']), 1)
+        eq_(self.count_vevents(response), 1)
 
     def test_multi_event_ical_export_extra_chars(self):
         """Test multi event ical export with extra chars.
@@ -401,9 +407,29 @@ class ViewsTest(RemoTestCase):
         """
 
         url = '/events/period/future/search/méxico.!@$%&*()/ical/'
-        response = self.client.get(url, follow=True)
+        response = self.client.get(url)
         self.failUnless(response['Content-Type'].startswith('text/calendar'))
 
+    def test_multi_event_ical_export_invalid_period(self):
+        response = self.client.get(reverse('multiple_event_ical', kwargs={'period': 'invalid'}))
+        eq_(response.status_code, 404)
+
+    def test_multi_event_ical_export_not_modified(self):
+        event = EventFactory.create()
+        url = reverse('multiple_event_ical', kwargs={'period': 'all'})
+        response = self.client.get(url)
+        etag = response['ETag']
+        ok_(response['Last-Modified'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 304)
+
+        event.name = 'Edited event'
+        event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 200)
+        ok_('SUMMARY:Edited event' in ''.join(response.streaming_content))
+
     @mock.patch('django.contrib.messages.success')
     def test_post_create_event_rep(self, mock_success):
         """Test create new event with rep permissions."""
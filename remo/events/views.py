@@ -6,7 +6,7 @@ from django.contrib import messages
 from django.contrib.auth import get_user
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.utils.functional import curry
@@ -14,6 +14,7 @@ from django.utils.encoding import iri_to_uri
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now
 from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition
 
 from django_statsd.clients import statsd
 
@@ -21,7 +22,9 @@ import forms
 from remo.base.decorators import permission_check
 from remo.base.templatetags.helpers import urlparams
 from remo.base.forms import EmailUsersForm
-from remo.base.utils import get_or_create_instance
+from remo.base.utils import get_or_create_instance, user_in_groups
+from remo.events.ical import (get_feed_etag, get_feed_version, get_ical_events, render_ical,
+                              stream_ical)
 from remo.events.models import Attendance, Event, EventComment
 from remo.profiles.models import FunctionalArea
 from remo.reports.models import Campaign
@@ -126,7 +129,7 @@ def view_event(request, slug):
 
     return render(request, 'view_event.jinja',
                   {'event': event, 'email_attendees_form': email_att_form,
-                   'similar_events': event.get_similar_events(),
+                   'similar_events': list(event.get_similar_events()),
                    'comments': event.eventcomment_set.all(),
                    'event_comment_form': event_comment_form,
                    'event_comment_form_url': event_url})
@@ -176,7 +179,7 @@ def edit_event(request, slug=None, clone=None):
             extra_formsets = 0
 
     editable = False
-    if request.user.groups.filter(name='Admin').count():
+    if user_in_groups(request.user, 'Admin'):
         editable = True
 
     # Compatibility code for old metrics
@@ -258,11 +261,7 @@ def delete_event(request, slug):
 def export_single_event_to_ical(request, slug):
     """ICal export of single event."""
     event = get_object_or_404(Event, slug=slug)
-    ical = render(request, 'multi_event_ical_template.jinja',
-                  {'events': [event],
-                   'date_now': now(),
-                   'host': settings.SITE_URL})
-    response = HttpResponse(ical, content_type='text/calendar')
+    response = HttpResponse(render_ical([event]), content_type='text/calendar')
     ical_filename = event.slug + '.ics'
     response['Filename'] = ical_filename
     response['Content-Disposition'] = ('attachment; filename="%s"' % (ical_filename))
@@ -286,27 +285,34 @@ def email_attendees(request, slug):
     return redirect('events_view_event', slug=slug)
 
 
+def get_ical_feed_version(request, period, start=None, end=None, search=None):
+    """Return the version of the iCal feed, computed once per request."""
+    if not hasattr(request, '_ical_feed_version'):
+        events = get_ical_events(period, start, end, search)
+        if events is None:
+            raise Http404
+        request._ical_feed_version = get_feed_version(events)
+    return request._ical_feed_version
+
+
+def ical_feed_etag(request, *args, **kwargs):
+    return get_feed_etag(get_ical_feed_version(request, *args, **kwargs))
+
+
+def ical_feed_last_modified(request, *args, **kwargs):
+    return get_ical_feed_version(request, *args, **kwargs)['updated_on']
+
+
+@cache_control(max_age=1800, s_maxage=1800)
+@condition(etag_func=ical_feed_etag, last_modified_func=ical_feed_last_modified)
 def multiple_event_ical(request, period, start=None, end=None, search=None):
-    """Redirect iCal URL to API query."""
-
-    # Create API query
-    url = reverse('api_dispatch_list', kwargs={'api_name': 'v1', 'resource_name': 'event'})
-    if period == 'all':
-        url = urlparams(url, start__gt='1970-01-01')
-    elif period == 'future':
-        url = urlparams(url, start__gte=now().strftime("%Y-%m-%d"))
-    elif period == 'past':
-        url = urlparams(url, start__lt=now().strftime("%Y-%m-%d"))
-    elif period == 'custom':
-        if start:
-            url = urlparams(url, start__gte=start)
-        if end:
-            url = urlparams(url, end__lte=end)
-    else:
+    """Stream the iCal export of the events of /period/."""
+    events = get_ical_events(period, start, end, search)
+    if events is None:
         raise Http404
 
-    if search:
-        url = urlparams(url, query=search)
-
+    response = StreamingHttpResponse(stream_ical(events), content_type='text/calendar')
+    filename = now().date().strftime('ical-export-%Y-%m-%d.ics')
+    response['Content-Disposition'] = 'filename="%s"' % filename
     statsd.incr('events.export_multiple_ical')
-    return redirect(urlparams(url, format='ical', offset=0, limit=0))
+    return response
@@ -1,8 +1,8 @@
 from django.contrib import admin
 
 from import_export import fields, resources
-from import_export.admin import ExportMixin
 
+from remo.base.admin import StreamingExportMixin
 from remo.featuredrep.models import FeaturedRep
 
 
@@ -16,7 +16,7 @@ class FeaturedRepResource(resources.ModelResource):
         return featuredrep.users.all()
 
 
-class FeaturedRepAdmin(ExportMixin, admin.ModelAdmin):
+class FeaturedRepAdmin(StreamingExportMixin, admin.ModelAdmin):
     resource_class = FeaturedRepResource
     model = FeaturedRep
     list_display = ('featured_rep_users', 'created_on')
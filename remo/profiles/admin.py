@@ -9,9 +9,9 @@ from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
 
 from import_export import fields, resources
-from import_export.admin import ExportMixin
 from functools import update_wrapper
 
+from remo.base.admin import StreamingExportMixin
 from remo.profiles.models import (FunctionalArea, UserAvatar, UserProfile,
                                   UserStatus)
 from remo.profiles.tasks import check_celery
@@ -193,7 +193,7 @@ class UserProfileInline(admin.StackedInline):
     fk_name = 'user'
 
 
-class UserAdmin(ExportMixin, UserAdmin):
+class UserAdmin(StreamingExportMixin, UserAdmin):
     """User Admin."""
     resource_class = UserResource
     inlines = [UserProfileInline]
@@ -254,7 +254,7 @@ class UserAvatarResource(resources.ModelResource):
         return useravatar.user.get_full_name()
 
 
-class UserAvatarAdmin(ExportMixin, admin.ModelAdmin):
+class UserAvatarAdmin(StreamingExportMixin, admin.ModelAdmin):
     """UserAvatar Admin."""
     resource_class = UserAvatarResource
     list_display = ('display_name', 'avatar_url', 'last_update')
@@ -263,7 +263,7 @@ class UserAvatarAdmin(ExportMixin, admin.ModelAdmin):
         return obj.user.userprofile.display_name
 
 
-class FunctionalAreaAdmin(ExportMixin, admin.ModelAdmin):
+class FunctionalAreaAdmin(StreamingExportMixin, admin.ModelAdmin):
     """FunctionalArea Admin."""
     list_display = ('name', 'registered_reps', 'registered_mozillians',
                     'registered_events', 'active')
@@ -312,7 +312,7 @@ class UserStatusResource(resources.ModelResource):
         return None
 
 
-class UserStatusAdmin(ExportMixin, admin.ModelAdmin):
+class UserStatusAdmin(StreamingExportMixin, admin.ModelAdmin):
     """User Status Admin."""
     resource_class = UserStatusResource
     model = UserStatus
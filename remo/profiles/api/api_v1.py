@@ -1,25 +1,24 @@
-from datetime import timedelta
 from urllib import unquote
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
-from django.db.models import Q
-from django.http import QueryDict
+from django.http import QueryDict, StreamingHttpResponse
 from django.utils.timezone import now
 
 from tastypie import fields
 from tastypie.authentication import Authentication
 from tastypie.authorization import ReadOnlyAuthorization
 from tastypie.constants import ALL, ALL_WITH_RELATIONS
+from tastypie.exceptions import ImmediateHttpResponse
 from tastypie.resources import ModelResource
 
-from remo.api import HttpCache, RemoAPIThrottle, RemoThrottleMixin
+from remo.api import EagerLoadingMixin, HttpCache, RemoAPIThrottle, RemoThrottleMixin
 from remo.base.serializers import CSVSerializer
+from remo.base.utils import iterate_in_chunks, user_in_groups
 from remo.profiles.templatetags.helpers import get_avatar_url
 from remo.profiles.models import UserProfile, FunctionalArea, MobilisingInterest, MobilisingSkill
-from remo.reports.models import NGReport
-from remo.reports.utils import get_last_report
+from remo.search.index import search
 
 
 class FunctionalAreasResource(RemoThrottleMixin, ModelResource):
@@ -70,7 +69,7 @@ class MobilisingInterestsResource(RemoThrottleMixin, ModelResource):
         throttle = RemoAPIThrottle()
 
 
-class ProfileResource(RemoThrottleMixin, ModelResource):
+class ProfileResource(EagerLoadingMixin, RemoThrottleMixin, ModelResource):
     """Profile Resource."""
     profile_url = fields.CharField()
     avatar_url = fields.CharField()
@@ -87,7 +86,7 @@ class ProfileResource(RemoThrottleMixin, ModelResource):
                                               full=True, null=True)
     mentor = fields.ToOneField('remo.profiles.api.api_v1.RepResource',
                                attribute='mentor', null=True)
-    last_report_date = fields.DateField()
+    last_report_date = fields.DateField(attribute='last_report_date', null=True)
 
     class Meta:
         queryset = UserProfile.objects.filter(registration_complete=True)
@@ -113,6 +112,9 @@ class ProfileResource(RemoThrottleMixin, ModelResource):
                      'mobilising_interests': ALL_WITH_RELATIONS}
         max_limit = 40
         throttle = RemoAPIThrottle()
+        select_related = ['user__useravatar', 'mentor']
+        prefetch_related = ['functional_areas', 'mobilising_skills', 'mobilising_interests',
+                            'user__groups']
 
     def dehydrate(self, bundle):
         """Prepare bundle.data for CSV export."""
@@ -138,27 +140,14 @@ class ProfileResource(RemoThrottleMixin, ModelResource):
 
     def dehydrate_is_mentor(self, bundle):
         """Calculate and return if user is mentor."""
-        return bundle.obj.user.groups.filter(name='Mentor').count() == 1
+        return user_in_groups(bundle.obj.user, 'Mentor')
 
     def dehydrate_is_council(self, bundle):
         """Calculate and return if user is counselor."""
-        return bundle.obj.user.groups.filter(name='Council').count() == 1
-
-    def dehydrate_last_report_date(self, bundle):
-        start_period = now().date() - timedelta(weeks=4)
-        end_period = now().date() + timedelta(weeks=4)
-        reports = bundle.obj.user.ng_reports.filter(
-            report_date__range=(start_period, end_period))
-        try:
-            return reports.latest('report_date').report_date
-        except NGReport.DoesNotExist:
-            report = get_last_report(bundle.obj.user)
-            if report:
-                return report.report_date
-            return None
-
-
-class RepResource(RemoThrottleMixin, ModelResource):
+        return user_in_groups(bundle.obj.user, 'Council')
+
+
+class RepResource(EagerLoadingMixin, RemoThrottleMixin, ModelResource):
     """Rep Resource."""
     fullname = fields.CharField(attribute='get_full_name')
     profile = fields.ToOneField(ProfileResource, attribute='userprofile',
@@ -179,13 +168,16 @@ class RepResource(RemoThrottleMixin, ModelResource):
                      'last_name': ALL,
                      'profile': ALL_WITH_RELATIONS}
         throttle = RemoAPIThrottle()
+        # The profile of each rep is dehydrated in full.
+        select_related = ['userprofile__mentor', 'useravatar']
+        prefetch_related = ['userprofile__functional_areas', 'userprofile__mobilising_skills',
+                            'userprofile__mobilising_interests', 'groups']
 
     def apply_filters(self, request, applicable_filters):
         """Add special 'query' parameter to filter Reps.
 
-        When 'query' parameter is present, Rep list is filtered by last
-        name, first name, display name and local name with a case
-        insensitive matching method.
+        When 'query' parameter is present, Rep list is filtered by the
+        search index on names, emails, location and functional areas.
 
         The 'query' parameters exists in parallel with 'filter'
         parameters as defined by tastypie and RepResource schema.
@@ -197,26 +189,9 @@ class RepResource(RemoThrottleMixin, ModelResource):
         query = request.GET.get('query', None)
         if query:
             query = unquote(query)
-            # We need to split query to match full names
-            qset = Q()
-            for term in query.split():
-                for key in ('first_name__istartswith',
-                            'last_name__istartswith'):
-                    qset |= Q(**{key: term})
-            qset |= (Q(userprofile__display_name__istartswith=query)
-                     | Q(userprofile__local_name__istartswith=query)
-                     | Q(userprofile__irc_name__istartswith=query)
-                     | Q(email__istartswith=query)
-                     | Q(userprofile__private_email__istartswith=query)
-                     | Q(userprofile__country__istartswith=query)
-                     | Q(userprofile__region__istartswith=query)
-                     | Q(userprofile__city__istartswith=query)
-                     | Q(userprofile__mozillians_profile_url__icontains=query)
-                     | Q(userprofile__functional_areas__name__istartswith=query)
-                     | Q(userprofile__mobilising_skills__name__istartswith=query)
-                     | Q(userprofile__mobilising_interests__name__istartswith=query))
-
-            base_object_list = base_object_list.filter(qset).distinct()
+            # Rank the matching reps unless another order is requested.
+            base_object_list = search(base_object_list, query,
+                                      ranked='order_by' not in request.GET)
 
         group = request.GET.get('group', None)
         if group:
@@ -261,13 +236,46 @@ class RepResource(RemoThrottleMixin, ModelResource):
 
         return super(RepResource, self).apply_sorting(obj_list, options)
 
+    def get_list(self, request, **kwargs):
+        """Stream the CSV exports.
+
+        The Reps are fetched and written in chunks, so that exports of
+        all the Reps ('limit=0') run in constant memory and are not
+        capped by max_limit.
+        """
+        if self.determine_format(request) != 'text/csv':
+            return super(RepResource, self).get_list(request, **kwargs)
+
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        sorted_objects = self.apply_sorting(objects, options=request.GET)
+        paginator = self._meta.paginator_class(request.GET, sorted_objects,
+                                               limit=self._meta.limit, max_limit=None)
+        offset = paginator.get_offset()
+        limit = paginator.get_limit()
+        objects = iterate_in_chunks(sorted_objects, start=offset,
+                                    stop=offset + limit if limit else None)
+
+        bundles = (self.full_dehydrate(self.build_bundle(obj=obj, request=request), for_list=True)
+                   for obj in objects)
+        response = StreamingHttpResponse(self._meta.serializer.stream_csv(bundles),
+                                         content_type='text/csv')
+        # Tastypie replaces the responses that are not HttpResponses.
+        self.log_throttled_access(request)
+        raise ImmediateHttpResponse(response=self.add_csv_filename(response))
+
+    def add_csv_filename(self, response):
+        """Add HTTP header to specify the filename of CSV exports."""
+        today = now().date()
+        filename = today.strftime('reps-export-%Y-%m-%d.csv')
+        response['Content-Disposition'] = 'filename="%s"' % filename
+        return response
+
     def create_response(self, request, data, **response_kwargs):
         """Add HTTP header to specify the filename of CSV exports."""
         response = super(RepResource, self).create_response(request, data, **response_kwargs)
 
         if self.determine_format(request) == 'text/csv':
-            today = now().date()
-            filename = today.strftime('reps-export-%Y-%m-%d.csv')
-            response['Content-Disposition'] = 'filename="%s"' % filename
+            self.add_csv_filename(response)
 
         return response
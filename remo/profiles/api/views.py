@@ -1,7 +1,7 @@
-from collections import namedtuple
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
 
-from django.db.models import Count, Q
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
@@ -13,12 +13,14 @@ from rest_framework.response import Response
 from remo.profiles.api.serializers import (PeopleKPISerializer,
                                            UserProfileDetailedSerializer,
                                            UserSerializer)
+from remo.api.kpi import KPI_WEEKS, get_kpi_data, get_kpi_response, get_week_start
+from remo.api.models import KPIRollup
+from remo.api.rollups import get_daily_counts
 from remo.api.views import BaseReadOnlyModelViewset
-from remo.base.utils import get_quarter
 from remo.profiles.models import UserProfile
+from remo.reports.models import NGReport
 
 
-KPI_WEEKS = 12
 # Number of activities
 CORE = 4
 ACTIVE = 1
@@ -95,6 +97,41 @@ class PeopleKPIFilter(django_filters.FilterSet):
         fields = ['country', 'category', 'initiative']
 
 
+def count_reports(dates, start, end):
+    """Count the sorted report /dates/ within [start, end]."""
+    return bisect_right(dates, end) - bisect_left(dates, start)
+
+
+def get_contribution_levels(report_dates, num_people, date):
+    """Count the core, active, casual and inactive contributors around
+    /date/.
+
+    /report_dates/ is a dict with the sorted report dates per user.
+
+    Activity metrics:
+    Inactive: No activity within 8 weeks (4 past, 4 future)
+    Casual: 1 activity within 8 weeks (4 past, 4 future)
+    Active: 1 activity within 4 weeks (2 past, 2 future)
+    Core: 4 activities within 4 weeks (2 past, 2 future)
+    """
+    levels = {'core': 0, 'active': 0, 'casual': 0, 'inactive': 0}
+    active_core_range = [date - timedelta(weeks=ACTIVE_CORE), date + timedelta(weeks=ACTIVE_CORE)]
+    casual_range = [date - timedelta(weeks=CASUAL_INACTIVE),
+                    date + timedelta(weeks=CASUAL_INACTIVE)]
+
+    for dates in report_dates.values():
+        num_reports = count_reports(dates, *active_core_range)
+        if num_reports >= CORE:
+            levels['core'] += 1
+        elif num_reports >= ACTIVE:
+            levels['active'] += 1
+        elif count_reports(dates, *casual_range) >= CASUAL:
+            levels['casual'] += 1
+
+    levels['inactive'] = num_people - levels['core'] - levels['active'] - levels['casual']
+    return levels
+
+
 class PeopleKPIView(APIView):
 
     def get(self, request):
@@ -104,153 +141,44 @@ class PeopleKPIView(APIView):
                                        userprofile__registration_complete=True)
         people = PeopleKPIFilter(request.query_params, queryset=queryset)
         weeks = int(request.query_params.get('weeks', KPI_WEEKS))
-
-        # Total number of Reps
-        total = people.count()
-
-        # Total Reps added in the last quarter
-        joined_date = get_quarter()[1]
-        quarter_total = people.qs.filter(
-            userprofile__date_joined_program__gte=joined_date).count()
-
-        # Current quarter start
-        current_quarter_start = get_quarter()[1]
-
-        # Total Reps joined the previous quarter
-        previous_quarter_end = current_quarter_start - timedelta(days=1)
-        previous_quarter_start = get_quarter(previous_quarter_end)[1]
-        total_reps_range = [previous_quarter_start, previous_quarter_end]
-        previous_quarter_total = people.qs.filter(
-            userprofile__date_joined_program__range=total_reps_range).count()
-
-        diff = quarter_total - previous_quarter_total
-        try:
-            # Percentage change of events compared with previous week
-            quarter_ratio = diff / float(previous_quarter_total) * 100
-        except ZeroDivisionError:
-            if diff > 0:
-                quarter_ratio = 100
-            else:
-                quarter_ratio = 0
-
-        # Total Reps added this week
-        today = datetime.combine(now().date(), datetime.min.time())
-        current_week_start = today - timedelta(days=now().weekday())
-        prev_week_start = current_week_start - timedelta(weeks=1)
-
-        week_total = people.qs.filter(
-            userprofile__date_joined_program__gte=current_week_start).count()
-
-        # Total Reps added the previous week
-        query_range = [prev_week_start, current_week_start]
-        prev_week_total = people.qs.filter(
-            userprofile__date_joined_program__range=query_range).count()
-
-        diff = week_total - prev_week_total
-        try:
-            # Percentage change of events compared with previous week
-            week_ratio = diff / float(prev_week_total) * 100
-        except ZeroDivisionError:
-            if diff > 0:
-                week_ratio = 100
-            else:
-                week_ratio = 0
-
-        weekly_count = []
-        for i in range(weeks):
-            start = current_week_start - timedelta(weeks=i)
-            end = start + timedelta(weeks=1)
-
-            # Total number of reps (per week) for the past 6 weeks
-            count = people.qs.filter(
-                userprofile__date_joined_program__range=[start, end]).count()
-            weekly_count.append({'week': weeks - i, 'people': count})
-
-        # Get the number of reports for each user.
-
-        # Activity metrics:
-        # Inactive: No activity within 8 weeks (4 past, 4 future)
-        # Casual: 1 activity within 8 weeks (4 past, 4 future)
-        # Active: 1 activity within 4 weeks (2 past, 2 future)
-        # Core: 4 activities within 4 weeks (2 past, 2 future)
-        def get_activity_query(query, start_date=None, offset=0, invert=False):
-            if not start_date:
-                start_date = today
-            date_range = [start_date - timedelta(weeks=offset),
-                          start_date + timedelta(weeks=offset)]
-            q_args = Q(ng_reports__report_date__range=date_range)
-            if invert:
-                q_args = ~q_args
-            return (query.filter(q_args).distinct()
-                    .annotate(num_reports=Count('ng_reports')))
-
-        core_active_query = get_activity_query(people.qs, offset=ACTIVE_CORE)
-        # Active contributors - 8 weeks
-        active_contributors = core_active_query.filter(num_reports__gte=ACTIVE,
-                                                       num_reports__lt=CORE)
-        num_active = active_contributors.count()
-        # Core contributors - 8 weeks
-        num_core = core_active_query.filter(num_reports__gte=CORE).count()
-
-        # Inactive contributors - 16 weeks
-        num_inactive = get_activity_query(people.qs,
-                                          offset=CASUAL_INACTIVE,
-                                          invert=True).count()
-        # Casual contributors
-        active_ids = core_active_query.values_list('id', flat=True)
-        num_casual = (get_activity_query(people.qs,
-                                         offset=CASUAL_INACTIVE)
-                      .exclude(id__in=active_ids).count())
+        today = now().date()
+
+        joined_counts = get_daily_counts(KPIRollup.PEOPLE,
+                                         country=request.query_params.get('country'),
+                                         category=request.query_params.get('category'),
+                                         initiative=request.query_params.get('initiative'))
+        data = get_kpi_data(joined_counts, today, weeks, name='people')
+
+        # Fetch the report dates of all the weeks at once and classify
+        # the contributors of each week in memory.
+        current_week_start = get_week_start(today)
+        first_week_start = current_week_start - timedelta(weeks=weeks - 1)
+        date_range = [first_week_start - timedelta(weeks=CASUAL_INACTIVE),
+                      today + timedelta(weeks=CASUAL_INACTIVE)]
+        num_people = people.qs.distinct().count()
+        reports = (NGReport.objects.filter(user__in=people.qs, report_date__range=date_range)
+                   .values_list('user', 'report_date'))
+        report_dates = defaultdict(list)
+        for user_id, report_date in reports:
+            report_dates[user_id].append(report_date)
+        for dates in report_dates.values():
+            dates.sort()
+
+        levels = get_contribution_levels(report_dates, num_people, today)
 
         weekly_contribution = []
         for i in range(weeks):
             start = current_week_start - timedelta(weeks=i)
+            weekly_levels = get_contribution_levels(report_dates, num_people, start)
+            weekly_levels['week'] = weeks - i
+            weekly_contribution.append(weekly_levels)
 
-            # Conversion points per week
-            core_active_query = get_activity_query(people.qs,
-                                                   start_date=start,
-                                                   offset=ACTIVE_CORE)
-            # Active contributors
-            active_contributors = core_active_query.filter(
-                num_reports__gte=ACTIVE, num_reports__lt=CORE)
-            active_weekly = active_contributors.count()
-            # Core contributors
-            core_weekly = core_active_query.filter(
-                num_reports__gte=CORE).count()
-
-            # Inactive contributors
-            inactive_weekly = get_activity_query(people.qs,
-                                                 start_date=start,
-                                                 offset=CASUAL_INACTIVE,
-                                                 invert=True).count()
-            # Casual contributors
-            active_ids = core_active_query.values_list('id', flat=True)
-            casual_weekly = (get_activity_query(people.qs,
-                                                start_date=start,
-                                                offset=CASUAL_INACTIVE)
-                             .exclude(id__in=active_ids).count())
-
-            weekly_contribution.append({'week': weeks - i,
-                                        'core': core_weekly,
-                                        'active': active_weekly,
-                                        'casual': casual_weekly,
-                                        'inactive': inactive_weekly
-                                        })
-
-        kwargs = {
-            'total': total,
-            'quarter_total': quarter_total,
-            'quarter_growth_percentage': quarter_ratio,
-            'week_total': week_total,
-            'week_growth_percentage': week_ratio,
+        data.update({
             'total_per_week': weekly_contribution,
-            'inactive_week': num_inactive,
-            'casual_week': num_casual,
-            'active_week': num_active,
-            'core_week': num_core
-        }
-
-        kpi = namedtuple('PeopleKPI', kwargs.keys())(*kwargs.values())
-        serializer = PeopleKPISerializer(kpi)
+            'inactive_week': levels['inactive'],
+            'casual_week': levels['casual'],
+            'active_week': levels['active'],
+            'core_week': levels['core']
+        })
 
-        return Response(serializer.data)
+        return get_kpi_response(data, PeopleKPISerializer, name='PeopleKPI')
@@ -0,0 +1,119 @@
+"""Avatars of the users.
+
+The libravatar URL of each user is stored in UserAvatar and in the
+cache. Resolving the avatars of a list of users costs at most one
+query and never writes. Users without a stored avatar get the URL of
+the default libravatar server, computed without the DNS lookup of a
+federated server. The refresh_avatars task resolves the missing and
+the stale avatars in the background.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from libravatar import compose_avatar_url, lookup_avatar_server, parse_user_identity
+
+from remo.base.utils import bulk_update
+from remo.profiles.models import UserAvatar
+
+
+AVATAR_CACHE_KEY = 'profiles:avatar:{0}'
+AVATAR_CACHE_TIMEOUT = 60 * 60 * 24
+AVATAR_MAX_AGE = timedelta(days=7)
+AVATAR_CHUNK_SIZE = 200
+
+_missing = object()
+
+
+def get_default_avatar_url(email):
+    """Return the avatar URL of /email/ on the default libravatar server."""
+    avatar_hash = parse_user_identity(email, None)[0]
+    return compose_avatar_url(None, avatar_hash, '', https=True)
+
+
+def prefetch_avatar_urls(users):
+    """Set the avatar URL of each of /users/ as user._avatar_url.
+
+    The UserAvatar loaded along with a user by select_related() is used
+    first, then the cache and finally the stored UserAvatar.
+    """
+    cache_name = User.useravatar.cache_name
+    pending = {}
+    for user in users:
+        user_avatar = getattr(user, cache_name, _missing)
+        if user_avatar is _missing:
+            pending[user.pk] = user
+        elif user_avatar:
+            user._avatar_url = user_avatar.avatar_url or get_default_avatar_url(user.email)
+        else:
+            user._avatar_url = get_default_avatar_url(user.email)
+    if not pending:
+        return
+
+    keys = dict((AVATAR_CACHE_KEY.format(user_id), user_id) for user_id in pending)
+    urls = dict((keys[key], url) for key, url in cache.get_many(keys.keys()).items())
+    missing = [user_id for user_id in pending if user_id not in urls]
+    if missing:
+        stored = dict(UserAvatar.objects.filter(user__in=missing)
+                      .values_list('user', 'avatar_url'))
+        for user_id in missing:
+            urls[user_id] = stored.get(user_id) or get_default_avatar_url(pending[user_id].email)
+        cache.set_many(dict((AVATAR_CACHE_KEY.format(user_id), urls[user_id])
+                            for user_id in missing), AVATAR_CACHE_TIMEOUT)
+
+    for user_id, user in pending.items():
+        user._avatar_url = urls[user_id]
+
+
+def resolve_avatar_url(email, servers):
+    """Return the libravatar URL of /email/.
+
+    /servers/ maps each domain to its delegated avatar server, so that
+    every domain is looked up once.
+    """
+    avatar_hash, domain = parse_user_identity(email, None)
+    if domain and domain not in servers:
+        servers[domain] = lookup_avatar_server(domain, True)
+    return compose_avatar_url(servers.get(domain), avatar_hash, '', https=True)
+
+
+def refresh_stale_avatars(stale_before=None):
+    """Resolve the avatars of the users missing one and the stale ones.
+
+    Avatars updated before /stale_before/, by default AVATAR_MAX_AGE
+    ago, are stale. Return the number of stored avatars.
+    """
+    now = timezone.now()
+    stale_before = stale_before or now - AVATAR_MAX_AGE
+    servers = {}
+    count = 0
+
+    users = User.objects.filter(useravatar__isnull=True).only('id', 'email')
+    avatars = [UserAvatar(user=user, avatar_url=resolve_avatar_url(user.email, servers))
+               for user in users]
+    UserAvatar.objects.bulk_create(avatars, batch_size=AVATAR_CHUNK_SIZE)
+    cache.set_many(dict((AVATAR_CACHE_KEY.format(avatar.user_id), avatar.avatar_url)
+                        for avatar in avatars), AVATAR_CACHE_TIMEOUT)
+    count += len(avatars)
+
+    # Updated avatars are no longer stale, so chunk by id instead of offset.
+    stale_ids = list(UserAvatar.objects.filter(last_update__lt=stale_before)
+                     .values_list('id', flat=True))
+    for i in range(0, len(stale_ids), AVATAR_CHUNK_SIZE):
+        avatars = list(UserAvatar.objects.filter(id__in=stale_ids[i:i + AVATAR_CHUNK_SIZE])
+                       .select_related('user'))
+        for avatar in avatars:
+            avatar.avatar_url = resolve_avatar_url(avatar.user.email, servers)
+            avatar.last_update = now
+        count += store_avatars(avatars)
+    return count
+
+
+def store_avatars(avatars):
+    """Save and cache the avatar URLs and update times of /avatars/."""
+    bulk_update(avatars, ['avatar_url', 'last_update'])
+    cache.set_many(dict((AVATAR_CACHE_KEY.format(avatar.user_id), avatar.avatar_url)
+                        for avatar in avatars), AVATAR_CACHE_TIMEOUT)
+    return len(avatars)
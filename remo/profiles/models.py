@@ -237,6 +237,7 @@ class UserProfile(models.Model):
     current_streak_start = models.DateField(null=True, blank=True)
     longest_streak_start = models.DateField(null=True, blank=True)
     longest_streak_end = models.DateField(null=True, blank=True)
+    last_report_date = models.DateField(null=True, blank=True)
     first_report_notification = models.DateField(null=True, blank=True)
     second_report_notification = models.DateField(null=True, blank=True)
     timezone = models.CharField(max_length=100, blank=True, default='')
@@ -492,7 +493,11 @@ def update_mentor_action_items(sender, instance, raw, **kwargs):
             action_items = ActionItem.objects.filter(content_type=action_model,
                                                      name=action_name,
                                                      user=user_profile.mentor)
-            action_items.update(user=instance.mentor)
+            if action_items.update(user=instance.mentor):
+                # Avoid circular dependency
+                from remo.dashboard.sections import bump_section_version
+
+                bump_section_version(ActionItem)
 
 
 @receiver(post_save, sender=User, dispatch_uid='create_profile_signal')
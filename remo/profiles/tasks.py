@@ -3,7 +3,6 @@ from datetime import date
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.models import ContentType
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.timezone import now
@@ -15,12 +14,11 @@ from remo.base.tasks import send_remo_mail
 from remo.base.utils import get_date, number2month
 from remo.celery import app
 from remo.dashboard.models import ActionItem
-from remo.profiles.models import (UserProfile, UserStatus,
-                                  NOMINATION_ACTION_ITEM)
+from remo.profiles.avatars import refresh_stale_avatars
+from remo.profiles.models import UserProfile, UserStatus
 
 
 ROTM_REMINDER_DAY = 1
-NOMINATION_END_DAY = 10
 
 
 @app.task
@@ -116,9 +114,8 @@ def send_rotm_nomination_reminder():
                        email_template=template,
                        recipients_list=[settings.REPS_MENTORS_LIST],
                        data=data)
-        mentors = User.objects.filter(groups__name='Mentor')
-        for mentor in mentors:
-            ActionItem.create(mentor.userprofile)
+        profiles = UserProfile.objects.filter(user__groups__name='Mentor').select_related('user')
+        ActionItem.sync_items(profiles)
 
 
 @app.task
@@ -135,22 +132,6 @@ def set_unavailability_flag():
 
 
 @app.task
-def resolve_nomination_action_items():
-    """Resolve action items.
-
-    Resolve all the action items relevant to nomination reminders after the
-    10th day of each month.
-    """
-
-    today = now().date()
-    if (today.day == NOMINATION_END_DAY
-            or waffle.switch_is_active('enable_rotm_tasks')):
-        mentors = UserProfile.objects.filter(user__groups__name='Mentor')
-        action_model = ContentType.objects.get_for_model(UserProfile)
-        # All the completed action items are always resolved
-        name = u'{0} {1}'.format(NOMINATION_ACTION_ITEM, today.strftime('%B'))
-        items = (ActionItem.objects.filter(content_type=action_model,
-                                           object_id__in=mentors,
-                                           name=name)
-                                   .exclude(completed=True))
-        items.update(resolved=True)
+def refresh_avatars():
+    """Resolve the missing and the stale avatars of the users."""
+    refresh_stale_avatars()
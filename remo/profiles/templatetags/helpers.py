@@ -6,11 +6,10 @@ from django.conf import settings
 from django.utils import timezone
 
 from django_jinja import library
-from libravatar import libravatar_url
 
 from remo.base.templatetags.helpers import urlparams
-from remo.profiles.models import FunctionalArea, UserAvatar
-from remo.reports.utils import get_last_report
+from remo.profiles.avatars import prefetch_avatar_urls
+from remo.profiles.models import FunctionalArea
 
 
 INACTIVE_HIGH = timedelta(weeks=8)
@@ -21,9 +20,11 @@ INACTIVE_LOW = timedelta(weeks=4)
 def get_avatar_url(user, size=50):
     """Get a url pointing to user's avatar.
 
-    The libravatar network is used for avatars. Return cached value if
-    its last update was less than 24 hours before. Optional argument
-    size can be provided to set the avatar size.
+    The libravatar network is used for avatars. Lists of users load
+    their avatars with select_related('useravatar') or resolve them in
+    bulk with prefetch_avatar_urls() before rendering. The URLs are
+    refreshed in the background. Optional argument size can be provided
+    to set the avatar size.
 
     """
     if not user:
@@ -34,14 +35,10 @@ def get_avatar_url(user, size=50):
                               settings.STATIC_URL,
                               'base/img/remo/remo_avatar.png'])
 
-    user_avatar, created = UserAvatar.objects.get_or_create(user=user)
-    now = timezone.now()
+    if not hasattr(user, '_avatar_url'):
+        prefetch_avatar_urls([user])
 
-    if (user_avatar.last_update < now - timedelta(days=7)) or created:
-        user_avatar.avatar_url = libravatar_url(email=user.email, https=True)
-        user_avatar.save()
-
-    avatar_url = urlparams(user_avatar.avatar_url, default=default_img_url)
+    avatar_url = urlparams(user._avatar_url, default=default_img_url)
     if size != -1:
         avatar_url = urlparams(avatar_url, size=size)
 
@@ -60,12 +57,12 @@ def get_functional_area(name):
 @library.filter
 def get_activity_level(user):
     """Return user's inactivity level."""
-    last_report = get_last_report(user)
-    if not last_report:
+    last_report_date = user.userprofile.last_report_date
+    if not last_report_date:
         return ''
 
     today = timezone.now().date()
-    inactivity_period = today - last_report.report_date
+    inactivity_period = today - last_report_date
 
     if inactivity_period > INACTIVE_LOW:
         if inactivity_period > INACTIVE_HIGH:
@@ -76,9 +73,5 @@ def get_activity_level(user):
 
 @library.filter
 def get_last_report_date(user):
-    """Return user's inactivity level."""
-    last_report = get_last_report(user)
-    if not last_report:
-        return ''
-
-    return last_report.report_date
+    """Return the date of user's last report in the past."""
+    return user.userprofile.last_report_date or ''
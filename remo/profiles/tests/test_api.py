@@ -11,6 +11,7 @@ from remo.profiles.api.serializers import (FunctionalAreaSerializer, GroupSerial
                                            UserProfileDetailedSerializer, UserSerializer)
 from remo.profiles.api.views import PeopleKPIView
 from remo.profiles.tests import FunctionalAreaFactory, UserFactory
+from remo.reports.tests import NGReportFactory
 
 
 # Test serialisers
@@ -106,7 +107,7 @@ class TestPeopleKPIView(RemoTestCase):
         response = PeopleKPIView().get(request)
         eq_(response.data['total'], 1)
 
-    @patch('remo.profiles.api.views.get_quarter')
+    @patch('remo.api.kpi.get_quarter')
     def test_quarter(self, mocked_quarter):
         mocked_quarter.return_value = (1, date(2015, 3, 1))
 
@@ -150,3 +151,26 @@ class TestPeopleKPIView(RemoTestCase):
         response = PeopleKPIView().get(request)
         eq_(response.data['week_total'], 1)
         eq_(response.data['week_growth_percentage'], (1 - 2) * 100 / 2.0)
+
+    @patch('remo.profiles.api.views.now')
+    def test_contribution_levels(self, mock_api_now):
+        mock_api_now.return_value = datetime(2015, 3, 1)
+        core, active, casual, inactive = UserFactory.create_batch(4, groups=['Rep'])
+        for day in range(4):
+            NGReportFactory.create(user=core, report_date=date(2015, 2, 25 + day))
+        NGReportFactory.create(user=active, report_date=date(2015, 3, 4))
+        NGReportFactory.create(user=casual, report_date=date(2015, 2, 5))
+        NGReportFactory.create(user=inactive, report_date=date(2014, 1, 5))
+
+        request = self.factory.get(self.url)
+        request.query_params = {'weeks': 52}
+        with self.assertNumQueries(3):
+            response = PeopleKPIView().get(request)
+
+        eq_(response.data['core_week'], 1)
+        eq_(response.data['active_week'], 1)
+        eq_(response.data['casual_week'], 1)
+        eq_(response.data['inactive_week'], 1)
+        eq_(len(response.data['total_per_week']), 52)
+        eq_(response.data['total_per_week'][0],
+            {'week': 52, 'core': 1, 'active': 1, 'casual': 1, 'inactive': 1})
@@ -1,13 +1,18 @@
 import json
 from datetime import datetime
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import mock
-from nose.tools import eq_
+from nose.tools import eq_, ok_
+from tastypie.paginator import Paginator
 
 from remo.base.templatetags.helpers import urlparams
 from remo.base.tests import RemoTestCase
+from remo.profiles.api.api_v1 import RepResource
 from remo.profiles.tests import UserFactory
 
 
@@ -65,3 +70,53 @@ class APITest(RemoTestCase):
         self.assertTrue('Content-Disposition' in response)
         eq_(response['Content-Disposition'],
             'filename="reps-export-2012-03-01.csv"')
+
+    def test_csv_streaming(self):
+        """Test that CSV exports of all the reps are streamed."""
+        UserFactory.create_batch(3, groups=['Rep'])
+        url = reverse('api_dispatch_list', kwargs={'api_name': 'v1', 'resource_name': 'rep'})
+        response = self.client.get(url, data={'format': 'csv', 'limit': 0, 'offset': 1})
+        ok_(response.streaming)
+        lines = ''.join(response.streaming_content).splitlines()
+        eq_(len(lines), 3)
+        ok_(lines[0].startswith('first_name;last_name;profile.avatar_url;'))
+
+    def test_csv_streaming_not_capped(self):
+        """Test that CSV exports of all the reps ignore max_limit."""
+
+        class LowLimitPaginator(Paginator):
+            def __init__(self, *args, **kwargs):
+                kwargs.setdefault('max_limit', 2)
+                super(LowLimitPaginator, self).__init__(*args, **kwargs)
+
+        UserFactory.create_batch(3, groups=['Rep'])
+        url = reverse('api_dispatch_list', kwargs={'api_name': 'v1', 'resource_name': 'rep'})
+        with mock.patch.object(RepResource._meta, 'paginator_class', LowLimitPaginator):
+            response = self.client.get(url, data={'format': 'csv', 'limit': 0})
+        lines = ''.join(response.streaming_content).splitlines()
+        eq_(len(lines), 4)
+
+    def test_constant_queries(self):
+        """Test that the number of queries does not grow with the reps."""
+        mentor = UserFactory.create(groups=['Mentor', 'Rep'])
+        UserFactory.create_batch(2, groups=['Rep'], userprofile__mentor=mentor)
+        url = reverse('api_dispatch_list', kwargs={'api_name': 'v1', 'resource_name': 'rep'})
+        # Warm up the caches.
+        self.client.get(url)
+        # Skip the cached responses.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        eq_(len(json.loads(response.content)['objects']), 3)
+        # Every request resets the query log.
+        num_queries = len(queries)
+
+        UserFactory.create_batch(3, groups=['Rep', 'Council'], userprofile__mentor=mentor)
+        self.client.get(url)
+        cache.clear()
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url)
+        objects = json.loads(response.content)['objects']
+        eq_(len(objects), 6)
+        ok_(any(obj['profile']['is_mentor'] for obj in objects))
+        ok_(any(obj['profile']['is_council'] for obj in objects))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from mock import patch
+from nose.tools import eq_, ok_
+
+from remo.base.tests import RemoTestCase
+from remo.profiles.avatars import (AVATAR_CACHE_KEY, get_default_avatar_url,
+                                   prefetch_avatar_urls, refresh_stale_avatars)
+from remo.profiles.models import UserAvatar
+from remo.profiles.tests import UserAvatarFactory, UserFactory
+
+
+class PrefetchAvatarUrlsTest(RemoTestCase):
+
+    def test_single_query(self):
+        users = UserFactory.create_batch(3)
+        for user in users[:2]:
+            UserAvatarFactory.create(user=user, avatar_url='https://example.com/%s' % user.pk)
+
+        users = list(User.objects.filter(pk__in=[user.pk for user in users]).order_by('pk'))
+        with self.assertNumQueries(1):
+            prefetch_avatar_urls(users)
+        eq_([user._avatar_url for user in users],
+            ['https://example.com/%s' % users[0].pk, 'https://example.com/%s' % users[1].pk,
+             get_default_avatar_url(users[2].email)])
+        eq_(cache.get(AVATAR_CACHE_KEY.format(users[0].pk)), users[0]._avatar_url)
+
+        users = list(User.objects.filter(pk__in=[user.pk for user in users]))
+        with self.assertNumQueries(0):
+            prefetch_avatar_urls(users)
+
+    def test_select_related(self):
+        user = UserFactory.create()
+        UserAvatarFactory.create(user=user, avatar_url='https://example.com/avatar')
+        other_user = UserFactory.create()
+        users = list(User.objects.filter(pk__in=[user.pk, other_user.pk])
+                     .select_related('useravatar').order_by('pk'))
+
+        with self.assertNumQueries(0):
+            prefetch_avatar_urls(users)
+        eq_(users[0]._avatar_url, 'https://example.com/avatar')
+        eq_(users[1]._avatar_url, get_default_avatar_url(other_user.email))
+
+
+@patch('remo.profiles.avatars.lookup_avatar_server', return_value=None)
+class RefreshStaleAvatarsTest(RemoTestCase):
+
+    def test_missing_and_stale(self, mocked_lookup):
+        missing = UserFactory.create(email='missing@example.com')
+        stale = UserFactory.create(email='stale@example.org')
+        fresh = UserFactory.create()
+        UserAvatarFactory.create(user=stale, avatar_url='https://example.com/old')
+        UserAvatarFactory.create(user=fresh, avatar_url='https://example.com/fresh')
+        UserAvatar.objects.filter(user=stale).update(
+            last_update=timezone.now() - timedelta(days=8))
+        UserAvatar.objects.exclude(user__in=[missing, stale, fresh]).delete()
+
+        eq_(refresh_stale_avatars(), 2)
+        eq_(UserAvatar.objects.get(user=missing).avatar_url,
+            get_default_avatar_url('missing@example.com'))
+        eq_(UserAvatar.objects.get(user=stale).avatar_url,
+            get_default_avatar_url('stale@example.org'))
+        ok_(UserAvatar.objects.get(user=stale).last_update > timezone.now() - timedelta(days=1))
+        eq_(UserAvatar.objects.get(user=fresh).avatar_url, 'https://example.com/fresh')
+        eq_(cache.get(AVATAR_CACHE_KEY.format(stale.pk)),
+            get_default_avatar_url('stale@example.org'))
+        # Every domain is looked up once.
+        eq_(sorted(args[0][0] for args in mocked_lookup.call_args_list),
+            ['example.com', 'example.org'])
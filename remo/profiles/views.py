@@ -22,6 +22,7 @@ import forms
 
 from remo.base.decorators import permission_check
 from remo.base.templatetags.helpers import urlparams
+from remo.base.utils import user_in_groups
 from remo.events.utils import get_events_for_user
 from remo.profiles.models import UserProfile, UserStatus
 from remo.profiles.models import FunctionalArea, MobilisingInterest, MobilisingSkill
@@ -31,7 +32,7 @@ USERNAME_ALGO = getattr(settings, 'OIDC_USERNAME_ALGO', default_username_algo)
 
 
 @never_cache
-@user_passes_test(lambda u: u.groups.filter(Q(name='Rep') | Q(name='Admin')),
+@user_passes_test(lambda u: user_in_groups(u, 'Rep', 'Admin'),
                   login_url=settings.LOGIN_REDIRECT_URL)
 @permission_check(permissions=['profiles.can_edit_profiles'],
                   filter_field='display_name', owner_field='user',
@@ -89,7 +90,7 @@ def edit(request, display_name):
 
             admin_only_groups = ['Admin', 'Peers']
 
-            user_is_admin = request.user.groups.filter(name='Admin').exists()
+            user_is_admin = user_in_groups(request.user, 'Admin')
             for group_db, group_html in groups.items():
                 if Group.objects.filter(name=group_db).exists():
                     if group_db in admin_only_groups and not user_is_admin:
@@ -122,14 +123,14 @@ def edit(request, display_name):
         # https://bugzilla.mozilla.org/show_bug.cgi?id=1147541
         user = User.objects.get(pk=user.id)
 
-    group_bits = map(lambda x: user.groups.filter(name=x).exists(),
+    group_bits = map(lambda x: user_in_groups(user, x),
                      ['Admin', 'Council', 'Mentor', 'Rep', 'Alumni', 'Review', 'Peers',
                       'Resources', 'Onboarding', 'Newsletter'])
 
     functional_areas = map(int, profileform['functional_areas'].value())
     mobilising_skills = map(int, profileform['mobilising_skills'].value())
     mobilising_interests = map(int, profileform['mobilising_interests'].value())
-    user_is_alumni = user.groups.filter(name='Alumni').exists()
+    user_is_alumni = user_in_groups(user, 'Alumni')
 
     return render(request, 'profiles_edit.jinja',
                   {'userform': userform,
@@ -186,8 +187,8 @@ def view_profile(request, display_name):
     """View user profile."""
     user = get_object_or_404(User,
                              userprofile__display_name__iexact=display_name)
-    user_is_alumni = user.groups.filter(name='Alumni').exists()
-    if not user.groups.filter(Q(name='Rep') | Q(name='Alumni')).exists():
+    user_is_alumni = user_in_groups(user, 'Alumni')
+    if not user_in_groups(user, 'Rep', 'Alumni'):
         raise Http404
 
     if (not user.userprofile.registration_complete
@@ -230,7 +231,7 @@ def view_profile(request, display_name):
 
     if nominee_form.is_valid():
         if ((is_nomination_period or waffle.switch_is_active('enable_rotm_tasks'))
-                and request.user.groups.filter(name='Mentor').exists() and request.user != user):
+                and user_in_groups(request.user, 'Mentor') and request.user != user):
             nominee_form.save(nominated_by=request.user)
             return redirect('profiles_view_profile', display_name=display_name)
 
@@ -1,9 +1,8 @@
 from django.contrib import admin
 from django.utils.encoding import smart_text
 
-from import_export.admin import ExportMixin
-
-from remo.remozilla.models import Bug, Status
+from remo.base.admin import StreamingExportMixin
+from remo.remozilla.models import Bug, Checkpoint, Status
 
 
 def encode_bugzilla_strings(modeladmin, request, queryset):
@@ -18,7 +17,7 @@ def encode_bugzilla_strings(modeladmin, request, queryset):
 encode_bugzilla_strings.short_description = 'Encode bugzilla strings'
 
 
-class BugAdmin(ExportMixin, admin.ModelAdmin):
+class BugAdmin(StreamingExportMixin, admin.ModelAdmin):
     """Bug Admin."""
     list_display = ('__unicode__', 'summary', 'status', 'resolution',
                     'bug_last_change_time',)
@@ -29,3 +28,11 @@ class BugAdmin(ExportMixin, admin.ModelAdmin):
 
 admin.site.register(Bug, BugAdmin)
 admin.site.register(Status)
+
+
+class CheckpointAdmin(admin.ModelAdmin):
+    """Checkpoint Admin."""
+    list_display = ('component', 'since', 'offset', 'started', 'updated_on',)
+
+
+admin.site.register(Checkpoint, CheckpointAdmin)
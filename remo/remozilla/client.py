@@ -0,0 +1,96 @@
+from multiprocessing.pool import ThreadPool
+from urllib import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+BUG_URL = ('{base_url}/rest/bug?api_key={api_key}'
+           '&product=Mozilla%20Reps&component={component}&'
+           'include_fields={fields}&last_change_time={timestamp}&'
+           'offset={offset}&limit={limit}')
+# Bugzilla returns the comments of every bug listed in the extra ``ids``
+# parameters along with the bug in the path, so a single request can
+# fetch the comments of a whole batch of bugs.
+COMMENT_URL = '{base_url}/rest/bug/{id}/comment?api_key={api_key}{extra_ids}'
+COMMENT_BATCH_SIZE = 25
+MAX_WORKERS = 4
+
+
+class BugzillaClient(object):
+    """Client to connect to the Bugzilla REST API.
+
+    All the requests go through a single keep-alive session with a
+    connection pool big enough to serve the comment workers in parallel.
+    """
+
+    def __init__(self, base_url, api_key, workers=MAX_WORKERS,
+                 batch_size=COMMENT_BATCH_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.workers = workers
+        self.batch_size = batch_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._pool = None
+
+    def get(self, url):
+        """GET url, check the response for errors and return json."""
+        data = self.session.get(url).json()
+
+        # Check the server response for errors
+        if data.get('error'):
+            raise ValueError('Invalid response from server, {0}.'.format(data.get('message')))
+        return data
+
+    def get_bugs(self, component, fields, timestamp, offset, limit):
+        """GET a page of bugs of /component/ changed after /timestamp/."""
+        url = BUG_URL.format(base_url=self.base_url, api_key=self.api_key,
+                             component=quote(component), fields=','.join(fields),
+                             timestamp=timestamp, offset=offset, limit=limit)
+        return self.get(url).get('bugs', [])
+
+    def get_comments(self, bug_ids):
+        """GET the comments of all the bugs in /bug_ids/ with one request."""
+        extra_ids = ''.join(['&ids={0}'.format(bug_id) for bug_id in bug_ids[1:]])
+        url = COMMENT_URL.format(base_url=self.base_url, id=bug_ids[0],
+                                 api_key=self.api_key, extra_ids=extra_ids)
+        comments = self.get(url)['bugs']
+        return dict((bug_id, comments[str(bug_id)]['comments'])
+                    for bug_id in bug_ids if str(bug_id) in comments)
+
+    def get_first_comments(self, bug_ids):
+        """Return a dict with the first comment of each bug in /bug_ids/.
+
+        Bug ids are split in batches of /batch_size/ which are fetched
+        concurrently by a bounded pool of /workers/ threads.
+        """
+        batches = [bug_ids[i:i + self.batch_size]
+                   for i in range(0, len(bug_ids), self.batch_size)]
+        if not batches:
+            return {}
+
+        if len(batches) == 1:
+            results = [self.get_comments(batches[0])]
+        else:
+            if not self._pool:
+                self._pool = ThreadPool(self.workers)
+            results = self._pool.map(self.get_comments, batches)
+
+        first_comments = {}
+        for comments in results:
+            for bug_id, bug_comments in comments.items():
+                if bug_comments and bug_comments[0].get('text', ''):
+                    first_comments[bug_id] = bug_comments[0]['text']
+        return first_comments
+
+    def close(self):
+        """Stop the worker pool and release the pooled connections."""
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self.session.close()
@@ -0,0 +1,114 @@
+"""Local fake Bugzilla REST server.
+
+Serves generated bugs and comments on the same endpoints used by
+fetch_bugs so that the sync can be exercised and benchmarked offline.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import parse_qs, urlparse
+
+
+COMMENT_PATH = re.compile(r'^/rest/bug/(?P<id>\d+)/comment$')
+FIRST_BUG_ID = 100000
+
+
+def generate_bugs(components, bugs_per_component):
+    """Return a list of Bugzilla-like bug dicts changed an hour ago."""
+    change_time = (datetime.utcnow() - timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    bugs = []
+    bug_id = FIRST_BUG_ID
+    for component in components:
+        for i in range(bugs_per_component):
+            bugs.append({'id': bug_id,
+                         'summary': 'Fake bug {0}'.format(bug_id),
+                         'creator': 'creator{0}@example.com'.format(i % 50),
+                         'creation_time': '2017-01-01T10:00:00Z',
+                         'last_change_time': change_time,
+                         'component': component,
+                         'whiteboard': '',
+                         'cc': ['cc{0}@example.com'.format(i % 30),
+                                'cc{0}@example.com'.format((i + 1) % 30)],
+                         'assigned_to': 'assignee{0}@example.com'.format(i % 20),
+                         'status': 'NEW',
+                         'resolution': '',
+                         'flags': []})
+            bug_id += 1
+    return bugs
+
+
+class FakeBugzillaHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data):
+        body = json.dumps(data)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.lock:
+            server.request_count += 1
+
+        if url.path == '/rest/bug':
+            component = params.get('component', [''])[0]
+            offset = int(params.get('offset', ['0'])[0])
+            limit = int(params.get('limit', ['100'])[0])
+            # Bugzilla times are compared as strings, down to the second.
+            since = params.get('last_change_time', [''])[0][:19].replace(' ', 'T')
+            bugs = [bug for bug in server.bugs if bug['component'] == component
+                    and bug['last_change_time'][:19] >= since]
+            return self._send_json({'bugs': bugs[offset:offset + limit]})
+
+        match = COMMENT_PATH.match(url.path)
+        if match:
+            ids = [match.group('id')] + params.get('ids', [])
+            with server.lock:
+                server.comment_request_count += 1
+            comments = dict((bug_id, {'comments': [{'text': 'Comment for {0}'.format(bug_id)}]})
+                            for bug_id in ids)
+            return self._send_json({'bugs': comments})
+
+        self._send_json({'error': True, 'message': 'Unknown resource'})
+
+
+class FakeBugzillaServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server with a fixed set of generated bugs."""
+    daemon_threads = True
+
+    def __init__(self, bugs, latency=0, address=('127.0.0.1', 0)):
+        HTTPServer.__init__(self, address, FakeBugzillaHandler)
+        self.bugs = bugs
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.comment_request_count = 0
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address)
+
+    def start(self):
+        """Serve requests from a background thread."""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
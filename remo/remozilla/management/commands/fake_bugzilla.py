@@ -0,0 +1,33 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from remo.remozilla.fake import FakeBugzillaServer, generate_bugs
+from remo.remozilla.tasks import COMPONENTS
+
+
+class Command(BaseCommand):
+    """Run a local fake Bugzilla server to benchmark fetch_bugs offline.
+
+    Point REMOZILLA_URL to the printed address and run fetch_bugs.
+    """
+    args = None
+    help = 'Run a local fake Bugzilla REST server'
+    option_list = list(BaseCommand.option_list) + [
+        make_option('--port', dest='port', default=8001, type='int',
+                    help='Port to listen to.'),
+        make_option('--bugs', dest='bugs', default=500, type='int',
+                    help='Number of bugs per component.'),
+        make_option('--latency', dest='latency', default=0.05, type='float',
+                    help='Simulated latency per request in seconds.')]
+
+    def handle(self, *args, **options):
+        """Command handler."""
+        bugs = generate_bugs(COMPONENTS, options['bugs'])
+        server = FakeBugzillaServer(bugs, latency=options['latency'],
+                                    address=('127.0.0.1', options['port']))
+        self.stdout.write('Serving {0} bugs on {1}'.format(len(bugs), server.url))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
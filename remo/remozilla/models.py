@@ -115,44 +115,56 @@ class Bug(models.Model):
 
         return action_items
 
-    def save(self, *args, **kwargs):
+    def update_action_items(self, previous_assigned_to_id):
+        """Resolve or re-assign the stored action items of the bug.
+
+        /previous_assigned_to_id/ is the assignee currently stored in
+        the database.
+        """
         # Avoid circular dependency
         from remo.base.templatetags.helpers import user_is_rep
+        from remo.dashboard.sections import bump_section_version
         ActionItem = get_model('dashboard', 'ActionItem')
 
-        # Update action items
+        # Get saved action item
         action_model = ContentType.objects.get_for_model(self)
+        action_items = ActionItem.objects.filter(content_type=action_model,
+                                                 object_id=self.pk,
+                                                 resolved=False)
+        # If there is no user or user is not rep or the bug is resolved,
+        # resolve the action item too!
+        if (not self.assigned_to or not user_is_rep(self.assigned_to)
+                or self.status == 'RESOLVED'):
+            count = action_items.update(resolved=True)
+        else:
+            possible_actions = [ADD_RECEIPTS_ACTION, ADD_REPORT_ACTION,
+                                ADD_PHOTOS_ACTION,
+                                ADD_REPORTS_PHOTOS_ACTION,
+                                REVIEW_BUDGET_REQUEST_ACTION,
+                                WAITING_MENTOR_VALIDATION_ACTION]
+            action_names = ([u'{0} {1}'.format(action, self.summary)
+                             for action in possible_actions])
+            # Resolve any non-valid action items.
+            invalid_actions = []
+            for action_name, attr in zip(action_names, BUG_ATTRS):
+                if not getattr(self, attr):
+                    invalid_actions.append(action_name)
+            count = action_items.filter(name__in=invalid_actions).update(completed=True,
+                                                                         resolved=True)
+
+            # If the bug changed owner, re-assign it
+            if previous_assigned_to_id != self.assigned_to_id:
+                count += (action_items.filter(name__in=action_names)
+                          .update(user=self.assigned_to))
+        if count:
+            # Bulk queries send no signal to invalidate the dashboard.
+            bump_section_version(ActionItem)
+
+    def save(self, *args, **kwargs):
+        # Update action items
         if self.pk:
-            # Get saved action item
-            action_items = ActionItem.objects.filter(content_type=action_model,
-                                                     object_id=self.pk,
-                                                     resolved=False)
-            # If there is no user or user is not rep or the bug is resolved,
-            # resolve the action item too!
-            if (not self.assigned_to or not user_is_rep(self.assigned_to)
-                    or self.status == 'RESOLVED'):
-                action_items.update(resolved=True)
-            else:
-                possible_actions = [ADD_RECEIPTS_ACTION, ADD_REPORT_ACTION,
-                                    ADD_PHOTOS_ACTION,
-                                    ADD_REPORTS_PHOTOS_ACTION,
-                                    REVIEW_BUDGET_REQUEST_ACTION,
-                                    WAITING_MENTOR_VALIDATION_ACTION]
-                action_names = ([u'{0} {1}'.format(action, self.summary)
-                                 for action in possible_actions])
-                # Resolve any non-valid action items.
-                invalid_actions = []
-                for action_name, attr in zip(action_names, BUG_ATTRS):
-                    if not getattr(self, attr):
-                        invalid_actions.append(action_name)
-                invalid_action_items = action_items.filter(name__in=invalid_actions)
-                for invalid_item in invalid_action_items:
-                    ActionItem.resolve(self, invalid_item.user, invalid_item.name)
-
-                # If the bug changed owner, re-assign it
-                current_bug = Bug.objects.get(id=self.pk)
-                if current_bug.assigned_to != self.assigned_to:
-                    action_items.filter(name__in=action_names).update(user=self.assigned_to)
+            current_bug = Bug.objects.get(id=self.pk)
+            self.update_action_items(current_bug.assigned_to_id)
 
         super(Bug, self).save()
 
@@ -177,6 +189,28 @@ class Status(models.Model):
         verbose_name_plural = 'statuses'
 
 
+@python_2_unicode_compatible
+class Checkpoint(models.Model):
+    """Bugzilla sync checkpoint of a component.
+
+    Bugs changed after /since/ are fetched page by page. /offset/ is the
+    offset of the next page to fetch and /started/ the time the first
+    page was fetched. Both are committed along with each page, so an
+    interrupted sync resumes where it stopped. Once all the pages are
+    fetched /since/ moves to /started/, so the bugs changed while the
+    pages were fetched are fetched again by the next sync.
+
+    """
+    component = models.CharField(max_length=200, unique=True)
+    since = models.DateTimeField(default=datetime(1970, 1, 1, 0, 0, tzinfo=utc))
+    offset = models.PositiveIntegerField(default=0)
+    started = models.DateTimeField(blank=True, null=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return u'{0}: {1} (offset {2})'.format(self.component, self.since, self.offset)
+
+
 @receiver(pre_save, sender=Bug, dispatch_uid='set_uppercase_pre_save_signal')
 def set_uppercase_pre_save(sender, instance, **kwargs):
     """Convert status and resolution to uppercase prior to saving."""
@@ -194,7 +228,7 @@ def update_budget_needinfo_action_items(sender, instance, action, pk_set, **kwar
     name = u'{0} {1}'.format(NEEDINFO_ACTION, instance.summary)
     if action == 'post_remove':
         for pk in pk_set:
-            ActionItem.resolve(instance=instance, user=User.objects.get(pk=pk), name=name)
+            ActionItem.resolve(instance=instance, user=pk, name=name)
 
     if action == 'pre_clear':
         for user in instance.budget_needinfo.all():
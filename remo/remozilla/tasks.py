@@ -1,21 +1,25 @@
 from __future__ import unicode_literals
 
+from collections import defaultdict
 from datetime import datetime, timedelta
-from urllib import quote
+from itertools import chain
+from operator import or_
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import router
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save
 from django.utils import timezone
 
-import requests
 import waffle
 
-from remo.base.templatetags.helpers import urlparams
-from remo.base.utils import get_object_or_none
+from remo.base.jobs import atomic
+from remo.base.utils import bulk_update
 from remo.celery import app
-from remo.remozilla.models import Bug
-from remo.remozilla.utils import get_last_updated_date, set_last_updated_date
+from remo.remozilla.client import BugzillaClient
+from remo.remozilla.models import Bug, Checkpoint
+from remo.remozilla.utils import get_checkpoint, set_last_updated_date
 
 COMPONENTS = ['Budget Requests', 'Mentorship', 'Swag Requests', 'Planning']
 
@@ -24,11 +28,13 @@ BUGZILLA_FIELDS = ['is_confirmed', 'summary', 'creator', 'creation_time',
                    'status', 'assigned_to', 'resolution',
                    'last_change_time', 'flags']
 
-URL = ('https://bugzilla.mozilla.org/rest/bug?api_key={api_key}'
-       '&product=Mozilla%20Reps&component={component}&'
-       'include_fields={fields}&last_change_time={timestamp}&'
-       'offset={offset}&limit={limit}')
-COMMENT_URL = 'https://bugzilla.mozilla.org/rest/bug/{id}/comment?api_key={api_key}'
+# Bug fields populated from Bugzilla data
+BUG_FIELDS = ['summary', 'creator_id', 'bug_creation_time', 'component',
+              'whiteboard', 'assigned_to_id', 'status', 'resolution',
+              'bug_last_change_time', 'council_member_assigned',
+              'pending_mentor_validation', 'council_vote_requested',
+              'first_comment']
+
 LIMIT = 100
 BUG_WHITEBOARD = 'Review Team approval needed'
 BUG_REVIEW = 'remo-review'
@@ -43,108 +49,235 @@ def parse_bugzilla_time(time):
     return datetimeobj
 
 
+def get_users_by_email(emails):
+    """Return a dict with the users of /emails/ keyed by email.
+
+    Emails shared by more than one user are left out.
+    """
+    users = {}
+    duplicates = set()
+    for user in User.objects.filter(email__in=set(emails)):
+        if user.email in users:
+            duplicates.add(user.email)
+        users[user.email] = user
+    for email in duplicates:
+        del users[email]
+    return users
+
+
+def get_bug_emails(bdata):
+    """Return all the emails referenced in Bugzilla bug data."""
+    emails = [bdata['creator'], bdata['assigned_to']] + bdata.get('cc', [])
+    emails += [flag['requestee'] for flag in bdata.get('flags', [])
+               if 'requestee' in flag]
+    return emails
+
+
+def populate_bug(bug, bdata, users, first_comment=None):
+    """Populate /bug/ from Bugzilla data.
+
+    Return the ids of the cc'ed users and the users with a budget
+    needinfo flag.
+    """
+    bug.summary = bdata.get('summary', '')
+    bug.creator = users.get(bdata['creator'])
+    bug.bug_creation_time = parse_bugzilla_time(bdata['creation_time'])
+    bug.component = bdata['component']
+    bug.whiteboard = bdata.get('whiteboard', '')
+    bug.assigned_to = users.get(bdata['assigned_to'])
+    bug.status = bdata['status'].upper()
+    bug.resolution = bdata.get('resolution', '').upper()
+    bug.bug_last_change_time = parse_bugzilla_time(bdata.get('last_change_time'))
+
+    cc = set(users[email].id for email in bdata.get('cc', []) if email in users)
+    needinfo = set()
+
+    automated_voting_trigger = 0
+    bug.council_member_assigned = False
+    bug.pending_mentor_validation = False
+    for flag in bdata.get('flags', []):
+        if flag['status'] == '?' and flag['name'] == BUG_APPROVAL:
+            automated_voting_trigger += 1
+            if BUG_WHITEBOARD in bug.whiteboard:
+                bug.council_member_assigned = True
+        if ((flag['status'] == '?'
+             and flag['name'] == 'needinfo' and 'requestee' in flag
+             and flag['requestee'] == (settings.REPS_REVIEW_ALIAS))):
+            automated_voting_trigger += 1
+        if flag['status'] == '?' and flag['name'] == BUG_REVIEW:
+            bug.pending_mentor_validation = True
+        if (flag['status'] == '?' and flag['name'] == 'needinfo'
+                and 'requestee' in flag and flag['requestee'] in users):
+            needinfo.add(users[flag['requestee']].id)
+
+    if automated_voting_trigger == 2 and waffle.switch_is_active('automated_polls'):
+        bug.council_vote_requested = True
+
+    if first_comment:
+        # Enforce unicode encoding.
+        bug.first_comment = first_comment
+
+    return cc, needinfo
+
+
+def get_bug_values(bug):
+    return [getattr(bug, field) for field in BUG_FIELDS]
+
+
+def sync_m2m(through, bugs, desired):
+    """Diff the rows of the /through/ table of /bugs/ with /desired/.
+
+    /desired/ is a dict with the set of user ids per bug pk. Stale rows
+    are removed with one query and the missing ones are bulk created.
+    Return a dict with the (added, removed) user ids of each changed
+    bug pk.
+    """
+    current = defaultdict(set)
+    rows = through.objects.filter(bug__in=bugs).values_list('bug_id', 'user_id')
+    for bug_id, user_id in rows:
+        current[bug_id].add(user_id)
+
+    changes = {}
+    stale = []
+    new_rows = []
+    for bug in bugs:
+        added = desired[bug.pk] - current[bug.pk]
+        removed = current[bug.pk] - desired[bug.pk]
+        if removed:
+            stale.append(Q(bug_id=bug.pk, user_id__in=removed))
+        new_rows += [through(bug_id=bug.pk, user_id=user_id) for user_id in added]
+        if added or removed:
+            changes[bug.pk] = (added, removed)
+
+    if stale:
+        through.objects.filter(reduce(or_, stale)).delete()
+    if new_rows:
+        through.objects.bulk_create(new_rows)
+    return changes
+
+
+def update_bugs(remo_bugs, first_comments=None):
+    """Create or update a page of Bugs from Bugzilla data.
+
+    Users, existing bugs and m2m relations are loaded and stored in
+    bulk, so the number of queries does not depend on the number of
+    bugs. Save signals are only sent for new and changed bugs.
+    """
+    first_comments = first_comments or {}
+    users = get_users_by_email(chain(*[get_bug_emails(bdata) for bdata in remo_bugs]))
+    existing = dict((bug.bug_id, bug) for bug in
+                    Bug.objects.filter(bug_id__in=[bdata['id'] for bdata in remo_bugs]))
+
+    new_bugs = []
+    changed_bugs = []
+    previous_assignees = {}
+    desired_cc = {}
+    desired_needinfo = {}
+    for bdata in remo_bugs:
+        bug = existing.get(bdata['id'])
+        if not bug:
+            bug = Bug(bug_id=bdata['id'])
+            new_bugs.append(bug)
+        previous_values = get_bug_values(bug)
+        cc, needinfo = populate_bug(bug, bdata, users, first_comments.get(bdata['id']))
+        desired_cc[bug.bug_id] = cc
+        desired_needinfo[bug.bug_id] = needinfo
+        if bug.pk and get_bug_values(bug) != previous_values:
+            previous_assignees[bug.pk] = previous_values[BUG_FIELDS.index('assigned_to_id')]
+            changed_bugs.append(bug)
+
+    if new_bugs:
+        Bug.objects.bulk_create(new_bugs)
+        # bulk_create does not set the primary keys
+        new_bug_ids = [new_bug.bug_id for new_bug in new_bugs]
+        pks = dict(Bug.objects.filter(bug_id__in=new_bug_ids).values_list('bug_id', 'id'))
+        for bug in new_bugs:
+            bug.pk = pks[bug.bug_id]
+
+    now = timezone.now()
+    for bug in changed_bugs:
+        bug.update_action_items(previous_assignees[bug.pk])
+        bug.updated_on = now
+    bulk_update(changed_bugs, BUG_FIELDS + ['updated_on'])
+
+    bugs = existing.values() + new_bugs
+    cc_changes = sync_m2m(Bug.cc.through, bugs,
+                          dict((bug.pk, desired_cc[bug.bug_id]) for bug in bugs))
+    needinfo_changes = sync_m2m(Bug.budget_needinfo.through, bugs,
+                                dict((bug.pk, desired_needinfo[bug.bug_id]) for bug in bugs))
+
+    # Resolve the action items of the removed needinfo requestees.
+    bugs_by_pk = dict((bug.pk, bug) for bug in bugs)
+    for pk, (added, removed) in needinfo_changes.items():
+        if removed:
+            m2m_changed.send(sender=Bug.budget_needinfo.through,
+                             instance=bugs_by_pk[pk], action='post_remove',
+                             reverse=False, model=User, pk_set=removed,
+                             using=router.db_for_write(Bug))
+
+    new_pks = set(bug.pk for bug in new_bugs)
+    changed_pks = set(bug.pk for bug in changed_bugs)
+    changed_pks.update(new_pks, cc_changes.keys(), needinfo_changes.keys())
+    for bug in bugs:
+        if bug.pk in changed_pks:
+            created = bug.pk in new_pks
+            post_save.send(sender=Bug, instance=bug, created=created,
+                           update_fields=None, raw=False,
+                           using=router.db_for_write(Bug))
+
+    return bugs
+
+
 @app.task
-@transaction.atomic
 def fetch_bugs(components=COMPONENTS, days=None):
     """Fetch all bugs from Bugzilla.
 
     Loop over components and fetch bugs updated the last days. Link
     Bugzilla users with users on this website, when possible.
 
-    # TODO: This can trigger a does not exist error because the task was picked
-    # by the worker before the transaction was complete. Needs fixing after the
-    # upgrade to a Django version > 1.8
+    Each page of bugs is committed in its own transaction along with
+    the checkpoint of its component, so an interrupted sync resumes from
+    the last committed page. The jobs deferred while saving a page are
+    queued once the page is committed.
     """
     now = timezone.now()
-    if not days:
-        changed_date = get_last_updated_date()
-    else:
-        changed_date = now - timedelta(int(days))
-
-    for component in components:
-        offset = 0
-        url = URL.format(api_key=settings.REMOZILLA_API_KEY, component=quote(component),
-                         fields=','.join(BUGZILLA_FIELDS),
-                         timestamp=changed_date, offset=offset, limit=LIMIT)
-
-        while True:
-            bugs = requests.get(url).json()
-            error = bugs.get('error')
-
-            # Check the server response for errors
-            if error:
-                raise ValueError('Invalid response from server, {0}.'.format(bugs['message']))
-
-            remo_bugs = bugs.get('bugs', [])
-            if not remo_bugs:
-                break
-
-            for bdata in remo_bugs:
-                # Get comments for current bug
-                comment_url = COMMENT_URL.format(id=bdata['id'],
-                                                 api_key=settings.REMOZILLA_API_KEY)
-                comments = requests.get(comment_url).json()
-                error = comments.get('error')
-
-                if error:
-                    raise ValueError('Invalid response from server, {0}.'
-                                     .format(comments['message']))
-
-                bug, created = Bug.objects.get_or_create(bug_id=bdata['id'])
-
-                bug.summary = bdata.get('summary', '')
-                creator_email = bdata['creator']
-                bug.creator = get_object_or_none(User, email=creator_email)
-                bug.bug_creation_time = parse_bugzilla_time(bdata['creation_time'])
-                bug.component = bdata['component']
-                bug.whiteboard = bdata.get('whiteboard', '')
-
-                bug.cc.clear()
-                for email in bdata.get('cc', []):
-                    cc_user = get_object_or_none(User, email=email)
-                    if cc_user:
-                        bug.cc.add(cc_user)
-
-                bug.assigned_to = get_object_or_none(
-                    User, email=bdata['assigned_to'])
-                bug.status = bdata['status']
-                bug.resolution = bdata.get('resolution', '')
-                bug.bug_last_change_time = parse_bugzilla_time(bdata.get('last_change_time'))
-
-                automated_voting_trigger = 0
-                bug.budget_needinfo.clear()
-                bug.council_member_assigned = False
-                bug.pending_mentor_validation = False
-                for flag in bdata.get('flags', []):
-                    if flag['status'] == '?' and flag['name'] == BUG_APPROVAL:
-                        automated_voting_trigger += 1
-                        if BUG_WHITEBOARD in bug.whiteboard:
-                            bug.council_member_assigned = True
-                    if ((flag['status'] == '?'
-                         and flag['name'] == 'needinfo' and 'requestee' in flag
-                         and flag['requestee'] == (settings.REPS_REVIEW_ALIAS))):
-                        automated_voting_trigger += 1
-                    if flag['status'] == '?' and flag['name'] == BUG_REVIEW:
-                        bug.pending_mentor_validation = True
-                    if (flag['status'] == '?' and flag['name'] == 'needinfo'
-                            and 'requestee' in flag):
-                        email = flag['requestee']
-                        user = get_object_or_none(User, email=email)
-                        if user:
-                            bug.budget_needinfo.add(user)
-
-                if automated_voting_trigger == 2 and waffle.switch_is_active('automated_polls'):
-                    bug.council_vote_requested = True
-
-                unicode_id = str(bdata['id'])
-                bug_comments = comments['bugs'][unicode_id]['comments']
-                if bug_comments and bug_comments[0].get('text', ''):
-                    # Enforce unicode encoding.
-                    bug.first_comment = bug_comments[0]['text']
-
-                bug.save()
-
-            offset += LIMIT
-            url = urlparams(url, offset=offset)
+    client = BugzillaClient(settings.REMOZILLA_URL, settings.REMOZILLA_API_KEY)
+    try:
+        for component in components:
+            if days:
+                # One-off sync that leaves the stored checkpoints untouched.
+                checkpoint = Checkpoint(component=component,
+                                        since=now - timedelta(int(days)))
+            else:
+                checkpoint = get_checkpoint(component)
+
+            if not checkpoint.offset or not checkpoint.started:
+                checkpoint.started = now
+
+            while True:
+                remo_bugs = client.get_bugs(component, BUGZILLA_FIELDS, checkpoint.since,
+                                            checkpoint.offset, LIMIT)
+                if not remo_bugs:
+                    break
+
+                # Fetch the comments of the whole page in concurrent batches
+                bug_ids = [bdata['id'] for bdata in remo_bugs]
+                first_comments = client.get_first_comments(bug_ids)
+
+                with atomic():
+                    update_bugs(remo_bugs, first_comments)
+                    checkpoint.offset += LIMIT
+                    if checkpoint.pk:
+                        checkpoint.save()
+
+            # All the pages are fetched. Bugs changed since the first page
+            # may have moved between the pages, next sync fetches them again.
+            checkpoint.since = checkpoint.started
+            checkpoint.started = None
+            checkpoint.offset = 0
+            if checkpoint.pk:
+                checkpoint.save()
+    finally:
+        client.close()
 
     set_last_updated_date(now)
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 from django.conf import settings
+from django.test.utils import override_settings
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from nose.exc import SkipTest
 from nose.tools import eq_, ok_, raises
@@ -10,8 +14,11 @@ from mock import ANY, Mock, patch
 
 from remo.base.tests import RemoTestCase
 from remo.profiles.tests import UserFactory
-from remo.remozilla.models import Bug
-from remo.remozilla.tasks import fetch_bugs
+from remo.remozilla.client import BugzillaClient
+from remo.remozilla.fake import FakeBugzillaServer, generate_bugs
+from remo.remozilla.models import Bug, Checkpoint
+from remo.remozilla.tasks import (COMPONENTS, LIMIT, fetch_bugs, parse_bugzilla_time,
+                                  update_bugs)
 from remo.remozilla.utils import get_last_updated_date
 
 
@@ -20,7 +27,7 @@ class FetchBugsTest(RemoTestCase):
                 'demo_bugs.json']
 
     @raises(requests.ConnectionError)
-    @patch('requests.get')
+    @patch('remo.remozilla.client.requests.Session.get')
     def test_connection_error(self, fake_get):
         """Test fetch_bugs connection error exception."""
         if ((not getattr(settings, 'REMOZILLA_USERNAME', None)
@@ -32,21 +39,20 @@ class FetchBugsTest(RemoTestCase):
         fake_get.assert_called_with(ANY)
 
     @raises(ValueError)
-    @patch('remo.remozilla.tasks.requests')
-    def test_invalid_return_code(self, mocked_request):
+    @patch('remo.remozilla.client.requests.Session.get')
+    def test_invalid_return_code(self, mocked_get):
         """Test fetch_bugs invalid status code exception."""
         if ((not getattr(settings, 'REMOZILLA_USERNAME', None)
              or not getattr(settings, 'REMOZILLA_PASSWORD', None))):
             raise SkipTest('Skipping test due to unset REMOZILLA_USERNAME '
                            'or REMOZILLA_PASSWORD.')
-        mocked_obj = Mock()
-        mocked_request.get.return_value = mocked_obj
-        mocked_response = mocked_obj
+        mocked_response = Mock()
+        mocked_get.return_value = mocked_response
         mocked_response.json.return_value = {'error': 'Invalid login'}
         fetch_bugs()
 
     @patch('remo.remozilla.tasks.waffle.switch_is_active')
-    @patch('remo.remozilla.tasks.requests.get')
+    @patch('remo.remozilla.client.requests.Session.get')
     def test_with_valid_data(self, mocked_request, switch_is_active_mock):
         """Test fetch_bugs valid bug data processing."""
         UserFactory.create(username='remobot')
@@ -147,3 +153,180 @@ class FetchBugsTest(RemoTestCase):
         ok_(bug.pending_mentor_validation)
         ok_(bug.council_member_assigned)
         eq_(bug.first_comment, 'bar')
+
+
+class FakeBugzillaSyncTest(RemoTestCase):
+
+    def setUp(self):
+        self.bugs = generate_bugs(COMPONENTS[:2], 60)
+        self.server = FakeBugzillaServer(self.bugs)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_first_comments_batched(self):
+        client = BugzillaClient(self.server.url, 'key', workers=3, batch_size=25)
+        bug_ids = [bug['id'] for bug in self.bugs[:60]]
+        try:
+            first_comments = client.get_first_comments(bug_ids)
+        finally:
+            client.close()
+
+        eq_(len(first_comments), 60)
+        eq_(first_comments[bug_ids[0]], 'Comment for {0}'.format(bug_ids[0]))
+        # 60 bugs in batches of 25
+        eq_(self.server.comment_request_count, 3)
+
+    @patch('remo.remozilla.tasks.waffle.switch_is_active')
+    def test_fetch_bugs(self, switch_is_active_mock):
+        switch_is_active_mock.return_value = False
+        UserFactory.create(username='remobot')
+        with override_settings(REMOZILLA_URL=self.server.url):
+            fetch_bugs(days=1)
+
+        eq_(Bug.objects.count(), 120)
+        bug = Bug.objects.get(bug_id=self.bugs[0]['id'])
+        eq_(bug.first_comment, 'Comment for {0}'.format(bug.bug_id))
+        ok_(self.server.comment_request_count < len(self.bugs))
+
+
+class UpdateBugsTest(RemoTestCase):
+
+    def get_bug_data(self, **kwargs):
+        data = {'id': 4242,
+                'summary': 'Summary',
+                'creator': 'creator@example.com',
+                'creation_time': '2017-01-01T10:00:00Z',
+                'last_change_time': '2017-01-02T10:00:00Z',
+                'component': 'Budget Requests',
+                'whiteboard': '',
+                'cc': ['cc1@example.com', 'cc2@example.com'],
+                'assigned_to': 'nobody@example.com',
+                'status': 'new',
+                'resolution': '',
+                'flags': [{'status': '?', 'name': 'needinfo',
+                           'requestee': 'cc1@example.com'}]}
+        data.update(kwargs)
+        return data
+
+    def setUp(self):
+        self.creator = UserFactory.create(email='creator@example.com')
+        self.cc1 = UserFactory.create(email='cc1@example.com')
+        self.cc2 = UserFactory.create(email='cc2@example.com')
+
+    def test_create(self):
+        update_bugs([self.get_bug_data()], {4242: 'First comment'})
+
+        bug = Bug.objects.get(bug_id=4242)
+        eq_(bug.creator, self.creator)
+        eq_(bug.assigned_to, None)
+        eq_(bug.status, 'NEW')
+        eq_(bug.first_comment, 'First comment')
+        eq_(set(bug.cc.all()), set([self.cc1, self.cc2]))
+        eq_(list(bug.budget_needinfo.all()), [self.cc1])
+
+    def test_update(self):
+        update_bugs([self.get_bug_data()])
+        update_bugs([self.get_bug_data(summary='New summary',
+                                       cc=['cc2@example.com'], flags=[])])
+
+        bug = Bug.objects.get(bug_id=4242)
+        eq_(bug.summary, 'New summary')
+        eq_(list(bug.cc.all()), [self.cc2])
+        eq_(bug.budget_needinfo.count(), 0)
+
+    def test_unchanged_bugs(self):
+        bugs_data = [self.get_bug_data(id=bug_id) for bug_id in range(1, 21)]
+        update_bugs(bugs_data)
+
+        with patch('remo.remozilla.tasks.post_save.send') as post_save_mock:
+            # Users, existing bugs, cc and needinfo rows.
+            with self.assertNumQueries(4):
+                update_bugs(bugs_data)
+        ok_(not post_save_mock.called)
+
+
+class CheckpointSyncTest(RemoTestCase):
+
+    def setUp(self):
+        self.bugs = generate_bugs(COMPONENTS[:1], 150)
+        self.server = FakeBugzillaServer(self.bugs)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    @patch('remo.remozilla.tasks.waffle.switch_is_active')
+    def test_resume_interrupted_sync(self, switch_is_active_mock):
+        switch_is_active_mock.return_value = False
+        component = COMPONENTS[0]
+        calls = []
+
+        def failing_update_bugs(remo_bugs, first_comments):
+            calls.append(remo_bugs)
+            if len(calls) > 1:
+                raise ValueError('Sync interrupted')
+            return update_bugs(remo_bugs, first_comments)
+
+        with override_settings(REMOZILLA_URL=self.server.url):
+            with patch('remo.remozilla.tasks.update_bugs', side_effect=failing_update_bugs):
+                with self.assertRaises(ValueError):
+                    fetch_bugs(components=[component])
+
+            # The first page is committed along with its checkpoint.
+            checkpoint = Checkpoint.objects.get(component=component)
+            eq_(checkpoint.offset, LIMIT)
+            eq_(Bug.objects.count(), LIMIT)
+            started = checkpoint.started
+            ok_(started)
+
+            fetch_bugs(components=[component])
+
+        eq_(Bug.objects.count(), 150)
+        checkpoint = Checkpoint.objects.get(component=component)
+        eq_(checkpoint.offset, 0)
+        eq_(checkpoint.started, None)
+        # The next sync starts from the time the interrupted one started.
+        eq_(checkpoint.since, started)
+
+    @patch('remo.remozilla.tasks.waffle.switch_is_active')
+    def test_bugs_changed_between_pages(self, switch_is_active_mock):
+        switch_is_active_mock.return_value = False
+        component = COMPONENTS[0]
+        bugzilla_time = '%Y-%m-%dT%H:%M:%SZ'
+        calls = []
+
+        def changing_update_bugs(remo_bugs, first_comments):
+            calls.append(remo_bugs)
+            if len(calls) == 1:
+                # A bug of the fetched page changes, then a bug of the next one.
+                change_time = timezone.now() + timedelta(minutes=1)
+                self.bugs[0].update(summary='Changed first',
+                                    last_change_time=change_time.strftime(bugzilla_time))
+                change_time += timedelta(minutes=1)
+                self.bugs[-1].update(summary='Changed last',
+                                     last_change_time=change_time.strftime(bugzilla_time))
+            return update_bugs(remo_bugs, first_comments)
+
+        with override_settings(REMOZILLA_URL=self.server.url):
+            with patch('remo.remozilla.tasks.update_bugs', side_effect=changing_update_bugs):
+                fetch_bugs(components=[component])
+
+            eq_(Bug.objects.get(bug_id=self.bugs[0]['id']).summary, 'Fake bug 100000')
+            eq_(Bug.objects.get(bug_id=self.bugs[-1]['id']).summary, 'Changed last')
+            checkpoint = Checkpoint.objects.get(component=component)
+            ok_(checkpoint.since < parse_bugzilla_time(self.bugs[0]['last_change_time']))
+
+            fetch_bugs(components=[component])
+
+        eq_(Bug.objects.get(bug_id=self.bugs[0]['id']).summary, 'Changed first')
+
+    @patch('remo.remozilla.tasks.waffle.switch_is_active')
+    def test_days_back_leaves_checkpoints(self, switch_is_active_mock):
+        switch_is_active_mock.return_value = False
+        with override_settings(REMOZILLA_URL=self.server.url):
+            fetch_bugs(components=COMPONENTS[:1], days=2)
+
+        eq_(Bug.objects.count(), 150)
+        ok_(not Checkpoint.objects.exists())
@@ -1,4 +1,4 @@
-from remo.remozilla.models import Bug, Status
+from remo.remozilla.models import Bug, Checkpoint, Status
 
 
 def get_last_updated_date():
@@ -17,6 +17,16 @@ def set_last_updated_date(date):
     return status.last_updated
 
 
+def get_checkpoint(component):
+    """Get the sync checkpoint of a Bugzilla component.
+
+    New checkpoints start from the last successful Bugzilla sync.
+    """
+    checkpoint, created = Checkpoint.objects.get_or_create(
+        component=component, defaults={'since': get_last_updated_date()})
+    return checkpoint
+
+
 def get_bugzilla_url(obj):
 
     if not isinstance(obj, Bug):
@@ -1,8 +1,8 @@
 from django.contrib import admin
 
 from import_export import fields, resources
-from import_export.admin import ExportMixin
 
+from remo.base.admin import StreamingExportMixin
 from remo.reports.models import Activity, Campaign, NGReport, NGReportComment
 
 
@@ -52,7 +52,7 @@ class NGReportResource(resources.ModelResource):
         return ''
 
 
-class NGReportAdmin(ExportMixin, admin.ModelAdmin):
+class NGReportAdmin(StreamingExportMixin, admin.ModelAdmin):
     """New Generation Report Admin."""
     resource_class = NGReportResource
     inlines = [NGReportCommentInline]
@@ -64,14 +64,14 @@ class NGReportAdmin(ExportMixin, admin.ModelAdmin):
     list_filter = ['activity__name', 'campaign__name']
 
 
-class ActivityAdmin(ExportMixin, admin.ModelAdmin):
+class ActivityAdmin(StreamingExportMixin, admin.ModelAdmin):
     """Activity Admin."""
     model = Activity
     list_display = ('__unicode__', 'active')
     list_filter = ('active',)
 
 
-class CampaignAdmin(ExportMixin, admin.ModelAdmin):
+class CampaignAdmin(StreamingExportMixin, admin.ModelAdmin):
     """Campaign Admin."""
     model = Campaign
     list_display = ('__unicode__', 'active')
@@ -0,0 +1,51 @@
+import random
+import time
+from datetime import timedelta
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from remo.base.utils import get_date
+from remo.reports.streaks import compute_user_streaks
+
+
+class Command(BaseCommand):
+    """Benchmark the streak computation on synthetic report dates.
+
+    Each rep files a report every few days over the given years, with
+    random breaks longer than a week.
+    """
+    args = None
+    help = 'Benchmark the streak computation of the reps'
+    option_list = list(BaseCommand.option_list) + [
+        make_option('--reps', dest='reps', default=5000, type='int',
+                    help='Number of reps.'),
+        make_option('--years', dest='years', default=5, type='int',
+                    help='Years of reports per rep.'),
+        make_option('--seed', dest='seed', default=42, type='int',
+                    help='Seed of the random report dates.')]
+
+    def generate_rows(self, reps, years, today):
+        rows = []
+        for user_id in range(1, reps + 1):
+            report_date = today - timedelta(days=365 * years)
+            while report_date <= today:
+                rows.append((user_id, report_date))
+                if random.random() < 0.05:
+                    report_date += timedelta(days=random.randint(8, 60))
+                else:
+                    report_date += timedelta(days=random.randint(1, 7))
+        return rows
+
+    def handle(self, *args, **options):
+        """Command handler."""
+        random.seed(options['seed'])
+        today = get_date()
+        rows = self.generate_rows(options['reps'], options['years'], today)
+
+        start = time.time()
+        streaks = compute_user_streaks(rows, today)
+        elapsed = time.time() - start
+
+        self.stdout.write('Computed the streaks of {0} reps from {1} reports in {2:.3f}s'
+                          .format(len(streaks), len(rows), elapsed))
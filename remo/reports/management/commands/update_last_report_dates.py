@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from remo.profiles.models import UserProfile
+from remo.reports.models import NGReport
+from remo.reports.utils import update_last_report_dates
+
+
+class Command(BaseCommand):
+    """Backfill the last report date of every user profile."""
+    args = None
+    help = 'Update the last report date of the user profiles'
+
+    def handle(self, *args, **options):
+        """Command handler."""
+        profiles = list(UserProfile.objects.only('id', 'user', 'last_report_date'))
+        changed = update_last_report_dates(profiles, NGReport.objects.all())
+        self.stdout.write('Updated the last report date of {0} profiles'.format(changed))
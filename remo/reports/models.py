@@ -4,7 +4,7 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes import generic
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
@@ -13,14 +13,15 @@ from django_statsd.clients import statsd
 from product_details import product_details
 
 import remo.base.utils as utils
+from remo.base.jobs import defer
 from remo.base.models import GenericActiveManager
 from remo.base.tasks import send_remo_mail
-from remo.base.utils import daterange, get_date, get_object_or_none
+from remo.base.utils import (bulk_add_m2m, bulk_remove_m2m, daterange, get_date,
+                             get_object_or_none)
 from remo.dashboard.models import ActionItem, Item
 from remo.events.models import Attendance as EventAttendance, Event
 from remo.profiles.models import FunctionalArea
-from remo.reports import (ACTIVITY_CAMPAIGN, ACTIVITY_EVENT_ATTEND,
-                          ACTIVITY_EVENT_CREATE, ACTIVITY_POST_EVENT_METRICS,
+from remo.reports import (ACTIVITY_CAMPAIGN, ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE,
                           READONLY_ACTIVITIES, VERIFIABLE_ACTIVITIES)
 
 
@@ -155,13 +156,8 @@ class NGReport(models.Model):
             if self.report_date in daterange(start, end):
                 self.user.userprofile.first_report_notification = None
                 self.user.userprofile.second_report_notification = None
-                self.user.userprofile.save()
-
-        # User streaks functionality
-        one_week = datetime.timedelta(7)
-        current_start = self.user.userprofile.current_streak_start or None
-        longest_start = self.user.userprofile.longest_streak_start or None
-        longest_end = self.user.userprofile.longest_streak_end or None
+                self.user.userprofile.save(update_fields=['first_report_notification',
+                                                          'second_report_notification'])
 
         # Save the mentor of the user if no mentor is defined.
         if not self.mentor:
@@ -179,64 +175,11 @@ class NGReport(models.Model):
                 self.country = country
         super(NGReport, self).save()
 
-        # Resolve the verified action items.
-        action_item_name = u'{0} {1}'.format(VERIFY_ACTION, self.user.get_full_name())
-        if self.verified_activity:
-            ActionItem.resolve(instance=self,
-                               user=self.mentor,
-                               name=action_item_name)
-        else:
-            # Create all the action items, if any
-            ActionItem.create(self)
-
-        if self.is_future_report:
-            return
-
-        # If there is already a running streak and the report date
-        # is within this streak, update the current streak counter.
-        if (current_start and self.report_date < current_start
-                and self.report_date in daterange((current_start - one_week), current_start)):
-            current_start = self.report_date
-        # If there isn't any current streak, and the report date
-        # is within the current week, let's start the counting.
-        elif not current_start and self.report_date in daterange(get_date(-7), today):
-            current_start = self.report_date
-
-        # Longest streak section
-        # If longest streak already exists, let's update it.
-        if longest_start and longest_end:
-
-            # Compare the number of reports registered during
-            # the current streak and the number of reports
-            # during the longest streak. If current streak is bigger
-            # than the previous longest streak, update the longest streak.
-            longest_streak_count = NGReport.objects.filter(
-                report_date__range=(longest_start, longest_end),
-                user=self.user).count()
-            current_streak_count = NGReport.objects.filter(
-                report_date__range=(current_start, today),
-                user=self.user).count()
-            if current_start and current_streak_count > longest_streak_count:
-                longest_start = current_start
-                longest_end = today
-
-            # This happens only when a user appends a report, dated in the
-            # range of longest streak counters and it's out of the range
-            # of current streak counter.
-            elif self.report_date in daterange(longest_start - one_week, longest_end + one_week):
-                if self.report_date < longest_start:
-                    longest_start = self.report_date
-                elif self.report_date > longest_end:
-                    longest_end = self.report_date
-        else:
-            # Longest streak counters are empty, let's setup their value
-            longest_start = self.report_date
-            longest_end = self.report_date
-        # Assign the calculated values, to user's profile.
-        self.user.userprofile.current_streak_start = current_start
-        self.user.userprofile.longest_streak_start = longest_start
-        self.user.userprofile.longest_streak_end = longest_end
-        self.user.userprofile.save()
+        # Avoid circular dependency
+        from remo.reports.tasks import update_report_action_items, update_report_stats
+
+        defer(update_report_action_items, self.pk)
+        defer(update_report_stats, self.user_id)
 
     def get_action_items(self):
         """Returns a list of action items.
@@ -322,41 +265,13 @@ def create_passive_attendance_report(sender, instance, **kwargs):
 
 @receiver(post_save, sender=Event,
           dispatch_uid='create_update_passive_event_creation_report_signal')
-def create_update_passive_event_report(sender, instance, created, **kwargs):
-    """Automatically create/update a passive report on event creation."""
-    from remo.events.templatetags.helpers import get_event_link
+def create_update_passive_event_report(sender, instance, raw=False, **kwargs):
+    """Automatically create/update a passive report on event save."""
+    # Avoid circular dependency
+    from remo.reports.tasks import update_passive_event_report
 
-    attrs = {
-        'report_date': instance.start.date(),
-        'longitude': instance.lon,
-        'latitude': instance.lat,
-        'location': "%s, %s, %s" % (instance.city,
-                                    instance.region,
-                                    instance.country),
-        'link': get_event_link(instance),
-        'activity_description': instance.description,
-        'is_passive': True,
-        'event': instance,
-        'campaign': instance.campaign,
-        'country': instance.country
-    }
-
-    if created:
-        activity = Activity.objects.get(name=ACTIVITY_EVENT_CREATE)
-        attrs.update({'user': instance.owner,
-                      'activity': activity})
-
-        NGReport.objects.create(**attrs)
-        statsd.incr('reports.create_passive_event')
-    else:
-        reports = (NGReport.objects.filter(event=instance)
-                   .exclude(activity__name=ACTIVITY_POST_EVENT_METRICS))
-        reports.update(**attrs)
-        # Change user and mentor to the appropriate reports
-        attrs.update({'user': instance.owner,
-                      'mentor': instance.owner.userprofile.mentor})
-        reports.exclude(activity__name=ACTIVITY_EVENT_ATTEND).update(**attrs)
-        statsd.incr('reports.update_passive_event')
+    if not raw:
+        defer(update_passive_event_report, instance.pk)
 
 
 @receiver(pre_delete, sender=EventAttendance,
@@ -381,24 +296,42 @@ def delete_passive_event_report(sender, instance, **kwargs):
 
 @receiver(m2m_changed, sender=Event.categories.through,
           dispatch_uid='update_passive_report_categories_signal')
-def update_passive_report_functional_areas(sender, instance, action, pk_set,
+def update_passive_report_functional_areas(sender, instance, action, reverse, pk_set,
                                            **kwargs):
-    """Automatically update passive report's functional areas."""
-    reports = NGReport.objects.filter(event=instance)
-
-    for report in reports:
-        if action == 'post_add':
-            for pk in pk_set:
-                obj = FunctionalArea.objects.get(id=pk)
-                report.functional_areas.add(obj)
+    """Automatically update passive report's functional areas.
 
-        if action == 'post_remove':
-            for pk in pk_set:
-                obj = FunctionalArea.objects.get(id=pk)
-                report.functional_areas.remove(obj)
+    The functional areas of all the reports of the event are added or
+    removed together, without m2m_changed signals, and the activities
+    KPI rollups of the reports are updated.
+    """
+    # Avoid circular dependency
+    from remo.api.models import KPIRollup
+    from remo.api.rollups import get_rollup_key, update_rollups
 
-        if action == 'post_clear':
-            report.functional_areas.clear()
+    if reverse or action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if action == 'post_add':
+        stored = (NGReport.objects.filter(event=instance).order_by()
+                  .values_list('id', 'functional_areas'))
+        report_ids = set()
+        existing = set()
+        for report_id, area_id in stored:
+            report_ids.add(report_id)
+            existing.add((report_id, area_id))
+        bulk_add_m2m(NGReport.functional_areas,
+                     [(report_id, area_id) for report_id in report_ids for area_id in pk_set
+                      if (report_id, area_id) not in existing])
+
+    if action == 'post_remove':
+        bulk_remove_m2m(NGReport.functional_areas, NGReport.objects.filter(event=instance),
+                        pk_set)
+
+    if action == 'post_clear':
+        bulk_remove_m2m(NGReport.functional_areas, NGReport.objects.filter(event=instance))
+
+    reports = NGReport.objects.filter(event=instance).only('report_date', 'country')
+    update_rollups(KPIRollup.ACTIVITIES,
+                   [get_rollup_key(KPIRollup.ACTIVITIES, report) for report in reports])
 
 
 @receiver(post_save, sender=NGReportComment,
@@ -431,82 +364,11 @@ def email_commenters_on_add_ng_report_comment(sender, instance, **kwargs):
                                  email_template=email_template, data=ctx_data)
 
 
-@receiver(pre_delete, sender=NGReport, dispatch_uid='delete_ng_report_signal')
+@receiver(post_delete, sender=NGReport, dispatch_uid='delete_ng_report_signal')
 def delete_ng_report(sender, instance, **kwargs):
-    """Automatically update user's streak counters."""
-    today = get_date()
-    current_start = instance.user.userprofile.current_streak_start or None
-    longest_start = instance.user.userprofile.longest_streak_start or None
-    longest_end = instance.user.userprofile.longest_streak_end or None
-
-    # If instance is in the future or there is another
-    # report that date, don't do anything
-    if (instance.is_future_report
-            or (NGReport.objects.filter(user=instance.user, report_date=instance.report_date)
-                .exclude(pk=instance.id).exists())):
-        return
+    """Automatically update user's last report date and streak counters."""
+    # Avoid circular dependency
+    from remo.reports.tasks import update_report_stats
 
-    try:
-        next_report = instance.get_next_by_report_date(user=instance.user, report_date__lte=today)
-    except NGReport.DoesNotExist:
-        next_report = None
-
-    try:
-        previous_report = instance.get_previous_by_report_date(user=instance.user)
-    except NGReport.DoesNotExist:
-        previous_report = None
-
-    # There aren't any reports
-    if not next_report and not previous_report:
-        current_start = None
-        longest_start = None
-        longest_end = None
-
-    # If the deleted report is between the range of the longest
-    # streak counters, we need to update them.
-    elif (longest_start and longest_end
-            and instance.report_date in daterange(longest_start, longest_end)):
-
-        if longest_start == instance.report_date and next_report:
-            longest_start = next_report.report_date
-        elif longest_end == instance.report_date and previous_report:
-            longest_end = previous_report.report_date
-        elif (previous_report and next_report
-              and (next_report.report_date
-                   - previous_report.report_date).days > 7):
-            # Compare the number of reports registered from the starting point
-            # of the longest streak up until the date of the deleted report,
-            # with the number of reports registered from the date of the
-            # deleted report until the end of the longest streak.
-            lower_half_report_count = NGReport.objects.filter(
-                report_date__range=(longest_start, instance.report_date),
-                user=instance.user).count()
-            upper_half_report_count = NGReport.objects.filter(
-                report_date__range=(instance.report_date, longest_end),
-                user=instance.user).count()
-
-            # If the first time slice contains more reports, then we need
-            # to move the end of the longest streak, just before
-            # the deletion point. If the opposite is true, move the starting
-            # point of the longest streak just after the deletion point.
-            if (lower_half_report_count >= upper_half_report_count
-                    and previous_report.report_date >= longest_start):
-                longest_end = previous_report.report_date
-            elif (upper_half_report_count > lower_half_report_count
-                    and next_report.report_date <= longest_end):
-                longest_start = next_report.report_date
-
-    # If the deleted report is between the range of the current
-    # streak counter and today, then we need to update the counter.
-    if current_start and instance.report_date in daterange(current_start, today):
-        if current_start == instance.report_date and next_report:
-            current_start = next_report.report_date
-        elif (previous_report and next_report
-                and (next_report.report_date
-                     - previous_report.report_date).days > 7):
-            current_start = next_report.report_date
-
-    instance.user.userprofile.current_streak_start = current_start
-    instance.user.userprofile.longest_streak_start = longest_start
-    instance.user.userprofile.longest_streak_end = longest_end
-    instance.user.userprofile.save()
+    if not instance.is_future_report:
+        defer(update_report_stats, instance.user_id)
@@ -0,0 +1,82 @@
+"""Report streaks of users.
+
+A streak is a run of reports with at most a week between two
+consecutive report dates. The current streak is the latest streak, as
+long as it reaches into the last week, and the longest streak is the
+one spanning the most days. Future reports do not count.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from remo.base.utils import bulk_update, get_date
+
+
+STREAK_GAP = timedelta(days=7)
+STREAK_FIELDS = ['current_streak_start', 'longest_streak_start', 'longest_streak_end']
+
+Streaks = namedtuple('Streaks', STREAK_FIELDS)
+NO_STREAKS = Streaks(None, None, None)
+
+
+def compute_streaks(report_dates, today):
+    """Return the Streaks of the sorted /report_dates/ in a single pass."""
+    start = end = None
+    longest_start = longest_end = None
+    for report_date in report_dates:
+        if report_date > today:
+            break
+        if end is None or report_date - end > STREAK_GAP:
+            start = report_date
+        end = report_date
+        # On a tie the most recent streak is the longest one.
+        if longest_start is None or end - start >= longest_end - longest_start:
+            longest_start, longest_end = start, end
+
+    current_start = None
+    if end and end >= today - STREAK_GAP:
+        current_start = start
+    return Streaks(current_start, longest_start, longest_end)
+
+
+def compute_user_streaks(rows, today):
+    """Return a dict with the Streaks of each user in /rows/.
+
+    /rows/ are (user id, report date) pairs ordered by user and date.
+    """
+    return dict((user_id, compute_streaks([row[1] for row in user_rows], today))
+                for user_id, user_rows in groupby(rows, key=itemgetter(0)))
+
+
+def get_streaks(reports, today=None):
+    """Return the Streaks of the users of the /reports/ queryset with a
+    single query, keyed by user id.
+    """
+    today = today or get_date()
+    rows = (reports.filter(report_date__lte=today)
+            .order_by('user', 'report_date').values_list('user', 'report_date'))
+    return compute_user_streaks(rows.iterator(), today)
+
+
+def set_streaks(profile, streaks):
+    """Assign /streaks/ to /profile/ and return True if they changed."""
+    changed = False
+    for field, value in zip(STREAK_FIELDS, streaks):
+        if getattr(profile, field) != value:
+            setattr(profile, field, value)
+            changed = True
+    return changed
+
+
+def update_streaks(profiles, reports, today=None):
+    """Recompute the streaks of /profiles/ from the /reports/ queryset
+    and save the changed ones with bulk updates.
+
+    Return the number of updated profiles.
+    """
+    streaks = get_streaks(reports, today)
+    changed = [profile for profile in profiles
+               if set_streaks(profile, streaks.get(profile.user_id, NO_STREAKS))]
+    bulk_update(changed, STREAK_FIELDS, batch_size=500)
+    return len(changed)
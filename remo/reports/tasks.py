@@ -1,9 +1,9 @@
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.models import ContentType
-from django.core.mail import send_mail
+from django.core.mail import send_mass_mail
 from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.timezone import make_aware, now
@@ -12,11 +12,16 @@ import pytz
 
 from django_statsd.clients import statsd
 
-from remo.base.utils import get_date
+from remo.base.jobs import job
+from remo.base.utils import get_date, get_object_or_none
 from remo.celery import app
 from remo.dashboard.models import ActionItem
-from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE
-from remo.reports.utils import send_report_notification
+from remo.profiles.models import UserProfile
+from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE, ACTIVITY_POST_EVENT_METRICS
+from remo.reports.streaks import (NO_STREAKS, STREAK_FIELDS, get_streaks, set_streaks,
+                                  update_streaks)
+from remo.reports.utils import (get_last_report_dates, send_report_notification,
+                                set_last_report_date, update_last_report_dates)
 
 
 DIGEST_SUBJECT = 'Your mentee activity for {date}'
@@ -24,6 +29,11 @@ DIGEST_SUBJECT = 'Your mentee activity for {date}'
 
 @app.task
 def send_report_digest():
+    """Send to each mentor a digest of the reports of their mentees.
+
+    The reports of the day are fetched with a single query and grouped
+    by mentor in memory, then all the digests are sent together.
+    """
     from remo.reports.models import NGReport
     today = now().date()
     # This would include reports created today about past events or
@@ -38,19 +48,23 @@ def send_report_digest():
                                               ACTIVITY_EVENT_CREATE,
                                               ACTIVITY_EVENT_ATTEND
                                           ]))
-    reports = reports.distinct()
-    # Since MySQL doesn't support distinct(field), we have to dedup
-    # the list in python.
-    mentors = set(reports.exclude(mentor__isnull=True)
-                  .exclude(mentor__groups__name='Alumni')
-                  .values_list('mentor', flat=True))
-    for mentor_id in mentors:
-        mentor = User.objects.get(id=mentor_id)
-        reports_for_mentor = reports.filter(mentor=mentor)
-        if not reports_for_mentor.exists():
-            continue
-        datestring = today.strftime('%a %d %b %Y')
-        subject = DIGEST_SUBJECT.format(date=datestring)
+    reports = (reports.exclude(mentor__isnull=True)
+               .exclude(mentor__groups__name='Alumni')
+               .select_related('mentor', 'user__userprofile', 'activity', 'campaign', 'event')
+               .order_by('mentor', 'user', 'report_date')
+               .distinct())
+
+    mentors = {}
+    reports_per_mentor = defaultdict(list)
+    for report in reports:
+        mentors[report.mentor_id] = report.mentor
+        reports_per_mentor[report.mentor_id].append(report)
+
+    datestring = today.strftime('%a %d %b %Y')
+    subject = DIGEST_SUBJECT.format(date=datestring)
+    messages = []
+    for mentor_id, reports_for_mentor in reports_per_mentor.items():
+        mentor = mentors[mentor_id]
         ctx_data = {'mentor': mentor,
                     'reports': reports_for_mentor,
                     'datestring': datestring}
@@ -58,7 +72,8 @@ def send_report_digest():
         # Manually replace quotes and double-quotes as these get
         # escaped by the template and this makes the message look bad.
         message = message.replace('&#34;', '"').replace('&#39;', "'")
-        send_mail(subject, message, settings.FROM_EMAIL, [mentor.email])
+        messages.append((subject, message, settings.FROM_EMAIL, [mentor.email]))
+    send_mass_mail(messages)
 
 
 @app.task
@@ -79,10 +94,10 @@ def send_first_report_notification():
                       .exclude(userprofile__date_joined_program__gt=start)
                       .exclude(status__is_unavailable=True))
 
+    inactive_users = list(inactive_users.select_related('userprofile__mentor'))
     send_report_notification(inactive_users, weeks=4)
-    for user in inactive_users:
-        user.userprofile.first_report_notification = today
-        user.userprofile.save()
+    UserProfile.objects.filter(user__in=[user.id for user in inactive_users]).update(
+        first_report_notification=today)
     statsd.incr('reports.send_first_report_notification')
 
 
@@ -104,10 +119,10 @@ def send_second_report_notification():
                       .exclude(userprofile__date_joined_program__gt=start)
                       .exclude(status__is_unavailable=True))
 
+    inactive_users = list(inactive_users.select_related('userprofile__mentor'))
     send_report_notification(inactive_users, weeks=8)
-    for user in inactive_users:
-        user.userprofile.second_report_notification = today
-        user.userprofile.save()
+    UserProfile.objects.filter(user__in=[user.id for user in inactive_users]).update(
+        second_report_notification=today)
     statsd.incr('reports.send_second_report_notification')
 
 
@@ -129,58 +144,92 @@ def zero_current_streak():
 
 @app.task
 def calculate_longest_streaks():
-    """Calculate user's longest streaks."""
+    """Calculate the current and longest streaks of all the reps.
+
+    The report dates of all the reps are loaded with a single query
+    and only the changed profiles are updated. The last report dates
+    are refreshed as well, since future reports become past ones.
+    """
     from remo.reports.models import NGReport
 
-    # Calculate the longest streak only for the users that
-    # submitted a report today and already have a longest streak.
-    reps = (User.objects.filter(
-        groups__name='Rep', ng_reports__created_on__range=[get_date(), now()])
-        .exclude(userprofile__longest_streak_start=None)
-        .exclude(userprofile__longest_streak_end=None))
+    profiles = list(UserProfile.objects.filter(user__groups__name='Rep'))
+    reports = NGReport.objects.filter(user__groups__name='Rep')
+    update_streaks(profiles, reports)
+    update_last_report_dates(profiles, reports)
 
-    for rep in reps:
-        streak_count = 0
-        longest_start = None
-        longest_end = None
-        reports = NGReport.objects.filter(user=rep).order_by('report_date')
-
-        if reports:
-            start = reports[0].report_date
-            end = reports[0].report_date
-
-            for report in reports:
-                try:
-                    next_report = report.get_next_by_report_date(user=rep)
-                except NGReport.DoesNotExist:
-                    if (end - start).days > streak_count:
-                        longest_start = start
-                        longest_end = end
-                    break
-
-                if (next_report.report_date - report.report_date).days > 7:
-                    if (end - start).days > streak_count:
-                        streak_count = (end - start).days
-                        longest_start = start
-                        longest_end = end
-                    start = next_report.report_date
-                end = next_report.report_date
-
-        rep.userprofile.longest_streak_start = longest_start
-        rep.userprofile.longest_streak_end = longest_end
-        rep.userprofile.save()
 
+@job
+def update_report_action_items(report_id):
+    """Create or resolve the verification action item of a saved report."""
+    from remo.reports.models import NGReport, VERIFY_ACTION
 
-@app.task
-def resolve_report_action_items():
-    """Resolve any action items.
+    report = get_object_or_none(NGReport, id=report_id)
+    if not report:
+        return
+    if report.verified_activity:
+        name = u'{0} {1}'.format(VERIFY_ACTION, report.user.get_full_name())
+        ActionItem.resolve(instance=report, user=report.mentor, name=name)
+    else:
+        ActionItem.create(report)
 
-    Mark all unresolved action items with due_date the today date as resolved.
-    """
+
+@job
+def update_report_stats(user_id):
+    """Update the last report date and the streak counters of a user."""
     from remo.reports.models import NGReport
 
-    action_model = ContentType.objects.get_for_model(NGReport)
-    items = ActionItem.objects.filter(content_type=action_model,
-                                      resolved=False,
-                                      due_date=now().date())
-    items.update(resolved=True)
+    profile = get_object_or_none(UserProfile, user_id=user_id)
+    if not profile:
+        return
+    today = get_date()
+    reports = NGReport.objects.filter(user=user_id)
+    last_report_dates = get_last_report_dates(reports, today)
+    changed = set_last_report_date(profile, last_report_dates.get(user_id))
+    changed = set_streaks(profile, get_streaks(reports, today).get(user_id, NO_STREAKS)) or changed
+    if changed:
+        profile.save(update_fields=['last_report_date'] + STREAK_FIELDS)
+
+
+@job
+def update_passive_event_report(event_id):
+    """Create or update the passive reports of a saved event."""
+    # Avoid circular dependency
+    from remo.events.models import Event
+    from remo.events.templatetags.helpers import get_event_link
+    from remo.reports.models import Activity, NGReport
+
+    event = get_object_or_none(Event, id=event_id)
+    if not event:
+        return
+    attrs = {
+        'report_date': event.start.date(),
+        'longitude': event.lon,
+        'latitude': event.lat,
+        'location': "%s, %s, %s" % (event.city,
+                                    event.region,
+                                    event.country),
+        'link': get_event_link(event),
+        'activity_description': event.description,
+        'is_passive': True,
+        'event': event,
+        'campaign': event.campaign,
+        'country': event.country
+    }
+
+    reports = NGReport.objects.filter(event=event)
+    if not reports.filter(activity__name=ACTIVITY_EVENT_CREATE).exists():
+        activity = Activity.objects.get(name=ACTIVITY_EVENT_CREATE)
+        attrs.update({'user': event.owner,
+                      'activity': activity})
+
+        report = NGReport.objects.create(**attrs)
+        report.functional_areas.add(*event.categories.all())
+        statsd.incr('reports.create_passive_event')
+    else:
+        reports = reports.exclude(activity__name=ACTIVITY_POST_EVENT_METRICS)
+        reports.update(**attrs)
+        # Change user and mentor to the appropriate reports
+        attrs.update({'user': event.owner,
+                      'mentor': event.owner.userprofile.mentor})
+        reports.exclude(activity__name=ACTIVITY_EVENT_ATTEND).update(**attrs)
+        statsd.incr('reports.update_passive_event')
@@ -10,10 +10,11 @@ from nose.tools import eq_, ok_
 
 from remo.base.tests import RemoTestCase
 from remo.events.templatetags.helpers import get_event_link
+from remo.events.models import Event
 from remo.events.tests import EventFactory, AttendanceFactory
-from remo.profiles.tests import UserFactory
+from remo.profiles.tests import FunctionalAreaFactory, UserFactory
 from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE
-from remo.reports.models import Activity, NGReport
+from remo.reports.models import Activity, NGReport, update_passive_report_functional_areas
 from remo.reports.tests import ActivityFactory, NGReportFactory, NGReportCommentFactory
 
 
@@ -43,6 +44,7 @@ class NGReportTest(RemoTestCase):
         for i in range(0, 2):
             NGReportFactory.create(user=user, report_date=today - datetime.timedelta(days=i))
 
+        user = User.objects.get(pk=user.id)
         eq_(user.userprofile.current_streak_start, today - datetime.timedelta(days=1))
         eq_(user.userprofile.longest_streak_start, today - datetime.timedelta(days=1))
         eq_(user.userprofile.longest_streak_end, today)
@@ -59,6 +61,7 @@ class NGReportTest(RemoTestCase):
         for i in range(0, 2):
             NGReportFactory.create(user=user, report_date=today - datetime.timedelta(days=i))
 
+        user = User.objects.get(pk=user.id)
         eq_(user.userprofile.current_streak_start, today - datetime.timedelta(days=1))
         eq_(user.userprofile.longest_streak_start, past_day - datetime.timedelta(days=2))
         eq_(user.userprofile.longest_streak_end, past_day)
@@ -72,6 +75,23 @@ class NGReportTest(RemoTestCase):
 
         ok_(not user.userprofile.current_streak_start)
 
+    def test_last_report_date(self):
+        today = now().date()
+        user = UserFactory.create()
+        NGReportFactory.create(user=user, report_date=today - datetime.timedelta(days=3))
+        NGReportFactory.create(user=user, report_date=today + datetime.timedelta(days=3))
+        user = User.objects.get(pk=user.id)
+        eq_(user.userprofile.last_report_date, today - datetime.timedelta(days=3))
+
+    def test_last_report_date_moved_to_future(self):
+        today = now().date()
+        user = UserFactory.create()
+        report = NGReportFactory.create(user=user, report_date=today)
+        eq_(User.objects.get(pk=user.id).userprofile.last_report_date, today)
+        report.report_date = today + datetime.timedelta(days=3)
+        report.save()
+        eq_(User.objects.get(pk=user.id).userprofile.last_report_date, None)
+
 
 class NGReportComment(RemoTestCase):
     def test_get_absolute_delete_url(self):
@@ -224,6 +244,32 @@ class NGReportEventCreationSignalTests(RemoTestCase):
                                  [e.name for e in categories.all()[:1]],
                                  lambda x: x.name)
 
+    # The rollups are tested along with the KPIs.
+    @mock.patch('remo.api.rollups.update_rollups')
+    def test_propagate_functional_areas_in_bulk(self, mocked_update_rollups):
+        event = EventFactory.create()
+        NGReportFactory.create_batch(3, event=event)
+        areas = FunctionalAreaFactory.create_batch(2)
+        area_ids = set(area.id for area in areas)
+        reports = NGReport.objects.filter(event=event)
+
+        # The reports, the inserted areas and the reports of the rollups.
+        with self.assertNumQueries(3):
+            update_passive_report_functional_areas(
+                sender=Event.categories.through, instance=event, action='post_add',
+                reverse=False, pk_set=area_ids)
+        for report in reports:
+            ok_(area_ids <= set(report.functional_areas.values_list('id', flat=True)))
+
+        # The removed rows, their deletion and the reports of the rollups.
+        with self.assertNumQueries(3):
+            update_passive_report_functional_areas(
+                sender=Event.categories.through, instance=event, action='post_remove',
+                reverse=False, pk_set=set([areas[0].id]))
+        for report in reports:
+            ok_(areas[0] not in report.functional_areas.all())
+            ok_(areas[1] in report.functional_areas.all())
+
 
 class NGReportCommentSignalTests(RemoTestCase):
 
@@ -283,23 +329,33 @@ class NGReportCommentSignalTests(RemoTestCase):
 
 class NGReportDeleteSignalTests(RemoTestCase):
 
+    def test_last_report_date(self):
+        today = now().date()
+        user = UserFactory.create()
+        NGReportFactory.create(user=user, report_date=today - datetime.timedelta(days=3))
+        report = NGReportFactory.create(user=user, report_date=today)
+        report.delete()
+        user = User.objects.get(pk=user.id)
+        eq_(user.userprofile.last_report_date, today - datetime.timedelta(days=3))
+
     def test_current_streak_oldest_report(self):
         """Update current and longest streak counters when the oldest
         report out of two is deleted.
         """
 
         user = UserFactory.create()
-        up = user.userprofile
         today = now().date()
         report = NGReportFactory.create(
             user=user, report_date=today - datetime.timedelta(days=1))
         NGReportFactory.create(user=user, report_date=today)
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_end, today)
 
         report.delete()
 
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, today)
         eq_(up.longest_streak_start, today)
         eq_(up.longest_streak_end, today)
@@ -310,17 +366,18 @@ class NGReportDeleteSignalTests(RemoTestCase):
         """
 
         user = UserFactory.create()
-        up = user.userprofile
         today = now().date()
         NGReportFactory.create(user=user,
                                report_date=today - datetime.timedelta(days=1))
         report = NGReportFactory.create(user=user, report_date=today)
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_end, today)
 
         report.delete()
 
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_end, today - datetime.timedelta(days=1))
@@ -329,11 +386,11 @@ class NGReportDeleteSignalTests(RemoTestCase):
         """Update current and longest streak when all reports are deleted."""
 
         user = UserFactory.create()
-        up = user.userprofile
         today = now().date()
         report1 = NGReportFactory.create(
             user=user, report_date=today - datetime.timedelta(days=1))
         report2 = NGReportFactory.create(user=user, report_date=today)
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_start, today - datetime.timedelta(days=1))
         eq_(up.longest_streak_end, today)
@@ -341,11 +398,12 @@ class NGReportDeleteSignalTests(RemoTestCase):
         report1.delete()
         report2.delete()
 
+        up = User.objects.get(pk=user.id).userprofile
         ok_(not up.current_streak_start)
         ok_(not up.longest_streak_start)
         ok_(not up.longest_streak_end)
 
-    @mock.patch('remo.reports.models.get_date')
+    @mock.patch('remo.reports.tasks.get_date')
     def test_longest_streak(self, mocked_date):
         """Update current and longest streak counters when the fourth
         report out of five is deleted.
@@ -353,7 +411,6 @@ class NGReportDeleteSignalTests(RemoTestCase):
 
         mocked_date.return_value = datetime.date(2011, 1, 29)
         user = UserFactory.create()
-        up = user.userprofile
         start_date = datetime.date(2011, 1, 1)
         end_date = datetime.date(2011, 1, 29)
         # Create 5 reports
@@ -362,6 +419,7 @@ class NGReportDeleteSignalTests(RemoTestCase):
                 user=user,
                 report_date=end_date - datetime.timedelta(weeks=i))
 
+        up = User.objects.get(pk=user.id).userprofile
         eq_(up.current_streak_start, start_date)
         eq_(up.longest_streak_start, start_date)
         eq_(up.longest_streak_end, end_date)
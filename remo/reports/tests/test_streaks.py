@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+from nose.tools import eq_
+
+from remo.base.tests import RemoTestCase
+from remo.profiles.models import UserProfile
+from remo.profiles.tests import UserFactory
+from remo.reports.models import NGReport
+from remo.reports.streaks import NO_STREAKS, compute_streaks, compute_user_streaks, update_streaks
+from remo.reports.tests import NGReportFactory
+
+
+class ComputeStreaksTest(RemoTestCase):
+    today = date(2015, 6, 30)
+
+    def get_dates(self, *days_ago):
+        return sorted(self.today - timedelta(days=days) for days in days_ago)
+
+    def test_no_reports(self):
+        eq_(compute_streaks([], self.today), NO_STREAKS)
+
+    def test_current_and_longest(self):
+        dates = self.get_dates(100, 93, 86, 79, 3, 0)
+        streaks = compute_streaks(dates, self.today)
+        eq_(streaks.current_streak_start, self.today - timedelta(days=3))
+        eq_(streaks.longest_streak_start, self.today - timedelta(days=100))
+        eq_(streaks.longest_streak_end, self.today - timedelta(days=79))
+
+    def test_gap_longer_than_a_week(self):
+        dates = self.get_dates(30, 22, 14, 8)
+        streaks = compute_streaks(dates, self.today)
+        eq_(streaks.current_streak_start, None)
+        eq_(streaks.longest_streak_start, self.today - timedelta(days=14))
+        eq_(streaks.longest_streak_end, self.today - timedelta(days=8))
+
+    def test_tie_prefers_latest_streak(self):
+        dates = self.get_dates(30, 28, 2, 0)
+        streaks = compute_streaks(dates, self.today)
+        eq_(streaks.current_streak_start, self.today - timedelta(days=2))
+        eq_(streaks.longest_streak_start, self.today - timedelta(days=2))
+        eq_(streaks.longest_streak_end, self.today)
+
+    def test_future_reports(self):
+        dates = self.get_dates(1, -1, -7)
+        streaks = compute_streaks(dates, self.today)
+        eq_(streaks, (self.today - timedelta(days=1),) * 3)
+
+    def test_per_user(self):
+        rows = [(1, self.today - timedelta(days=1)), (1, self.today),
+                (2, self.today - timedelta(days=20))]
+        streaks = compute_user_streaks(rows, self.today)
+        eq_(streaks[1].longest_streak_start, self.today - timedelta(days=1))
+        eq_(streaks[2].current_streak_start, None)
+
+
+class UpdateStreaksTest(RemoTestCase):
+
+    def test_bulk_update(self):
+        today = date.today()
+        users = UserFactory.create_batch(3, groups=['Rep'])
+        for user in users:
+            for i in range(3):
+                NGReportFactory.create(user=user, report_date=today - timedelta(weeks=i))
+        UserProfile.objects.update(current_streak_start=None, longest_streak_start=None,
+                                   longest_streak_end=None)
+
+        profiles = list(UserProfile.objects.filter(user__in=users))
+        # Report dates and profiles update.
+        with self.assertNumQueries(2):
+            eq_(update_streaks(profiles, NGReport.objects.all()), 3)
+
+        for profile in UserProfile.objects.filter(user__in=users):
+            eq_(profile.current_streak_start, today - timedelta(weeks=2))
+            eq_(profile.longest_streak_start, today - timedelta(weeks=2))
+            eq_(profile.longest_streak_end, today)
+
+        with self.assertNumQueries(1):
+            eq_(update_streaks(profiles, NGReport.objects.all()), 0)
@@ -2,14 +2,16 @@ from datetime import date, datetime, timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core import mail
 from django.utils.timezone import now
 
-from mock import ANY as mockany, call, patch
+from mock import patch
 from nose.tools import eq_, ok_
 
 from remo.base.tests import RemoTestCase
 from remo.base.utils import get_date
 from remo.events.tests import EventFactory
+from remo.profiles.models import UserProfile
 from remo.profiles.tests import UserFactory, UserStatusFactory
 from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE
 from remo.reports.models import Activity, NGReport
@@ -36,7 +38,7 @@ class SendReportDigestTests(RemoTestCase):
             datetime_now.return_value = datetime(2014, 1, 1)
             with patch('remo.reports.tasks.render_to_string') as render_mock:
                 render_mock.return_value = 'rendered'
-                with patch('remo.reports.tasks.send_mail') as send_mail_mock:
+                with patch('remo.reports.tasks.send_mass_mail') as send_mail_mock:
                     with patch('remo.reports.tasks.DIGEST_SUBJECT', '{date}'):
                         send_report_digest()
 
@@ -45,9 +47,21 @@ class SendReportDigestTests(RemoTestCase):
         eq_(set(call_args[1]['reports']), set([report_1, report_2]))
         eq_(call_args[1]['datestring'], 'Wed 01 Jan 2014')
 
-        send_mail_mock.assert_called_with('Wed 01 Jan 2014', 'rendered',
-                                          settings.FROM_EMAIL,
-                                          [mentor.email])
+        send_mail_mock.assert_called_with([('Wed 01 Jan 2014', 'rendered',
+                                            settings.FROM_EMAIL,
+                                            [mentor.email])])
+
+    def test_single_query(self):
+        mentors = UserFactory.create_batch(3, groups=['Mentor'])
+        for mentor in mentors:
+            NGReportFactory.create_batch(2, mentor=mentor, report_date=now().date())
+
+        with self.assertNumQueries(1):
+            send_report_digest()
+
+        eq_(len(mail.outbox), 3)
+        eq_(set(message.to[0] for message in mail.outbox),
+            set(mentor.email for mentor in mentors))
 
     def test_other_dates_noevent_not_included(self):
         """Reports created on previous days should not be included.
@@ -61,9 +75,9 @@ class SendReportDigestTests(RemoTestCase):
         report = NGReportFactory.create(report_date=today)
         report.created_on = date(2014, 1, 1)
         report.save()
-        with patch('remo.reports.tasks.send_mail') as send_mail_mock:
+        with patch('remo.reports.tasks.send_mass_mail') as send_mail_mock:
             send_report_digest()
-        ok_(not send_mail_mock.called)
+        eq_(send_mail_mock.call_args[0][0], [])
 
     def test_other_dates_event_included(self):
         """Reports for today's events should be included."""
@@ -78,9 +92,9 @@ class SendReportDigestTests(RemoTestCase):
                                         mentor=mentor)
         report.created_on = date(2014, 1, 1)
         report.save()
-        with patch('remo.reports.tasks.send_mail') as send_mail_mock:
+        with patch('remo.reports.tasks.send_mass_mail') as send_mail_mock:
             send_report_digest()
-        ok_(send_mail_mock.called)
+        eq_(len(send_mail_mock.call_args[0][0]), 1)
 
 
 class SendInactivityNotifications(RemoTestCase):
@@ -95,16 +109,18 @@ class SendInactivityNotifications(RemoTestCase):
         rep_subject = '[Reminder] Please share your recent activities'
         mentor_subject = '[Report] Mentee without report for the last 4 weeks'
 
-        with patch('remo.reports.utils.send_remo_mail') as mail_mock:
-            send_first_report_notification()
+        send_first_report_notification()
 
-        eq_(mail_mock.call_count, 2)
-        expected_call_list = [
-            call(subject=rep_subject, recipients_list=[rep.email], message=mockany,
-                 sender=mentor.email),
-            call(subject=mentor_subject, recipients_list=[mentor.email], message=mockany,
-                 sender=rep.email)]
-        eq_(mail_mock.call_args_list, expected_call_list)
+        eq_(len(mail.outbox), 2)
+        eq_(mail.outbox[0].subject, rep_subject)
+        eq_(mail.outbox[0].to, [rep.email])
+        eq_(mail.outbox[0].cc, [mentor.email])
+        eq_(mail.outbox[0].extra_headers, {'Reply-To': mentor.email})
+        eq_(mail.outbox[1].subject, mentor_subject)
+        eq_(mail.outbox[1].to, [mentor.email])
+        eq_(mail.outbox[1].cc, [rep.email])
+        eq_(mail.outbox[1].extra_headers, {'Reply-To': rep.email})
+        eq_(User.objects.get(pk=rep.pk).userprofile.first_report_notification, today)
 
     def test_with_report_filled(self):
         mentor = UserFactory.create(groups=['Mentor'])
@@ -112,9 +128,8 @@ class SendInactivityNotifications(RemoTestCase):
         rep = UserFactory.create(groups=['Rep'], userprofile__mentor=mentor)
         NGReportFactory.create(user=rep, report_date=today - timedelta(weeks=2))
 
-        with patch('remo.reports.utils.send_remo_mail') as mail_mock:
-            send_second_report_notification()
-        ok_(not mail_mock.called)
+        send_second_report_notification()
+        eq_(len(mail.outbox), 0)
 
     def test_with_no_report_filled_and_one_notification(self):
         mentor = UserFactory.create(groups=['Mentor'])
@@ -127,17 +142,13 @@ class SendInactivityNotifications(RemoTestCase):
         rep_subject = '[Reminder] Please share your recent activities'
         mentor_subject = '[Report] Mentee without report for the last 8 weeks'
 
-        with patch('remo.reports.utils.send_remo_mail') as mail_mock:
-            send_second_report_notification()
+        send_second_report_notification()
 
-        eq_(mail_mock.call_count, 2)
-        expected_call_list = [
-            call(subject=rep_subject, recipients_list=[rep.email], message=mockany,
-                 sender=mentor.email),
-            call(subject=mentor_subject, recipients_list=[mentor.email], message=mockany,
-                 sender=rep.email)
-        ]
-        eq_(mail_mock.call_args_list, expected_call_list)
+        eq_(len(mail.outbox), 2)
+        eq_([message.subject for message in mail.outbox], [rep_subject, mentor_subject])
+        eq_([message.to for message in mail.outbox], [[rep.email], [mentor.email]])
+        eq_([message.cc for message in mail.outbox], [[mentor.email], [rep.email]])
+        eq_(User.objects.get(pk=rep.pk).userprofile.second_report_notification, today)
 
     def test_with_user_unavailable(self):
         mentor = UserFactory.create(groups=['Mentor'])
@@ -148,11 +159,12 @@ class SendInactivityNotifications(RemoTestCase):
         UserStatusFactory.create(user=rep)
         NGReportFactory.create(user=rep,
                                report_date=today - timedelta(weeks=5))
+        # Ignore the unavailability notifications.
+        mail.outbox = []
 
-        with patch('remo.reports.utils.send_remo_mail') as mail_mock:
-            send_first_report_notification()
+        send_first_report_notification()
 
-        ok_(not mail_mock.called)
+        eq_(len(mail.outbox), 0)
 
     def test_with_alumnus_mentor(self):
         mentor = UserFactory.create(groups=['Mentor', 'Alumni'])
@@ -165,12 +177,31 @@ class SendInactivityNotifications(RemoTestCase):
 
         rep_subject = '[Reminder] Please share your recent activities'
 
-        with patch('remo.reports.utils.send_remo_mail') as mail_mock:
-            send_first_report_notification()
+        send_first_report_notification()
 
-        eq_(mail_mock.call_count, 1)
-        expected_call_list = [call(rep_subject, [rep.email], message=mockany)]
-        eq_(mail_mock.call_args_list, expected_call_list)
+        eq_(len(mail.outbox), 1)
+        eq_(mail.outbox[0].subject, rep_subject)
+        eq_(mail.outbox[0].to, [rep.email])
+        eq_(mail.outbox[0].cc, [])
+
+    def test_batches_over_one_connection(self):
+        today = now().date()
+        mentor = UserFactory.create(groups=['Mentor'])
+        reps = UserFactory.create_batch(
+            5, groups=['Rep'], userprofile__mentor=mentor,
+            userprofile__date_joined_program=get_date(days=-100))
+        for rep in reps:
+            NGReportFactory.create(user=rep, report_date=today - timedelta(weeks=5))
+
+        with patch('remo.reports.utils.MAIL_CHUNK_SIZE', 2):
+            with patch('remo.reports.utils.get_connection') as get_connection_mock:
+                send_first_report_notification()
+
+        get_connection_mock.assert_called_once_with()
+        send_messages = get_connection_mock().send_messages
+        eq_([len(args[0][0]) for args in send_messages.call_args_list], [4, 4, 2])
+        eq_(UserProfile.objects.filter(user__in=reps,
+                                       first_report_notification=today).count(), 5)
 
 
 class UpdateCurrentStreakCountersTest(RemoTestCase):
@@ -195,6 +226,7 @@ class UpdateStreakCountersTaskTest(RemoTestCase):
             NGReportFactory.create(user=user, report_date=report_date)
 
         calculate_longest_streaks()
+        user = User.objects.get(pk=user.id)
         eq_(user.userprofile.longest_streak_start, date(2011, 1, 1))
         eq_(user.userprofile.longest_streak_end, date(2011, 1, 22))
 
@@ -204,6 +236,7 @@ class UpdateStreakCountersTaskTest(RemoTestCase):
             report_date = date.today() - timedelta(weeks=i)
             NGReportFactory.create(user=user, report_date=report_date)
 
+        user = User.objects.get(pk=user.id)
         eq_(user.userprofile.longest_streak_start,
             date.today() - timedelta(weeks=2))
         eq_(user.userprofile.longest_streak_end, date.today())
@@ -224,6 +257,7 @@ class UpdateStreakCountersTaskTest(RemoTestCase):
             report_date = date.today() - timedelta(weeks=i)
             NGReportFactory.create(user=user, report_date=report_date)
 
+        user = User.objects.get(pk=user.id)
         eq_(user.userprofile.longest_streak_start,
             date.today() - timedelta(weeks=3))
         eq_(user.userprofile.longest_streak_end, date.today())
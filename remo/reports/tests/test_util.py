@@ -1,5 +1,6 @@
 from datetime import timedelta
 
+from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.utils.timezone import now
 
@@ -9,9 +10,12 @@ from nose.tools import eq_, ok_
 from remo.base.templatetags.helpers import urlparams
 from remo.base.tests import RemoTestCase
 from remo.base.utils import month2number
+from remo.profiles.models import UserProfile
 from remo.profiles.tests import UserFactory
+from remo.reports.models import NGReport
 from remo.reports.tests import NGReportFactory
-from remo.reports.utils import count_user_ng_reports, get_last_report
+from remo.reports.utils import (count_user_ng_reports, get_last_report,
+                                update_last_report_dates)
 
 
 class TestUserCommitedReports(RemoTestCase):
@@ -23,6 +27,7 @@ class TestUserCommitedReports(RemoTestCase):
             NGReportFactory.create(user=user,
                                    report_date=(now().date()
                                                 - timedelta(days=i)))
+        user = User.objects.get(pk=user.id)
         eq_(count_user_ng_reports(user, current_streak=True), 4)
 
     def test_longest_streak(self):
@@ -38,6 +43,7 @@ class TestUserCommitedReports(RemoTestCase):
             NGReportFactory.create(user=user,
                                    report_date=(now().date()
                                                 - timedelta(days=i)))
+        user = User.objects.get(pk=user.id)
         eq_(count_user_ng_reports(user, longest_streak=True), 7)
 
     def test_get_last_two_weeks_reports(self):
@@ -97,3 +103,31 @@ class GetUserLastReportTest(RemoTestCase):
         future_date = now().date() + timedelta(weeks=2)
         NGReportFactory.create(user=user, report_date=future_date)
         ok_(not get_last_report(user))
+
+
+class UpdateLastReportDatesTest(RemoTestCase):
+
+    def test_bulk_update(self):
+        today = now().date()
+        user, other_user, user_without_reports = UserFactory.create_batch(3)
+        NGReportFactory.create(user=user, report_date=today - timedelta(days=2))
+        NGReportFactory.create(user=other_user, report_date=today - timedelta(days=5))
+        NGReportFactory.create(user=other_user, report_date=today + timedelta(days=2))
+        UserProfile.objects.update(last_report_date=None)
+
+        profiles = list(UserProfile.objects.filter(
+            user__in=[user, other_user, user_without_reports]))
+        # Last report dates and profiles update.
+        with self.assertNumQueries(2):
+            eq_(update_last_report_dates(profiles, NGReport.objects.all()), 2)
+        eq_(UserProfile.objects.get(user=user).last_report_date, today - timedelta(days=2))
+        eq_(UserProfile.objects.get(user=other_user).last_report_date,
+            today - timedelta(days=5))
+        eq_(UserProfile.objects.get(user=user_without_reports).last_report_date, None)
+
+        # Future reports are counted once they are in the past.
+        profiles = list(UserProfile.objects.filter(user=other_user))
+        eq_(update_last_report_dates(profiles, NGReport.objects.all(),
+                                     today + timedelta(days=2)), 1)
+        eq_(UserProfile.objects.get(user=other_user).last_report_date,
+            today + timedelta(days=2))
@@ -1,11 +1,13 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.core.mail import get_connection
+from django.db.models import Max
+from django.template.loader import get_template
 from django.utils.timezone import now
 
-from remo.base.tasks import send_remo_mail
-from remo.base.utils import get_date
+from remo.base.tasks import MAIL_CHUNK_SIZE, build_remo_message
+from remo.base.utils import bulk_update, get_date
 from remo.reports.models import NGReport
 
 
@@ -45,29 +47,74 @@ def get_last_report(user):
         return None
 
 
+def get_last_report_dates(reports, today=None):
+    """Return the date of the last past report of each user in /reports/.
+
+    The result maps user ids to dates, users without past reports are
+    missing.
+    """
+    today = today or get_date()
+    rows = (reports.filter(report_date__lte=today).order_by()
+            .values_list('user').annotate(Max('report_date')))
+    return dict(rows)
+
+
+def set_last_report_date(profile, last_report_date):
+    """Set the last report date of /profile/ and return if it changed."""
+    if profile.last_report_date == last_report_date:
+        return False
+    profile.last_report_date = last_report_date
+    return True
+
+
+def update_last_report_dates(profiles, reports, today=None):
+    """Update the last report date of /profiles/ from /reports/.
+
+    Only the changed profiles are saved, with bulk UPDATE queries.
+    Return the number of changed profiles.
+    """
+    last_report_dates = get_last_report_dates(reports, today)
+    changed = [profile for profile in profiles
+               if set_last_report_date(profile, last_report_dates.get(profile.user_id))]
+    bulk_update(changed, ['last_report_date'], batch_size=500)
+    return len(changed)
+
+
 def send_report_notification(reps, weeks):
-    """Send notification to inactive reps."""
+    """Send notification to inactive reps and their mentors.
+
+    The messages are sent in batches of MAIL_CHUNK_SIZE reps over a
+    single connection. /reps/ should select their profile and mentor.
+    """
     rep_subject = '[Reminder] Please share your recent activities'
-    rep_mail_body = 'emails/reps_ng_report_notification.jinja'
+    rep_template = get_template('emails/reps_ng_report_notification.jinja')
     mentor_subject = ('[Report] Mentee without report for the last %d weeks'
                       % weeks)
-    mentor_mail_body = 'emails/mentor_ng_report_notification.jinja'
-
-    for rep in reps:
-        mentor = rep.userprofile.mentor
-        ctx_data = {'mentor': mentor,
-                    'user': rep,
-                    'SITE_URL': settings.SITE_URL,
-                    'weeks': weeks}
-
-        rep_message = render_to_string(rep_mail_body, ctx_data)
-        mentor_message = render_to_string(mentor_mail_body, ctx_data)
-        if mentor:
-            send_remo_mail(subject=rep_subject, recipients_list=[rep.email],
-                           sender=mentor.email, message=rep_message)
-            send_remo_mail(subject=mentor_subject,
-                           recipients_list=[mentor.email],
-                           sender=rep.email,
-                           message=mentor_message)
-        else:
-            send_remo_mail(rep_subject, [rep.email], message=rep_message)
+    mentor_template = get_template('emails/mentor_ng_report_notification.jinja')
+
+    reps = list(reps)
+    connection = get_connection()
+    connection.open()
+    try:
+        for i in range(0, len(reps), MAIL_CHUNK_SIZE):
+            messages = []
+            for rep in reps[i:i + MAIL_CHUNK_SIZE]:
+                mentor = rep.userprofile.mentor
+                ctx_data = {'mentor': mentor,
+                            'user': rep,
+                            'SITE_URL': settings.SITE_URL,
+                            'weeks': weeks}
+
+                rep_message = rep_template.render(ctx_data)
+                if mentor:
+                    mentor_message = mentor_template.render(ctx_data)
+                    messages.append(build_remo_message(
+                        rep_subject, rep.email, rep_message, sender=mentor.email))
+                    messages.append(build_remo_message(
+                        mentor_subject, mentor.email, mentor_message, sender=rep.email))
+                else:
+                    messages.append(build_remo_message(
+                        rep_subject, rep.email, rep_message))
+            connection.send_messages(messages)
+    finally:
+        connection.close()
@@ -3,7 +3,6 @@ from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.paginator import EmptyPage, InvalidPage, Paginator
 from django.core.urlresolvers import reverse
-from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.timezone import now
@@ -14,10 +13,11 @@ from django_statsd.clients import statsd
 import forms
 from remo.base.decorators import permission_check
 from remo.base.templatetags.helpers import urlparams
-from remo.base.utils import month2number
+from remo.base.utils import month2number, user_in_groups
 from remo.profiles.models import FunctionalArea, UserProfile
 from remo.reports import ACTIVITY_CAMPAIGN, UNLISTED_ACTIVITIES
 from remo.reports.models import NGReport, NGReportComment
+from remo.search.index import search
 
 
 # New reporting system
@@ -121,9 +121,8 @@ def view_ng_report(request, display_name, year, month, day=None, id=None):
         else:
             verification_form = forms.NGVerifyReportForm(request.POST, instance=report)
             if verification_form.is_valid():
-                if ((not request.user.is_authenticated())
-                    or (not request.user.groups.filter(
-                        Q(name='Council') | Q(name='Mentor')).exists())):
+                if (not request.user.is_authenticated()
+                        or not user_in_groups(request.user, 'Council', 'Mentor')):
                     messages.error(request, 'Permission denied.')
                     return redirect('main')
                 if verification_form.cleaned_data['verified_activity']:
@@ -199,26 +198,8 @@ def list_ng_reports(request, mentor=None, rep=None, functional_area_slug=None):
         report_list = report_list.filter(report_date__year=year, report_date__month=month)
 
     if 'query' in request.GET:
-        query = request.GET['query'].strip()
-        report_list = report_list.filter(
-            Q(ngreportcomment__comment__icontains=query)
-            | Q(activity__name__icontains=query)
-            | Q(activity_description__icontains=query)
-            | Q(campaign__name__icontains=query)
-            | Q(functional_areas__name__icontains=query)
-            | Q(location__icontains=query)
-            | Q(link__icontains=query)
-            | Q(link_description__icontains=query)
-            | Q(user__first_name__icontains=query)
-            | Q(user__last_name__icontains=query)
-            | Q(user__userprofile__local_name__icontains=query)
-            | Q(user__userprofile__display_name__icontains=query)
-            | Q(mentor__first_name__icontains=query)
-            | Q(mentor__last_name__icontains=query)
-            | Q(mentor__userprofile__local_name__icontains=query)
-            | Q(mentor__userprofile__display_name__icontains=query))
-
-    report_list = report_list.distinct()
+        report_list = search(report_list, request.GET['query'])
+
     number_of_reports = report_list.count()
 
     sort_key = request.GET.get('sort_key', LIST_NG_REPORTS_DEFAULT_SORT)
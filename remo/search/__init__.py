@@ -0,0 +1 @@
+default_app_config = 'remo.search.apps.SearchConfig'
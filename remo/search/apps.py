@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    name = 'remo.search'
+    label = 'search'
+    verbose_name = 'ReMo Search'
+
+    def ready(self):
+        # Connect the signals maintaining the search index.
+        import remo.search.index  # noqa
@@ -0,0 +1,361 @@
+"""Search index of the reports, events and reps.
+
+The fields of every indexed object are split into terms, their lower
+case words, which are stored along with the weight of the fields they
+were found in. An object matches a query when every word of the query
+starts one of its terms, which the database answers from the index of
+the terms instead of scanning the joined fields of all the objects.
+
+The index is updated from the signals of the indexed models. The
+rebuild_search_index command indexes every object again.
+"""
+import re
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from remo.base.jobs import defer
+from remo.base.utils import iterate_in_chunks
+from remo.events.models import Event
+from remo.profiles.models import UserProfile
+from remo.reports.models import NGReport, NGReportComment
+from remo.search.models import TERM_MAX_LENGTH, SearchEntry
+
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+INDEX_CHUNK_SIZE = 500
+
+
+def get_terms(text):
+    """Return the terms of /text/.
+
+    Both the whitespace separated words, to match emails and links as
+    a whole, and their alphanumeric parts are terms.
+    """
+    text = text.lower()
+    words = set(text.split())
+    words.update(WORD_RE.findall(text))
+    return set(word[:TERM_MAX_LENGTH] for word in words)
+
+
+def get_query_terms(query):
+    """Return the distinct words of /query/ as terms."""
+    return sorted(set(word[:TERM_MAX_LENGTH] for word in query.lower().split()))
+
+
+def get_user_fields(user, weight, emails=False):
+    """Return the names of /user/ as fields of /weight/.
+
+    The emails of the user are returned too when /emails/ is True.
+    """
+    fields = [(user.first_name, weight), (user.last_name, weight)]
+    if emails:
+        fields.append((user.email, weight))
+    try:
+        profile = user.userprofile
+    except UserProfile.DoesNotExist:
+        return fields
+    fields += [(profile.display_name, weight), (profile.local_name, weight)]
+    if emails:
+        fields.append((profile.private_email, weight))
+    return fields
+
+
+class Document(object):
+    """The indexed fields of a model.
+
+    The objects are indexed with the related objects in select_related
+    and prefetch_related.
+    """
+    model = None
+    select_related = []
+    prefetch_related = []
+
+    def get_queryset(self, queryset):
+        return (queryset.select_related(*self.select_related)
+                .prefetch_related(*self.prefetch_related))
+
+    def get_fields(self, obj):
+        """Return the (text, weight) pairs of the fields of /obj/."""
+        raise NotImplementedError
+
+    def get_term_weights(self, obj):
+        """Return a dict of the terms of /obj/ and their weight."""
+        weights = defaultdict(int)
+        for text, weight in self.get_fields(obj):
+            for term in get_terms(text or u''):
+                weights[term] += weight
+        return weights
+
+
+class ReportDocument(Document):
+    model = NGReport
+    select_related = ['activity', 'campaign', 'user__userprofile', 'mentor__userprofile']
+    prefetch_related = ['functional_areas', 'ngreportcomment_set']
+
+    def get_fields(self, report):
+        fields = [(report.activity.name, 2),
+                  (report.activity_description, 1),
+                  (report.location, 1),
+                  (report.link, 1),
+                  (report.link_description, 1)]
+        if report.campaign:
+            fields.append((report.campaign.name, 2))
+        fields += [(area.name, 2) for area in report.functional_areas.all()]
+        fields += [(comment.comment, 1) for comment in report.ngreportcomment_set.all()]
+        fields += get_user_fields(report.user, 3)
+        if report.mentor:
+            fields += get_user_fields(report.mentor, 1)
+        return fields
+
+
+class EventDocument(Document):
+    model = Event
+    select_related = ['owner__userprofile']
+
+    def get_fields(self, event):
+        fields = [(event.name, 3),
+                  (event.country, 2),
+                  (event.region, 2),
+                  (event.city, 2)]
+        return fields + get_user_fields(event.owner, 1, emails=True)
+
+
+class RepDocument(Document):
+    model = User
+    # The indexed fields of users and their profiles.
+    user_fields = ['first_name', 'last_name', 'email']
+    profile_fields = ['display_name', 'local_name', 'irc_name', 'private_email', 'country',
+                      'region', 'city', 'mozillians_profile_url']
+    select_related = ['userprofile']
+    prefetch_related = ['userprofile__functional_areas', 'userprofile__mobilising_skills',
+                        'userprofile__mobilising_interests']
+
+    def get_fields(self, user):
+        fields = get_user_fields(user, 3) + [(user.email, 2)]
+        try:
+            profile = user.userprofile
+        except UserProfile.DoesNotExist:
+            return fields
+        fields += [(profile.irc_name, 2),
+                   (profile.private_email, 2),
+                   (profile.country, 1),
+                   (profile.region, 1),
+                   (profile.city, 1),
+                   (profile.mozillians_profile_url, 1)]
+        for related in [profile.functional_areas, profile.mobilising_skills,
+                        profile.mobilising_interests]:
+            fields += [(item.name, 1) for item in related.all()]
+        return fields
+
+
+DOCUMENTS = dict((document.model, document)
+                 for document in [ReportDocument(), EventDocument(), RepDocument()])
+
+
+def get_entries(model):
+    return SearchEntry.objects.filter(content_type=ContentType.objects.get_for_model(model))
+
+
+def index_objects(model, objects):
+    """Replace the index entries of the /objects/ of /model/."""
+    document = DOCUMENTS[model]
+    content_type = ContentType.objects.get_for_model(model)
+    get_entries(model).filter(object_id__in=[obj.pk for obj in objects]).delete()
+    SearchEntry.objects.bulk_create(
+        SearchEntry(content_type=content_type, object_id=obj.pk, term=term, weight=weight)
+        for obj in objects
+        for term, weight in document.get_term_weights(obj).items())
+
+
+def index_object(obj):
+    """Update the index entries of /obj/ which changed.
+
+    Return the sets of the terms removed from and added to the index.
+    """
+    model = type(obj)
+    weights = DOCUMENTS[model].get_term_weights(obj)
+    entries = get_entries(model).filter(object_id=obj.pk)
+    indexed = dict(entries.values_list('term', 'weight'))
+    removed = set(indexed) - set(weights)
+    added = set(weights) - set(indexed)
+
+    if removed:
+        entries.filter(term__in=removed).delete()
+    content_type = ContentType.objects.get_for_model(model)
+    SearchEntry.objects.bulk_create(
+        SearchEntry(content_type=content_type, object_id=obj.pk, term=term, weight=weights[term])
+        for term in added)
+    changed = defaultdict(list)
+    for term, weight in indexed.items():
+        if term in weights and weights[term] != weight:
+            changed[weights[term]].append(term)
+    for weight, terms in changed.items():
+        entries.filter(term__in=terms).update(weight=weight)
+    return removed, added
+
+
+def index_queryset(queryset, chunk_size=INDEX_CHUNK_SIZE):
+    """Index the objects of /queryset/ /chunk_size/ at a time.
+
+    Return the number of indexed objects.
+    """
+    model = queryset.model
+    count = 0
+    chunk = []
+    for obj in iterate_in_chunks(DOCUMENTS[model].get_queryset(queryset), chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            index_objects(model, chunk)
+            count += len(chunk)
+            chunk = []
+    index_objects(model, chunk)
+    return count + len(chunk)
+
+
+def search(queryset, query, ranked=False):
+    """Filter /queryset/ by the objects matching /query/.
+
+    Every word of /query/ has to start a term of the matching objects.
+    When /ranked/ is True the objects are ordered by relevance, the
+    total weight of their terms matching the query.
+    """
+    terms = get_query_terms(query)
+    if not terms:
+        return queryset
+
+    entries = get_entries(queryset.model)
+    for term in terms:
+        queryset = queryset.filter(
+            pk__in=entries.filter(term__startswith=term).values('object_id'))
+    if not ranked:
+        return queryset
+
+    # The score of each object is summed by a subquery correlated to the
+    # object, so that no matching row is loaded to rank the objects.
+    matching = Q()
+    for term in terms:
+        matching |= Q(term__startswith=term)
+    query = entries.filter(matching).query
+    where, params = query.get_compiler(queryset.db).compile(query.where)
+    qn = connections[queryset.db].ops.quote_name
+    entry_table = qn(SearchEntry._meta.db_table)
+    opts = queryset.model._meta
+    rank = ('SELECT SUM({entries}.{weight}) FROM {entries} WHERE {where} '
+            'AND {entries}.{object_id} = {table}.{pk}'
+            .format(entries=entry_table, weight=qn('weight'), where=where,
+                    object_id=qn('object_id'), table=qn(opts.db_table), pk=qn(opts.pk.column)))
+    return (queryset.extra(select={'search_rank': rank}, select_params=params)
+            .order_by('-search_rank', 'pk'))
+
+
+def update_user_index(user, created=False):
+    """Update the index entries of /user/ and of its reports and events.
+
+    The reports and events are indexed again only when terms were
+    removed from the user or its names and emails have new terms. A
+    /created/ user or profile has neither reports nor events yet.
+    """
+    removed, added = index_object(user)
+    if created:
+        return
+    user_terms = set()
+    for text, weight in get_user_fields(user, 1, emails=True):
+        user_terms.update(get_terms(text or u''))
+    if removed or added & user_terms:
+        # Avoid circular dependency
+        from remo.search.tasks import index_user_documents
+
+        index_user_documents.delay(user.pk)
+
+
+def update_index(sender, instance, raw=False, **kwargs):
+    """Update the index entries of a saved object."""
+    if not raw:
+        index_object(instance)
+
+
+def remove_from_index(sender, instance, **kwargs):
+    """Remove the index entries of a deleted object."""
+    get_entries(sender).filter(object_id=instance.pk).delete()
+
+
+def is_indexed_update(update_fields, indexed_fields):
+    return update_fields is None or bool(set(update_fields) & set(indexed_fields))
+
+
+def update_index_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Update the index entries of a saved user."""
+    if not raw and is_indexed_update(update_fields, RepDocument.user_fields):
+        update_user_index(instance, created)
+
+
+def update_index_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Update the index entries of the user of a saved profile."""
+    if not raw and is_indexed_update(update_fields, RepDocument.profile_fields):
+        update_user_index(instance.user, created)
+
+
+def update_index_comment(sender, instance, raw=False, **kwargs):
+    """Update the index entries of the report of a saved or deleted comment."""
+    if raw:
+        return
+    try:
+        report = instance.report
+    except NGReport.DoesNotExist:
+        return
+    index_object(report)
+
+
+def update_index_m2m(sender, instance, action, reverse, **kwargs):
+    """Update the index entries of an object when its related objects change."""
+    if reverse or action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if isinstance(instance, UserProfile):
+        update_user_index(instance.user)
+    else:
+        index_object(instance)
+
+
+def update_index_event_categories(sender, instance, action, reverse, **kwargs):
+    """Index again the reports of an event when its categories change.
+
+    The functional areas of the passive reports follow the categories of
+    their event without m2m_changed signals.
+    """
+    if reverse or action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    # Avoid circular dependency
+    from remo.search.tasks import index_event_reports
+
+    defer(index_event_reports, instance.pk)
+
+
+for model in [NGReport, Event]:
+    uid = model._meta.model_name
+    post_save.connect(update_index, sender=model,
+                      dispatch_uid='search_{0}_post_save_signal'.format(uid))
+for model in DOCUMENTS:
+    uid = model._meta.model_name
+    post_delete.connect(remove_from_index, sender=model,
+                        dispatch_uid='search_{0}_post_delete_signal'.format(uid))
+post_save.connect(update_index_user, sender=User,
+                  dispatch_uid='search_user_post_save_signal')
+post_save.connect(update_index_profile, sender=UserProfile,
+                  dispatch_uid='search_userprofile_post_save_signal')
+post_save.connect(update_index_comment, sender=NGReportComment,
+                  dispatch_uid='search_ngreportcomment_post_save_signal')
+post_delete.connect(update_index_comment, sender=NGReportComment,
+                    dispatch_uid='search_ngreportcomment_post_delete_signal')
+for through in [NGReport.functional_areas.through, UserProfile.functional_areas.through,
+                UserProfile.mobilising_skills.through,
+                UserProfile.mobilising_interests.through]:
+    uid = through._meta.model_name
+    m2m_changed.connect(update_index_m2m, sender=through,
+                        dispatch_uid='search_{0}_m2m_changed_signal'.format(uid))
+m2m_changed.connect(update_index_event_categories, sender=Event.categories.through,
+                    dispatch_uid='search_event_categories_m2m_changed_signal')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from remo.search.index import DOCUMENTS, get_entries, index_queryset
+
+
+class Command(BaseCommand):
+    """Index again every report, event and user."""
+    args = None
+    help = 'Rebuild the search index'
+
+    def handle(self, *args, **options):
+        """Command handler."""
+        for model in DOCUMENTS:
+            get_entries(model).delete()
+            count = index_queryset(model.objects.all())
+            self.stdout.write('Indexed {0} {1}'.format(count, model._meta.verbose_name_plural))
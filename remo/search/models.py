@@ -0,0 +1,25 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+TERM_MAX_LENGTH = 64
+
+
+@python_2_unicode_compatible
+class SearchEntry(models.Model):
+    """A term of the search index and the object it was found in.
+
+    /weight/ is the sum of the weights of the fields of the object
+    containing the term.
+    """
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.PositiveIntegerField()
+    term = models.CharField(max_length=TERM_MAX_LENGTH)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        index_together = [('content_type', 'term'), ('content_type', 'object_id')]
+
+    def __str__(self):
+        return u'%s: %s' % (self.term, self.object_id)
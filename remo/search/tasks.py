@@ -0,0 +1,20 @@
+from django.db.models import Q
+
+from remo.base.jobs import job
+from remo.celery import app
+from remo.events.models import Event
+from remo.reports.models import NGReport
+from remo.search.index import index_queryset
+
+
+@app.task
+def index_user_documents(user_id):
+    """Index again the reports and events containing the names of a user."""
+    index_queryset(NGReport.objects.filter(Q(user=user_id) | Q(mentor=user_id)))
+    index_queryset(Event.objects.filter(owner=user_id))
+
+
+@job
+def index_event_reports(event_id):
+    """Index again the reports of an event."""
+    index_queryset(NGReport.objects.filter(event=event_id))
@@ -0,0 +1,113 @@
+from StringIO import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from nose.tools import eq_, ok_
+
+from remo.base.tests import RemoTestCase
+from remo.events.models import Event
+from remo.events.tests import EventFactory
+from remo.profiles.tests import FunctionalAreaFactory, UserFactory
+from remo.reports import ACTIVITY_EVENT_ATTEND, ACTIVITY_EVENT_CREATE
+from remo.reports.models import NGReport
+from remo.reports.tests import ActivityFactory, NGReportCommentFactory, NGReportFactory
+from remo.search.index import get_entries, get_terms, search
+from remo.search.models import SearchEntry
+
+
+class GetTermsTest(RemoTestCase):
+
+    def test_terms(self):
+        eq_(get_terms(u'Foo bar@example.com https://example.com/u/Baz'),
+            set([u'foo', u'bar@example.com', u'bar', u'example', u'com',
+                 u'https://example.com/u/baz', u'https', u'u', u'baz']))
+
+
+class SearchTest(RemoTestCase):
+
+    def setUp(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_ATTEND)
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+
+    def test_every_word_matches(self):
+        user = UserFactory.create(first_name='Jane', last_name='Doexq')
+        UserFactory.create(first_name='Jane', last_name='Smithxq')
+        eq_(list(search(User.objects.all(), 'jan doex')), [user])
+        eq_(search(User.objects.all(), 'jane').count(), 2)
+        eq_(search(User.objects.all(), 'doexq smithxq').count(), 0)
+        eq_(search(User.objects.all(), ' ').count(), User.objects.count())
+
+    def test_ranked(self):
+        area = FunctionalAreaFactory.create(name='Firefox')
+        in_area = UserFactory.create(userprofile__functional_areas=[area])
+        in_name = UserFactory.create(first_name='Firefox')
+        eq_(list(search(User.objects.all(), 'firefox', ranked=True)), [in_name, in_area])
+
+    def test_ranked_query_size(self):
+        UserFactory.create(first_name='Rankxq')
+        sql, params = search(User.objects.all(), 'rankxq', ranked=True).query.sql_with_params()
+        UserFactory.create_batch(3, first_name='Rankxq')
+        ranked = search(User.objects.all(), 'rankxq', ranked=True)
+        eq_(ranked.query.sql_with_params(), (sql, params))
+        eq_(ranked.count(), 4)
+
+    def test_report_fields(self):
+        report = NGReportFactory.create(activity_description='Localization sprint')
+        eq_(list(search(NGReport.objects.all(), 'sprint')), [report])
+
+        NGReportCommentFactory.create(report=report, comment='Great work')
+        eq_(list(search(NGReport.objects.all(), 'great')), [report])
+
+        area = FunctionalAreaFactory.create(name='Webcompat')
+        report.functional_areas.add(area)
+        eq_(list(search(NGReport.objects.all(), 'webcompat')), [report])
+
+    def test_event_categories_reindex_reports(self):
+        event = EventFactory.create()
+        report = NGReportFactory.create(event=event)
+        area = FunctionalAreaFactory.create(name='Webcompat')
+        event.categories.add(area)
+        ok_(report in search(NGReport.objects.all(), 'webcompat'))
+
+        event.categories.remove(area)
+        ok_(report not in search(NGReport.objects.all(), 'webcompat'))
+
+    def test_user_changes_reindex_documents(self):
+        user = UserFactory.create(groups=['Rep'])
+        report = NGReportFactory.create(user=user)
+        event = EventFactory.create(owner=user)
+
+        user.first_name = 'Renamed'
+        user.save()
+        reports = search(NGReport.objects.all(), 'renamed')
+        ok_(report in reports)
+        eq_(reports.count(), NGReport.objects.filter(user=user).count())
+        eq_(list(search(Event.objects.all(), 'renamed')), [event])
+
+    def test_delete(self):
+        event = EventFactory.create(name='Launch party')
+        event.delete()
+        ok_(not get_entries(Event).exists())
+
+    def test_unchanged_object(self):
+        user = UserFactory.create()
+        # The user, its functional areas, skills, interests and entries.
+        with self.assertNumQueries(5):
+            user.save()
+
+    def test_unindexed_fields(self):
+        user = UserFactory.create()
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+
+class RebuildSearchIndexTest(RemoTestCase):
+
+    def test_rebuild(self):
+        ActivityFactory.create(name=ACTIVITY_EVENT_ATTEND)
+        ActivityFactory.create(name=ACTIVITY_EVENT_CREATE)
+        event = EventFactory.create(name='Launch party')
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        eq_(list(search(Event.objects.all(), 'launch')), [event])
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'remo.api',
     'remo.events',
     'remo.voting',
+    'remo.search',
 ]
 
 MIDDLEWARE_CLASSES = (
@@ -192,6 +193,7 @@ PLANET_MAX_TIMEOUT = config('PLANET_MAX_TIMEOUT', default=5, cast=int)
 REMOZILLA_USERNAME = config('REMOZILLA_USERNAME', default='')
 REMOZILLA_PASSWORD = config('REMOZILLA_PASSWORD', default='')
 REMOZILLA_API_KEY = config('REMOZILLA_API_KEY', default='')
+REMOZILLA_URL = config('REMOZILLA_URL', default='https://bugzilla.mozilla.org')
 
 # Mailhide
 MAILHIDE_PUB_KEY = config('MAILHIDE_PUB_KEY', default='')
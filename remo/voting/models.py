@@ -6,7 +6,7 @@ from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.models import ContentType
-from django.db import models, transaction
+from django.db import models
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
@@ -15,12 +15,13 @@ from django.utils.timezone import now
 from django_statsd.clients import statsd
 from uuslug import uuslug
 
+from remo.base.jobs import atomic, defer
 from remo.base.tasks import send_remo_mail
 from remo.celery import app as celery_app
 from remo.dashboard.models import ActionItem, Item
 from remo.remozilla.models import Bug
 from remo.remozilla.utils import get_bugzilla_url
-from remo.voting.tasks import send_voting_mail
+from remo.voting.tasks import schedule_poll_reminders
 
 
 # Voting period in days
@@ -94,19 +95,16 @@ class Poll(models.Model):
             action_items = ActionItem.objects.filter(content_type=action_model, object_id=self.pk)
 
             if current_poll.end != self.end:
-                action_items.update(due_date=self.end.date())
+                if action_items.update(due_date=self.end.date()):
+                    # Avoid circular dependency
+                    from remo.dashboard.sections import bump_section_version
+
+                    bump_section_version(ActionItem)
 
             if current_poll.valid_groups != self.valid_groups:
                 action_items.delete()
                 create_action_items = True
 
-            if not settings.CELERY_TASK_ALWAYS_EAGER:
-                if self.is_current_voting:
-                    celery_app.control.revoke(self.task_end_id)
-                elif self.is_future_voting:
-                    celery_app.control.revoke(self.task_start_id)
-                    celery_app.control.revoke(self.task_end_id)
-
             if not self.is_future_voting:
                 obj = Poll.objects.get(pk=self.id)
                 if self.end > obj.end:
@@ -222,24 +220,8 @@ class PollComment(models.Model):
 @receiver(post_save, sender=Poll, dispatch_uid='voting_poll_email_reminder_signal')
 def poll_email_reminder(sender, instance, raw, **kwargs):
     """Send email reminders when a vote starts/ends."""
-    subject_start = '[Voting] Cast your vote for "%s" now!' % instance.name
-    subject_end = '[Voting] Results for "%s"' % instance.name
-
-    start_template = 'emails/voting_starting_reminder.jinja'
-    end_template = 'emails/voting_results_reminder.jinja'
-
-    if not instance.task_start_id or instance.is_future_voting:
-        start_reminder = send_voting_mail.apply_async(
-            eta=instance.start, kwargs={'voting_id': instance.id,
-                                        'subject': subject_start,
-                                        'email_template': start_template})
-        Poll.objects.filter(pk=instance.pk).update(task_start_id=start_reminder.task_id)
-    if not instance.is_past_voting:
-        end_reminder = send_voting_mail.apply_async(
-            eta=instance.end, kwargs={'voting_id': instance.id,
-                                      'subject': subject_end,
-                                      'email_template': end_template})
-        Poll.objects.filter(pk=instance.pk).update(task_end_id=end_reminder.task_id)
+    if not raw:
+        defer(schedule_poll_reminders, instance.pk)
 
 
 @receiver(post_save, sender=Poll, dispatch_uid='voting_automated_poll_discussion_email')
@@ -282,7 +264,7 @@ def automated_poll(sender, instance, **kwargs):
 
     remobot = User.objects.get(username='remobot')
 
-    with transaction.atomic():
+    with atomic():
         poll = (Poll.objects.create(name=instance.summary,
                                     description=instance.first_comment,
                                     valid_groups=Group.objects.get(name='Review'),
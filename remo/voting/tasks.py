@@ -3,19 +3,17 @@ from operator import or_
 
 from django.conf import settings
 from django.contrib.auth.models import Group, User
-from django.contrib.contenttypes.models import ContentType
 from django.core.mail import send_mail
-from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils.timezone import make_aware, now
 
 import pytz
 import waffle
 
+from remo.base.jobs import atomic, job
 from remo.base.tasks import send_remo_mail
-from remo.base.utils import get_date, number2month
+from remo.base.utils import get_date, get_object_or_none, number2month
 from remo.celery import app
-from remo.dashboard.models import ActionItem
 
 
 EXTEND_VOTING_PERIOD = 48 * 3600  # 48 hours
@@ -29,9 +27,12 @@ def rotm_nomination_end_date():
 
 @app.task
 def send_voting_mail(voting_id, subject, email_template):
-    """Send to user_list emails based rendered using email_template
-    and populated with data.
+    """Send to the valid group of a poll emails rendered using
+    email_template.
 
+    The template is rendered once per poll and only the greeting is
+    added per member. The members of the group are mailed in chunks by
+    parallel send_remo_mail tasks.
     """
     # avoid circular dependencies
     from remo.voting.models import Poll
@@ -40,19 +41,55 @@ def send_voting_mail(voting_id, subject, email_template):
     data = {'SITE_URL': settings.SITE_URL,
             'FROM_EMAIL': settings.FROM_EMAIL,
             'poll': poll}
+    message = render_to_string(email_template, data)
 
     if poll.automated_poll:
-        message = render_to_string(email_template, data)
         send_mail(subject, message, settings.FROM_EMAIL, [settings.REPS_REVIEW_ALIAS])
     else:
-        user_list = User.objects.filter(groups=poll.valid_groups).exclude(username='remobot')
+        recipients = (User.objects.filter(groups=poll.valid_groups)
+                      .exclude(username='remobot').values_list('id', flat=True))
+        send_remo_mail(subject=subject, recipients_list=recipients,
+                       message=message, greeting='Hello {first_name},',
+                       stat_name='voting.send_voting_mail')
 
-        for user in user_list:
-            ctx_data = {'user': user,
-                        'userprofile': user.userprofile}
-            ctx_data.update(data)
-            message = render_to_string(email_template, ctx_data)
-            send_mail(subject, message, settings.FROM_EMAIL, [user.email])
+
+@job
+def schedule_poll_reminders(poll_id):
+    """Schedule the emails sent when a saved poll starts and ends.
+
+    The emails scheduled for a previous version of the poll are revoked.
+    """
+    # avoid circular dependencies
+    from remo.voting.models import Poll
+
+    poll = get_object_or_none(Poll, id=poll_id)
+    if not poll:
+        return
+    subject_start = '[Voting] Cast your vote for "%s" now!' % poll.name
+    subject_end = '[Voting] Results for "%s"' % poll.name
+
+    start_template = 'emails/voting_starting_reminder.jinja'
+    end_template = 'emails/voting_results_reminder.jinja'
+
+    if not poll.task_start_id or poll.is_future_voting:
+        revoke_task(poll.task_start_id)
+        start_reminder = send_voting_mail.apply_async(
+            eta=poll.start, kwargs={'voting_id': poll.id,
+                                    'subject': subject_start,
+                                    'email_template': start_template})
+        Poll.objects.filter(pk=poll.pk).update(task_start_id=start_reminder.task_id)
+    if not poll.is_past_voting:
+        revoke_task(poll.task_end_id)
+        end_reminder = send_voting_mail.apply_async(
+            eta=poll.end, kwargs={'voting_id': poll.id,
+                                  'subject': subject_end,
+                                  'email_template': end_template})
+        Poll.objects.filter(pk=poll.pk).update(task_end_id=end_reminder.task_id)
+
+
+def revoke_task(task_id):
+    if task_id and not settings.CELERY_TASK_ALWAYS_EAGER:
+        app.control.revoke(task_id)
 
 
 @app.task
@@ -84,25 +121,15 @@ def extend_voting_period():
                 recipients = (User.objects.filter(groups=poll.valid_groups)
                               .exclude(pk__in=poll.users_voted.all())
                               .values_list('id', flat=True))
-                ctx_data = {'poll': poll}
-                template = 'emails/voting_vote_reminder.jinja'
+                data = {'SITE_URL': settings.SITE_URL,
+                        'FROM_EMAIL': settings.FROM_EMAIL,
+                        'poll': poll}
+                message = render_to_string('emails/voting_vote_reminder.jinja', data)
                 send_remo_mail.delay(subject=subject,
                                      recipients_list=recipients,
-                                     email_template=template,
-                                     data=ctx_data)
-
-
-@app.task
-def resolve_action_items():
-    # avoid circular dependencies
-    from remo.voting.models import Poll
-
-    start = datetime.combine(get_date(days=-1), datetime.min.time())
-    end = datetime.combine(get_date(days=-1), datetime.max.time())
-    polls = Poll.objects.filter(end__range=[start, end])
-    action_model = ContentType.objects.get_for_model(Poll)
-    items = ActionItem.objects.filter(content_type=action_model, object_id__in=polls)
-    items.update(resolved=True)
+                                     message=message,
+                                     greeting='Hey {first_name},',
+                                     stat_name='voting.extend_voting_period')
 
 
 @app.task
@@ -135,7 +162,7 @@ def create_rotm_poll():
         description = 'Automated vote for the Rep of this month.'
         mentor_group = Group.objects.get(name='Mentor')
 
-        with transaction.atomic():
+        with atomic():
             poll = Poll.objects.create(name=poll_name,
                                        description=description,
                                        valid_groups=mentor_group,
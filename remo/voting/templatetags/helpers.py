@@ -1,9 +1,8 @@
-from django.db.models import Q
 from django.contrib.auth.models import User
 
 from django_jinja import library
 
-from remo.base.utils import get_object_or_none
+from remo.base.utils import get_object_or_none, user_in_groups
 from remo.voting.models import Vote
 
 
@@ -37,10 +36,7 @@ def get_meter_value(poll):
 def user_has_poll_permissions(user, poll):
     """Check if a user's group has permissions for a specific poll."""
 
-    if user.groups.filter(Q(id=poll.valid_groups.id)
-                          | Q(name='Admin')).exists():
-        return True
-    return False
+    return user_in_groups(user, poll.valid_groups.name, 'Admin')
 
 
 @library.global_function
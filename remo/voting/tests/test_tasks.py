@@ -1,6 +1,8 @@
 import pytz
 from datetime import datetime, timedelta
 
+from django.conf import settings
+from django.core import mail
 from django.db.models.signals import post_save
 from django.contrib.auth.models import Group, User
 from django.utils.timezone import now
@@ -14,7 +16,7 @@ from remo.base.utils import get_date, number2month
 from remo.remozilla.tests import BugFactory
 from remo.profiles.tests import UserFactory
 from remo.voting.models import Poll, RangePoll, RangePollChoice
-from remo.voting.tasks import create_rotm_poll, extend_voting_period
+from remo.voting.tasks import create_rotm_poll, extend_voting_period, send_voting_mail
 from remo.voting.tests import VoteFactory, PollFactory, RadioPollChoiceFactory, RadioPollFactory
 
 
@@ -103,6 +105,43 @@ class VotingTestTasks(RemoTestCase):
         ok_(not poll.is_extended)
 
 
+class SendVotingMailTest(RemoTestCase):
+
+    @patch('remo.base.tasks.MAIL_CHUNK_SIZE', 2)
+    def test_valid_group_in_chunks(self):
+        group = Group.objects.get(name='Council')
+        User.objects.filter(groups=group).delete()
+        council = UserFactory.create_batch(5, groups=['Council'])
+        with mute_signals(post_save):
+            poll = PollFactory.create(valid_groups=group)
+
+        with patch('remo.base.tasks.get_connection') as mocked_get_connection:
+            send_voting_mail(poll.id, 'Subject', 'emails/voting_starting_reminder.jinja')
+
+        # 5 members in chunks of 2
+        eq_(mocked_get_connection.call_count, 3)
+        messages = [message
+                    for args in mocked_get_connection().send_messages.call_args_list
+                    for message in args[0][0]]
+        eq_(sorted(message.to[0] for message in messages),
+            sorted(u'{0} <{1}>'.format(user.get_full_name(), user.email) for user in council))
+        first_names = dict((user.email, user.first_name) for user in council)
+        for message in messages:
+            ok_(poll.name in message.body)
+            first_name = first_names[message.to[0].split('<')[1][:-1]]
+            ok_(message.body.startswith(u'Hello {0},\n\n'.format(first_name)))
+
+    def test_automated_poll(self):
+        with mute_signals(post_save):
+            poll = PollFactory.create(automated_poll=True, bug=BugFactory.create())
+
+        send_voting_mail(poll.id, 'Subject', 'emails/voting_starting_reminder.jinja')
+
+        eq_(len(mail.outbox), 1)
+        eq_(mail.outbox[0].to, [settings.REPS_REVIEW_ALIAS])
+        ok_(mail.outbox[0].body.startswith('Hello Review,\n\n'))
+
+
 class VotingRotmTestTasks(RemoTestCase):
 
     @patch('remo.voting.tasks.now')
@@ -11,7 +11,7 @@ from django_statsd.clients import statsd
 import forms
 
 from remo.base.decorators import permission_check
-from remo.base.utils import get_or_create_instance
+from remo.base.utils import get_or_create_instance, get_user_groups
 from remo.profiles.models import UserProfile
 from remo.remozilla.models import Bug
 from remo.voting.templatetags.helpers import user_has_poll_permissions
@@ -24,12 +24,13 @@ def list_votings(request):
     user = request.user
     polls = Poll.objects.all()
 
-    is_admin = user.groups.filter(name='Admin').exists()
-    is_peer = user.groups.filter(name='Peers').exists()
-    is_council = user.groups.filter(name='Council').exists()
+    groups = get_user_groups(user)
+    is_admin = 'Admin' in groups
+    is_peer = 'Peers' in groups
+    is_council = 'Council' in groups
 
     if not (is_admin or is_peer):
-        poll_groups = list(user.groups.values_list('name', flat=True))
+        poll_groups = list(groups)
         if is_council:
             poll_groups += ['Review']
         polls = Poll.objects.filter(valid_groups__name__in=poll_groups)
@@ -141,10 +142,11 @@ def view_voting(request, slug):
     user = request.user
     poll = get_object_or_404(Poll, slug=slug)
 
-    is_council = request.user.groups.filter(name='Council').exists()
-    is_peer = user.groups.filter(name='Peers').exists()
+    groups = get_user_groups(user)
+    is_council = 'Council' in groups
+    is_peer = 'Peers' in groups
     is_review_poll = poll.valid_groups.name == 'Review'
-    user_should_vote = user.groups.filter(id=poll.valid_groups.id).exists()
+    user_should_vote = poll.valid_groups.name in groups
     read_only_perms = (is_peer or (is_council and is_review_poll)) and not user_should_vote
 
     # If the user does not belong to a valid poll group